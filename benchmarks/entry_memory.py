@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Memory held per ServerEntry after decoding a "*" listing.
+
+Builds a synthetic list page shaped like the official registry's (a
+$schema URL, an npm package with stdio transport and env vars, and the
+official _meta block on every entry), decodes it the way fetch_items does,
+and reports the bytes traced per retained entry:
+
+    before  plain decoding into a dict-backed dataclass
+    after   interned decoding (interned_object) into the slotted ServerEntry
+
+Usage: python benchmarks/entry_memory.py [--entries 20000]
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.fetcher import ServerEntry  # noqa: E402
+from scripts.json_stream import iter_members  # noqa: E402
+
+SOURCE = "MCP Official"
+
+
+@dataclass
+class DictEntry:
+    """ServerEntry as it was before: a dataclass with a per-instance __dict__."""
+    name: str
+    version: str
+    data: dict[str, Any]
+    source: str
+
+
+def sample_entry(i: int) -> dict[str, Any]:
+    name = f"io.github.author-{i % 500}/server-{i}"
+    return {
+        "server": {
+            "$schema": "https://static.modelcontextprotocol.io/schemas/2025-09-29/server.schema.json",
+            "name": name,
+            "description": f"Tools for service number {i}",
+            "version": f"1.{i % 7}.0",
+            "repository": {"url": f"https://github.com/author-{i % 500}/server-{i}",
+                           "source": "github"},
+            "packages": [{
+                "registryType": "npm",
+                "registryBaseUrl": "https://registry.npmjs.org",
+                "identifier": f"@author-{i % 500}/server-{i}",
+                "version": f"1.{i % 7}.0",
+                "runtimeHint": "npx",
+                "transport": {"type": "stdio"},
+                "environmentVariables": [
+                    {"name": "API_KEY", "description": "API key", "isRequired": True,
+                     "format": "string", "isSecret": True},
+                ],
+            }],
+        },
+        "_meta": {
+            "io.modelcontextprotocol.registry/official": {
+                "status": "active",
+                "publishedAt": "2025-10-01T12:00:00Z",
+                "updatedAt": "2025-10-01T12:00:00Z",
+                "isLatest": True,
+            }
+        },
+    }
+
+
+def page_chunks(body: bytes, size: int = 64 * 1024):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def measure(body: bytes, entry_type: type, intern_strings: bool) -> tuple[int, float]:
+    """Decode the page into entries; return (bytes retained, seconds)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    entries = []
+    for key, data in iter_members(page_chunks(body), {"servers"}, intern_strings):
+        if key == "servers":
+            info = data["server"]
+            entries.append(entry_type(info["name"], info["version"], data, SOURCE))
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del entries
+    return retained, elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000)
+    args = parser.parse_args()
+
+    body = json.dumps({
+        "servers": [sample_entry(i) for i in range(args.entries)],
+        "metadata": {"count": args.entries},
+    }).encode()
+
+    before, before_s = measure(body, DictEntry, intern_strings=False)
+    after, after_s = measure(body, ServerEntry, intern_strings=True)
+
+    n = args.entries
+    print(f"{n} entries, {len(body) / n:.0f} bytes of JSON per entry")
+    print(f"before: {before / n:7.0f} bytes/entry  {before_s:.2f}s")
+    print(f"after:  {after / n:7.0f} bytes/entry  {after_s:.2f}s")
+    print(f"saved:  {(before - after) / n:7.0f} bytes/entry ({1 - after / before:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""CPU time of a "*" compile's decode and write, with and without passthrough.
+
+Decodes a synthetic listing (see entry_memory.py) into entries the way
+fetch_from_public_registry does, then writes them with
+write_compiled_registry, in pretty and compact output:
+
+    decoded      entries hold decoded dicts, re-encoded on write
+    passthrough  entries hold their listed text, with _source spliced in
+
+Usage: python benchmarks/public_passthrough.py [--entries 20000]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.entry_memory import SOURCE, page_chunks, sample_entry  # noqa: E402
+from scripts.compiler import write_compiled_registry  # noqa: E402
+from scripts.fetcher import ServerEntry  # noqa: E402
+from scripts.json_stream import iter_members  # noqa: E402
+
+
+def decode(body: bytes, passthrough: bool) -> list[ServerEntry]:
+    entries = []
+    for key, item in iter_members(
+        page_chunks(body), {"servers"}, intern_strings=not passthrough, with_text=passthrough
+    ):
+        if key != "servers":
+            continue
+        data, text = item if passthrough else (item, None)
+        info = data["server"]
+        entries.append(ServerEntry(
+            info["name"], info["version"], None if passthrough else data, SOURCE, text
+        ))
+    return entries
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000)
+    args = parser.parse_args()
+
+    body = json.dumps({
+        "servers": [sample_entry(i) for i in range(args.entries)],
+        "metadata": {"count": args.entries},
+    }).encode()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output_path = Path(tmpdir) / "registry.json"
+        for compact in (False, True):
+            for passthrough in (False, True):
+                started = time.perf_counter()
+                entries = decode(body, passthrough)
+                decoded = time.perf_counter()
+                write_compiled_registry(entries, output_path, compact=compact)
+                written = time.perf_counter()
+                print(
+                    f"{'compact' if compact else 'pretty':7} "
+                    f"{'passthrough' if passthrough else 'decoded':12}"
+                    f"decode {decoded - started:5.2f}s  write {written - decoded:5.2f}s  "
+                    f"total {written - started:5.2f}s"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,37 @@
 """Compile registry from public and private sources."""
 
+import hashlib
 import json
+import os
+import time
+from collections.abc import Collection, Iterable
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
+from scripts import transport
+from scripts.daemon_pool import DaemonThreadPool
 from scripts.fetcher import FetchError, ServerEntry, fetch_from_public_registry
+from scripts.json_stream import (
+    append_member,
+    encode,
+    iter_members,
+    minify,
+    nest,
+    write_array_document,
+)
+from scripts.precompress import precompress
+from scripts.snapshot import LastGoodStore, Snapshot, SnapshotStore
+
+# _meta key marking entries served from a last-good snapshot
+STALE_META_KEY = "io.modelcontextprotocol.registry/stale"
+
+# Entry key holding an entry's content digest in canonical output
+DIGEST_KEY = "_digest"
+
+# Saved entry key holding a passthrough entry's text as listed (see saved_entries)
+RAW_KEY = "_raw"
 
 
 @dataclass
@@ -20,6 +45,9 @@ class CompileResult:
     """Result of compilation."""
     servers: list[ServerEntry] = field(default_factory=list)
     errors: list[CompileError] = field(default_factory=list)
+    retries: dict[str, int] = field(default_factory=dict)  # Registry name -> retries
+    stale: dict[str, str] = field(default_factory=dict)  # Registry name -> fetch error
+    fetched: dict[str, list[ServerEntry]] = field(default_factory=dict)  # Fetched this run
 
     @property
     def is_success(self) -> bool:
@@ -65,45 +93,174 @@ def check_conflicts(servers: list[ServerEntry]) -> list[CompileError]:
     return errors
 
 
+def saved_entries(servers: list[ServerEntry]) -> list[dict[str, Any]]:
+    """
+    Entries as saved to the build cache or last-good store.
+
+    Passthrough entries keep the text they were listed as (under RAW_KEY,
+    with their name and version), so a reused entry is written out exactly
+    as a freshly fetched one.
+    """
+    return [
+        {"name": s.name, "version": s.version, RAW_KEY: s.raw} if s.raw is not None else s.data
+        for s in servers
+    ]
+
+
+def _entries_from_snapshot(snapshot: Snapshot, registry_name: str) -> list[ServerEntry]:
+    entries: list[ServerEntry] = []
+    for data in snapshot.servers:
+        if RAW_KEY in data:
+            entries.append(ServerEntry(
+                data["name"], data["version"], source=registry_name, raw=data[RAW_KEY]
+            ))
+            continue
+        server_info = data.get("server", {})
+        entries.append(ServerEntry(
+            name=server_info.get("name", ""),
+            version=server_info.get("version", ""),
+            data=data,
+            source=registry_name,
+        ))
+    return entries
+
+
+def load_saved_entries(
+    store: LastGoodStore,
+    reg: dict[str, Any],
+) -> list[ServerEntry] | None:
+    """Load the entries saved for a registry, or None if nothing was saved."""
+    snapshot = store.load(reg["name"], reg["url"])
+    if snapshot is None:
+        return None
+    return _entries_from_snapshot(snapshot, reg["name"])
+
+
+def load_last_good(
+    last_good: LastGoodStore,
+    reg: dict[str, Any],
+    reason: str,
+) -> list[ServerEntry] | None:
+    """Load a registry's last-good entries, marked stale in _meta."""
+    snapshot = last_good.load(reg["name"], reg["url"])
+    if snapshot is None:
+        return None
+
+    entries = _entries_from_snapshot(snapshot, reg["name"])
+    for entry in entries:
+        entry.data = {
+            **entry.data,
+            "_meta": {
+                **entry.data.get("_meta", {}),
+                STALE_META_KEY: {"lastFetchedAt": snapshot.synced_at, "reason": reason},
+            },
+        }
+    return entries
+
+
 def compile_registry(
     registry_config: dict[str, Any],
     root_dir: Path,
     timeout: int = 30,
+    workers: int = 1,
+    snapshots: SnapshotStore | None = None,
+    last_good: LastGoodStore | None = None,
+    deadline: float | None = None,
+    reuse: dict[str, list[ServerEntry]] | None = None,
 ) -> CompileResult:
     """
     Compile a complete registry from all sources.
 
     Process order:
-    1. Fetch from public registries in order
-    2. Load private servers
+    1. Start fetching all public registries concurrently
+    2. Walk registries in declaration order, loading private servers and
+       collecting each public registry's results as they complete
     3. Check for conflicts
     4. Return merged result
+
+    Results are merged in declaration order, so conflict handling is the
+    same as fetching one registry after another.
+
+    With a last-good store (stale-on-error mode), each successful fetch is
+    saved to it. A registry that fails, or hasn't answered `deadline`
+    seconds into the compile, is replaced by its last-good entries,
+    marked stale in _meta and listed in CompileResult.stale.
+
+    Public registries named in `reuse` are not fetched; the given entries
+    are merged in their place. Entries fetched this run are returned in
+    CompileResult.fetched.
     """
     result = CompileResult()
     all_servers: list[ServerEntry] = []
+    reuse = reuse or {}
 
-    for reg in registry_config.get("registries", []):
-        if reg.get("type") == "private":
-            # Load private servers
-            for rel_path in reg.get("servers_relative_path", []):
-                server_path = root_dir / rel_path
+    registries = registry_config.get("registries", [])
+    public = {
+        index: reg for index, reg in enumerate(registries)
+        if reg.get("type") != "private" and reg["name"] not in reuse
+    }
+    retries_before = {
+        index: transport.retry_count(reg["name"]) for index, reg in public.items()
+    }
+
+    deadline_at = (
+        time.monotonic() + deadline
+        if last_good is not None and deadline is not None
+        else None
+    )
+
+    executor = DaemonThreadPool(max(1, len(public)), thread_name_prefix="registry-fetch")
+    try:
+        fetches = {
+            index: executor.submit(fetch_from_public_registry, reg, timeout, workers, snapshots)
+            for index, reg in public.items()
+        }
+
+        for index, reg in enumerate(registries):
+            if reg.get("type") != "private" and reg["name"] in reuse:
+                all_servers.extend(reuse[reg["name"]])
+            elif reg.get("type") == "private":
+                # Load private servers
+                for rel_path in reg.get("servers_relative_path", []):
+                    server_path = root_dir / rel_path
+                    try:
+                        server = load_private_server(
+                            server_path, reg["name"], root_dir
+                        )
+                        all_servers.append(server)
+                    except Exception as e:
+                        result.errors.append(CompileError(
+                            f"Failed to load {rel_path}: {e}"
+                        ))
+            else:
+                # Collect public registry results
+                wait = None if deadline_at is None else max(0, deadline_at - time.monotonic())
                 try:
-                    server = load_private_server(
-                        server_path, reg["name"], root_dir
+                    servers = fetches[index].result(timeout=wait)
+                except (FetchError, TimeoutError) as e:
+                    reason = (
+                        str(e) if isinstance(e, FetchError)
+                        else f"{reg['name']}: no response within {deadline}s"
                     )
-                    all_servers.append(server)
-                except Exception as e:
-                    result.errors.append(CompileError(
-                        f"Failed to load {rel_path}: {e}"
-                    ))
-        else:
-            # Fetch from public registry
-            try:
-                servers = fetch_from_public_registry(reg, timeout)
-                all_servers.extend(servers)
-            except FetchError as e:
-                result.errors.append(CompileError(str(e)))
-                return result  # Fail fast on fetch errors
+                    stale = load_last_good(last_good, reg, reason) if last_good else None
+                    if stale is None:
+                        result.errors.append(CompileError(reason))
+                        return result  # Fail fast on fetch errors
+                    result.stale[reg["name"]] = reason
+                    all_servers.extend(stale)
+                else:
+                    all_servers.extend(servers)
+                    result.fetched[reg["name"]] = servers
+                    if last_good is not None:
+                        last_good.save(reg["name"], reg["url"], saved_entries(servers))
+                finally:
+                    result.retries[reg["name"]] = (
+                        transport.retry_count(reg["name"]) - retries_before[index]
+                    )
+    finally:
+        # Don't wait for fetches still running after a fail-fast return or
+        # a missed deadline; their daemon threads don't delay the exit either
+        executor.shutdown(wait=False, cancel_futures=True)
 
     # Check for conflicts
     conflict_errors = check_conflicts(all_servers)
@@ -119,46 +276,189 @@ def compile_registry(
     return result
 
 
+def utc_now() -> str:
+    """Current time as an RFC 3339 UTC timestamp, as used in _meta."""
+    return datetime.now(UTC).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+def entry_digest(server: ServerEntry) -> str:
+    """Digest of what a compiled entry is built from: its data and source."""
+    encoded = json.dumps(
+        {"data": server.data, "source": server.source},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    ).encode()
+    return "sha256:" + hashlib.sha256(encoded).hexdigest()
+
+
+def registry_digest(entry_digests: Iterable[str]) -> str:
+    """Digest of a canonical compiled registry: its entry digests, in order."""
+    return "sha256:" + hashlib.sha256("\n".join(entry_digests).encode()).hexdigest()
+
+
+def canonical_order(servers: Iterable[ServerEntry]) -> list[ServerEntry]:
+    """Servers sorted by name and version; ties keep registry declaration order."""
+    return sorted(servers, key=lambda s: (s.name, s.version))
+
+
+@dataclass
+class OutputHistory:
+    """Digests and timestamps of private entries in a previous canonical output."""
+    # (name, version) -> (digest, publishedAt, updatedAt)
+    entries: dict[tuple[str, str], tuple[str, str, str]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, output_path: Path, registry_name: str) -> "OutputHistory":
+        """Read a previous output; empty if it is missing, unreadable or not canonical."""
+        history = cls()
+        try:
+            with open(output_path, "rb") as f:
+                chunks = iter(lambda: f.read(transport.STREAM_CHUNK_SIZE), b"")
+                for key, entry in iter_members(chunks, stream_keys=("servers",)):
+                    if key == "servers" and isinstance(entry, dict):
+                        history._add(entry, registry_name)
+        except (OSError, json.JSONDecodeError):
+            return cls()
+        return history
+
+    def _add(self, entry: dict[str, Any], registry_name: str) -> None:
+        meta = entry.get("_meta", {}).get(registry_name)
+        digest = entry.get(DIGEST_KEY)
+        server = entry.get("server", {})
+        if isinstance(meta, dict) and isinstance(digest, str) and isinstance(server, dict):
+            self.entries[(server.get("name", ""), server.get("version", ""))] = (
+                digest, meta.get("publishedAt", ""), meta.get("updatedAt", ""),
+            )
+
+    def timestamps(self, server: ServerEntry, digest: str, now: str) -> tuple[str, str]:
+        """
+        (publishedAt, updatedAt) for a private entry.
+
+        An unchanged entry keeps both; a changed one keeps publishedAt and
+        is updated now; a new one is published now.
+        """
+        previous = self.entries.get((server.name, server.version))
+        if previous is None:
+            return now, now
+        previous_digest, published_at, updated_at = previous
+        if previous_digest == digest:
+            return published_at, updated_at
+        return published_at, now
+
+
+def encode_server(
+    server: ServerEntry,
+    registry_name: str,
+    now: str,
+    compact: bool = False,
+    level: int = 0,
+    history: OutputHistory | None = None,
+    digest: str | None = None,
+) -> str:
+    """
+    Encode a server in API-compatible format, tagged with its _source.
+
+    Private servers (flattened format) are wrapped with a _meta block
+    under registry_name. The text is indented for nesting `level` levels
+    deep, or minified with compact=True. Passthrough entries are written
+    as listed, with _source added: minified with compact=True, otherwise
+    keeping the registry's formatting.
+
+    With a history, the entry is canonical: keys are sorted, it carries
+    its content digest (computed unless given), and private timestamps
+    come from the history.
+    """
+    indent = None if compact else 2
+    separators = (",", ":") if compact else None
+    published_at = updated_at = now
+    if history is not None:
+        digest = digest or entry_digest(server)
+        published_at, updated_at = history.timestamps(server, digest, now)
+
+    if server.raw is not None and history is None:
+        # Passthrough entry: add _source to the text as listed
+        text = minify(server.raw) if compact else nest(server.raw, indent, level)
+        return append_member(text, "_source", server.source, indent, level, separators)
+    data = server.data  # Decoded once, for passthrough entries
+    # Check if data is already wrapped (from public registry)
+    if "server" in data and "_source" not in data and history is None:
+        # Already wrapped (public registry format): add _source to the
+        # encoded entry instead of copying it
+        text = encode(data, indent, level, separators)
+        return append_member(text, "_source", server.source, indent, level, separators)
+    if "server" in data:
+        wrapped = {**data, "_source": server.source}
+    else:
+        # Flattened format (private server) - wrap it
+        wrapped = {
+            "server": data,
+            "_meta": {
+                registry_name: {
+                    "status": "active",
+                    "publishedAt": published_at,
+                    "updatedAt": updated_at,
+                    "isLatest": True,
+                }
+            },
+            "_source": server.source,
+        }
+    if history is not None:
+        wrapped[DIGEST_KEY] = digest
+    return encode(wrapped, indent, level, separators, sort_keys=history is not None)
+
+
 def write_compiled_registry(
     servers: list[ServerEntry],
     output_path: Path,
     registry_name: str = "io.modelcontextprotocol.registry/private",
+    compact: bool = False,
+    now: str | None = None,
+    precompressed: Collection[str] = (),
+    canonical: bool = False,
+    history: OutputHistory | None = None,
 ) -> None:
-    """Write the compiled registry to a JSON file."""
+    """
+    Write the compiled registry to a JSON file.
+
+    Servers are encoded and written one at a time to a temp file, which
+    then replaces the output atomically. The default output is indented;
+    compact=True writes minified JSON. Each format in precompressed
+    ("gzip", "brotli") also gets a compressed sibling (see precompress).
+
+    canonical=True makes the output a function of its inputs: servers are
+    sorted, keys are sorted, private timestamps carry over from the
+    previous output (or history) unless the entry changed, and every
+    entry plus the metadata carries a digest.
+    """
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    now = now or utc_now()
+    digests: list[str | None] = [None] * len(servers)
+    if canonical:
+        servers = canonical_order(servers)
+        if history is None:
+            history = OutputHistory.load(output_path, registry_name)
+        digests = [entry_digest(s) for s in servers]
 
-    now = datetime.now(UTC).isoformat(timespec="seconds").replace("+00:00", "Z")
-
-    def wrap_server(server: ServerEntry) -> dict:
-        """Wrap server data in API-compatible format."""
-        # Check if data is already wrapped (from public registry)
-        if "server" in server.data:
-            # Already wrapped (public registry format)
-            return {
-                **server.data,
-                "_source": server.source,
-            }
-        else:
-            # Flattened format (private server) - wrap it
-            return {
-                "server": server.data,
-                "_meta": {
-                    registry_name: {
-                        "status": "active",
-                        "publishedAt": now,
-                        "updatedAt": now,
-                        "isLatest": True,
-                    }
-                },
-                "_source": server.source,
-            }
-
-    output = {
-        "servers": [wrap_server(server) for server in servers],
-        "metadata": {
-            "count": len(servers),
-        }
-    }
+    def metadata(count: int) -> dict[str, Any]:
+        if not canonical:
+            return {"metadata": {"count": count}}
+        return {"metadata": {"count": count, "digest": registry_digest(digests)}}
 
-    with open(output_path, "w") as f:
-        json.dump(output, f, indent=2)
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write_array_document(
+                f,
+                "servers",
+                (
+                    encode_server(s, registry_name, now, compact, 2, history, digest)
+                    for s, digest in zip(servers, digests, strict=True)
+                ),
+                metadata,
+                None if compact else 2,
+                (",", ":") if compact else None,
+            )
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    precompress(output_path, precompressed)
@@ -0,0 +1,152 @@
+"""Change feed between two compiled registries.
+
+Clients that already hold a compiled registry can apply the delta instead
+of downloading the whole file again. A delta is NDJSON: the first line
+describes it, and each following line is one server change:
+
+    {"from": "sha256:...", "to": "sha256:...", "added": 1, "changed": 1, "removed": 1}
+    {"op": "add", "name": "acme/new", "version": "1.0.0", "entry": {...}}
+    {"op": "replace", "name": "acme/tool", "version": "2.0.0", "entry": {...}}
+    {"op": "remove", "name": "acme/old", "version": "0.3.0"}
+
+Entries are compared by name, using their _digest. `compile --emit-delta`
+always writes canonical output, so private entries keep their timestamps
+and digest until their definition changes; other outputs fall back to a
+hash of the whole entry. "from" and "to" are the registries' metadata
+digests, or the file hashes when they have none.
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from scripts import transport
+from scripts.compiler import DIGEST_KEY
+from scripts.json_stream import iter_members
+
+
+def entry_hash(entry: dict[str, Any]) -> str:
+    """An entry's digest, or a hash of its content when it has none."""
+    digest = entry.get(DIGEST_KEY)
+    if isinstance(digest, str):
+        return digest
+    encoded = json.dumps(entry, sort_keys=True, separators=(",", ":")).encode()
+    return "sha256:" + hashlib.sha256(encoded).hexdigest()
+
+
+@dataclass
+class OutputDigests:
+    """Per-server digests of a compiled registry."""
+    digest: str | None = None  # The registry's digest (None if there was no file)
+    servers: dict[str, tuple[str, str]] = field(default_factory=dict)  # name -> (version, hash)
+
+
+def _iter_output(path: Path) -> Iterator[tuple[str, Any]]:
+    with open(path, "rb") as f:
+        yield from iter_members(
+            iter(lambda: f.read(transport.STREAM_CHUNK_SIZE), b""), stream_keys=("servers",)
+        )
+
+
+def _file_hash(path: Path) -> str:
+    with open(path, "rb") as f:
+        return "sha256:" + hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def load_digests(path: Path) -> OutputDigests:
+    """Read a compiled registry's digests; empty if it is missing or unreadable."""
+    digests = OutputDigests()
+    metadata_digest = None
+    try:
+        for key, value in _iter_output(path):
+            if key == "servers" and isinstance(value, dict):
+                server = value.get("server", {})
+                digests.servers[server.get("name", "")] = (
+                    server.get("version", ""), entry_hash(value)
+                )
+            elif key == "metadata" and isinstance(value, dict):
+                metadata_digest = value.get("digest")
+        digests.digest = metadata_digest or _file_hash(path)
+    except (OSError, json.JSONDecodeError):
+        return OutputDigests()
+    return digests
+
+
+@dataclass
+class DeltaSummary:
+    """What a delta contains."""
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+
+
+def write_delta(previous: OutputDigests, output_path: Path, delta_path: Path) -> DeltaSummary:
+    """
+    Write the delta from a previous registry to the one at output_path.
+
+    The new registry is read as a stream and changes are spooled to disk,
+    so only the previous registry's digests stay in memory. The delta
+    replaces delta_path atomically.
+    """
+    summary = DeltaSummary()
+    remaining = dict(previous.servers)
+    metadata_digest = None
+
+    tmp_path = delta_path.with_name(f".{delta_path.name}.tmp")
+    changes_path = delta_path.with_name(f".{delta_path.name}.changes.tmp")
+    try:
+        with open(changes_path, "w") as changes:
+            for key, value in _iter_output(output_path):
+                if key == "metadata" and isinstance(value, dict):
+                    metadata_digest = value.get("digest")
+                if key != "servers" or not isinstance(value, dict):
+                    continue
+                server = value.get("server", {})
+                name = server.get("name", "")
+                old = remaining.pop(name, None)
+                if old is not None and old[1] == entry_hash(value):
+                    continue
+                if old is None:
+                    op = "add"
+                    summary.added += 1
+                else:
+                    op = "replace"
+                    summary.changed += 1
+                changes.write(_line({
+                    "op": op, "name": name, "version": server.get("version", ""), "entry": value,
+                }))
+            for name, (version, _) in remaining.items():
+                summary.removed += 1
+                changes.write(_line({"op": "remove", "name": name, "version": version}))
+
+        # The header needs the counts, so it is written once the changes are known
+        with open(tmp_path, "w") as f, open(changes_path) as changes:
+            f.write(_line({
+                "from": previous.digest,
+                "to": metadata_digest or _file_hash(output_path),
+                "added": summary.added,
+                "changed": summary.changed,
+                "removed": summary.removed,
+            }))
+            while chunk := changes.read(transport.STREAM_CHUNK_SIZE):
+                f.write(chunk)
+        os.replace(tmp_path, delta_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        changes_path.unlink(missing_ok=True)
+    return summary
+
+
+def _line(value: dict[str, Any]) -> str:
+    return json.dumps(value, separators=(",", ":")) + "\n"
+
+
+def delta_path_for(output_path: Path) -> Path:
+    """Where the delta of a compiled registry is written: registry.delta.ndjson."""
+    return output_path.with_name(f"{output_path.stem}.delta.ndjson")
@@ -2,19 +2,23 @@
 """
 Fetch all MCP servers from the official MCP Registry.
 
-Usage:
-    python scripts/fetch_all_servers.py
-    python scripts/fetch_all_servers.py --output servers.json
-    python scripts/fetch_all_servers.py --limit 50
+Usage (from the repository root, so the scripts package is importable):
+    python -m scripts.fetch_all_servers
+    python -m scripts.fetch_all_servers --output servers.json
+    python -m scripts.fetch_all_servers --limit 50
 """
 
 import argparse
-import json
+import os
 import sys
-from typing import Any, Iterator
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any, TextIO
 
 import requests
 
+from scripts.fetcher import DEFAULT_PREFETCH_PAGES, fetch_items
+from scripts.json_stream import encode, write_array_document
 
 REGISTRY_URL = "https://registry.modelcontextprotocol.io/v0.1/servers"
 
@@ -22,38 +26,59 @@ REGISTRY_URL = "https://registry.modelcontextprotocol.io/v0.1/servers"
 def fetch_all_servers(
     limit_per_page: int = 100,
     timeout: int = 30,
+    prefetch: int = DEFAULT_PREFETCH_PAGES,
 ) -> Iterator[dict[str, Any]]:
     """
     Fetch all servers from the MCP registry using cursor-based pagination.
-    
+
     Args:
         limit_per_page: Number of servers to fetch per request (max 100)
         timeout: Request timeout in seconds
-        
+        prefetch: Pages to request ahead while earlier ones are processed
+
     Yields:
-        Server entries from the registry
+        Server entries from the registry, decoded one at a time
     """
-    cursor = None
-    
-    while True:
-        params = {"limit": limit_per_page}
-        if cursor:
-            params["cursor"] = cursor
-            
-        response = requests.get(REGISTRY_URL, params=params, timeout=timeout)
-        response.raise_for_status()
-        data = response.json()
-        
-        servers = data.get("servers", [])
-        for server in servers:
-            yield server
-            
-        # Check for next page using nextCursor from metadata
-        metadata = data.get("metadata", {})
-        cursor = metadata.get("nextCursor")
-        
-        if not cursor:
-            break
+    params = {"limit": limit_per_page}
+    yield from fetch_items(REGISTRY_URL, params, timeout, prefetch)
+
+
+def write_servers_json(
+    servers: Iterable[dict[str, Any]],
+    out: TextIO,
+    indent: int | None = None,
+) -> int:
+    """
+    Write {"servers": [...], "count": N} as servers arrive.
+
+    Output is identical to json.dumps of the whole document, but only one
+    server is held at a time. Returns the number of servers written.
+    """
+    return write_array_document(
+        out,
+        "servers",
+        (encode(server, indent, 2) for server in servers),
+        lambda count: {"count": count},
+        indent,
+    )
+
+
+@contextmanager
+def open_output(path: str | None) -> Iterator[TextIO]:
+    """Write to path (replaced only on success), or to stdout when None."""
+    if path is None:
+        yield sys.stdout
+        sys.stdout.write("\n")
+        return
+
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            yield f
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
 
 
 def main():
@@ -82,48 +107,38 @@ def main():
         action="store_true",
     )
     args = parser.parse_args()
-    
-    servers = []
+
     count = 0
-    
-    try:
+
+    def servers() -> Iterator[dict[str, Any]]:
+        """Fetched servers, up to --limit, reporting progress to stderr."""
+        nonlocal count
         for server in fetch_all_servers():
             if args.limit and count >= args.limit:
                 break
-                
-            servers.append(server)
+            yield server
             count += 1
-            
-            # Print progress to stderr
             if count % 100 == 0:
                 print(f"Fetched {count} servers...", file=sys.stderr)
-                
+
+    # Servers are written out as they arrive rather than collected first
+    try:
+        with open_output(args.output) as out:
+            if args.names_only:
+                for i, s in enumerate(servers()):
+                    server_info = s.get("server", {})
+                    name = server_info.get("name", "unknown")
+                    version = server_info.get("version", "")
+                    out.write(("\n" if i else "") + (f"{name}@{version}" if version else name))
+            else:
+                write_servers_json(servers(), out, indent=2 if args.pretty else None)
     except requests.RequestException as e:
         print(f"Error fetching servers: {e}", file=sys.stderr)
         sys.exit(1)
-        
-    print(f"Total servers fetched: {len(servers)}", file=sys.stderr)
-    
-    # Format output
-    if args.names_only:
-        output_lines = []
-        for s in servers:
-            server_info = s.get("server", {})
-            name = server_info.get("name", "unknown")
-            version = server_info.get("version", "")
-            output_lines.append(f"{name}@{version}" if version else name)
-        output = "\n".join(output_lines)
-    else:
-        indent = 2 if args.pretty else None
-        output = json.dumps({"servers": servers, "count": len(servers)}, indent=indent)
-    
-    # Write output
+
+    print(f"Total servers fetched: {count}", file=sys.stderr)
     if args.output:
-        with open(args.output, "w") as f:
-            f.write(output)
         print(f"Output written to {args.output}", file=sys.stderr)
-    else:
-        print(output)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,38 @@
 """Fetch servers from public MCP registries."""
 
+import contextvars
+import json
+import queue
+import threading
+from collections.abc import Generator, Iterable, Iterator
 from dataclasses import dataclass
-from typing import Any, Iterator
+from datetime import UTC, datetime, timedelta
+from typing import Any
 from urllib.parse import quote
 
 import requests
 
+from scripts import transport
+from scripts.daemon_pool import DaemonThreadPool
+from scripts.json_stream import interned_object, iter_members
+from scripts.matcher import NameMatcher
+from scripts.snapshot import Snapshot, SnapshotStore
+
+# Re-request this much history on each incremental sync, to tolerate clock
+# skew between us and the registry. Re-applying an update is harmless.
+SYNC_OVERLAP = timedelta(minutes=5)
+
+# Pages requested ahead of the consumer during cursor pagination
+DEFAULT_PREFETCH_PAGES = 2
+
+_END_OF_STREAM = object()
+
+# Statuses a registry may answer a `search` param it doesn't know with
+SEARCH_UNSUPPORTED_STATUSES = frozenset({400, 422})
+
+# Registry URLs found to ignore or reject the `search` param
+_search_unsupported: set[str] = set()
+
 
 @dataclass
 class FetchError(Exception):
@@ -17,40 +44,275 @@ class FetchError(Exception):
         return f"{self.registry_name}: {self.message}"
 
 
-@dataclass
 class ServerEntry:
-    """A server entry from a registry."""
-    name: str
-    version: str
-    data: dict[str, Any]
-    source: str  # Registry name
+    """
+    A server entry from a registry (slotted: a "*" compile holds thousands).
+
+    A passthrough entry keeps the JSON text it was listed as in `raw`
+    instead of a decoded dict, and is written out as that text. Its `data`
+    is decoded from `raw` on each access; assigning `data` replaces it.
+    """
+    __slots__ = ("name", "version", "source", "raw", "_data")
+
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        data: dict[str, Any] | None = None,
+        source: str = "",  # Registry name
+        raw: str | None = None,
+    ):
+        self.name = name
+        self.version = version
+        self.source = source
+        self.raw = raw
+        self._data = data
+
+    @property
+    def data(self) -> dict[str, Any]:
+        if self._data is None and self.raw is not None:
+            return json.loads(self.raw, object_pairs_hook=interned_object)
+        return self._data if self._data is not None else {}
+
+    @data.setter
+    def data(self, value: dict[str, Any]) -> None:
+        self._data = value
+        self.raw = None
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ServerEntry):
+            return NotImplemented
+        return (self.name, self.version, self.data, self.source) == (
+            other.name, other.version, other.data, other.source
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"ServerEntry(name={self.name!r}, version={self.version!r}, "
+            f"data={self.data!r}, source={self.source!r})"
+        )
+
+
+def _fetch_items_serial(
+    url: str,
+    params: dict[str, Any],
+    timeout: int,
+    key: str,
+    with_text: bool = False,
+) -> Iterator[Any]:
+    """
+    Stream the elements of each page's `key` array, following metadata.nextCursor.
+
+    Page bodies are decoded incrementally, so an element is yielded as soon
+    as it has been read and the page is never held in memory as a whole.
+    With with_text, (element, JSON text as received) pairs are yielded.
+    """
+    cursor = None
+
+    while True:
+        page_params = dict(params)
+        if cursor:
+            page_params["cursor"] = cursor
+
+        response = transport.get(url, params=page_params, timeout=timeout, stream=True)
+        try:
+            response.raise_for_status()
+            cursor = None
+            chunks = response.iter_content(transport.STREAM_CHUNK_SIZE)
+            for member, value in iter_members(
+                chunks, {key}, intern_strings=not with_text, with_text=with_text
+            ):
+                if member == key:
+                    yield value
+                elif member == "metadata" and isinstance(value, dict):
+                    cursor = value.get("nextCursor")
+        except json.JSONDecodeError as e:
+            # Match response.json(), whose decode errors are RequestExceptions
+            raise requests.JSONDecodeError(e.msg, e.doc, e.pos) from e
+        finally:
+            response.close()
+
+        if not cursor:
+            break
+
+
+def _prefetch(source: Generator[Any, None, None], maxsize: int) -> Iterator[Any]:
+    """
+    Run `source` on a background thread, at most `maxsize` items ahead.
+
+    Errors raised by the source are re-raised to the caller. Once the
+    caller stops iterating, the background thread stops too.
+    """
+    items: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        # Poll so the producer notices when the consumer has gone away
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in source:
+                if not put(item):
+                    return
+            put(_END_OF_STREAM)
+        except Exception as e:
+            put(e)
+        finally:
+            source.close()  # Release an open response if the consumer left early
+
+    producer = threading.Thread(
+        target=contextvars.copy_context().run, args=(produce,), name="page-prefetch", daemon=True
+    )
+    producer.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _END_OF_STREAM:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def fetch_items(
+    url: str,
+    params: dict[str, Any] | None = None,
+    timeout: int = 30,
+    prefetch: int = DEFAULT_PREFETCH_PAGES,
+    key: str = "servers",
+    with_text: bool = False,
+) -> Iterator[Any]:
+    """
+    Yield the `key` array elements of a cursor-paginated endpoint one by one.
+
+    A background thread requests page N+1 as soon as page N's nextCursor is
+    known, while the caller is still processing page N; prefetch=0 fetches
+    serially on the calling thread. Errors are re-raised to the caller.
+    Each page body is decoded as a stream, so memory stays bounded by the
+    prefetch queue (`prefetch` pages' worth of elements, going by the
+    "limit" param) rather than by page or catalog size.
+    With with_text, each element comes with its JSON text as received.
+    """
+    params = params or {}
+    items = _fetch_items_serial(url, params, timeout, key, with_text)
+    if prefetch < 1:
+        yield from items
+        return
+    yield from _prefetch(items, prefetch * params.get("limit", 100))
 
 
 def fetch_server_list(
     base_url: str,
     timeout: int = 30,
+    updated_since: str | None = None,
+    prefetch: int = DEFAULT_PREFETCH_PAGES,
+    search: str | None = None,
 ) -> Iterator[dict[str, Any]]:
-    """Fetch all servers from a registry, handling pagination."""
+    """
+    Fetch all servers from a registry, handling pagination.
+
+    With updated_since (RFC 3339), only servers updated after that time.
+    With search, only servers the registry matches to that term.
+    Servers are decoded from each page as they arrive, and upcoming pages
+    are prefetched in the background (see fetch_items).
+    """
     url = f"{base_url.rstrip('/')}/v0.1/servers"
-    cursor = None
+    params: dict[str, Any] = {"limit": 100}
+    if updated_since:
+        params["updated_since"] = updated_since
+    if search:
+        params["search"] = search
 
-    while True:
-        params = {"limit": 100}
-        if cursor:
-            params["cursor"] = cursor
+    yield from fetch_items(url, params, timeout, prefetch)
 
-        response = requests.get(url, params=params, timeout=timeout)
-        response.raise_for_status()
-        data = response.json()
 
-        for server in data.get("servers", []):
-            yield server
+def fetch_server_list_text(
+    base_url: str,
+    timeout: int = 30,
+    prefetch: int = DEFAULT_PREFETCH_PAGES,
+) -> Iterator[tuple[dict[str, Any], str]]:
+    """Like fetch_server_list, also yielding each server's JSON text as received."""
+    url = f"{base_url.rstrip('/')}/v0.1/servers"
+    yield from fetch_items(url, {"limit": 100}, timeout, prefetch, with_text=True)
 
-        # Check for next page
-        metadata = data.get("metadata", {})
-        cursor = metadata.get("nextCursor")
-        if not cursor:
-            break
+
+def search_server_list(
+    base_url: str,
+    prefix: str,
+    timeout: int = 30,
+) -> list[dict[str, Any]] | None:
+    """
+    List the servers whose names start with prefix, using the `search` param.
+
+    Registries search by substring, so results are filtered to the prefix
+    here. Returns None if the registry doesn't support search: it rejects
+    the param, or ignores it and answers with names that don't contain the
+    search term. The registry is then remembered as unsupported.
+    """
+    if base_url in _search_unsupported:
+        return None
+
+    needle = prefix.lower()
+    matches: list[dict[str, Any]] = []
+
+    try:
+        for server_data in fetch_server_list(base_url, timeout, search=prefix):
+            server_name = server_data.get("server", {}).get("name", "")
+            if needle not in server_name.lower():
+                _search_unsupported.add(base_url)
+                return None
+            if server_name.startswith(prefix):
+                matches.append(server_data)
+    except requests.HTTPError as e:
+        if e.response is None or e.response.status_code not in SEARCH_UNSUPPORTED_STATUSES:
+            raise
+        _search_unsupported.add(base_url)
+        return None
+
+    return matches
+
+
+def search_servers(
+    base_url: str,
+    prefixes: list[str],
+    timeout: int = 30,
+    workers: int = 1,
+) -> list[dict[str, Any]] | None:
+    """
+    Search a registry for several name prefixes, on up to `workers` threads.
+
+    Results are concatenated in prefix order. Returns None if the registry
+    doesn't support search.
+    """
+    def search(prefix: str) -> list[dict[str, Any]] | None:
+        return search_server_list(base_url, prefix, timeout)
+
+    if workers <= 1 or len(prefixes) <= 1:
+        results = []
+        for prefix in prefixes:
+            matches = search(prefix)
+            if matches is None:
+                return None
+            results.append(matches)
+    else:
+        executor = DaemonThreadPool(min(workers, len(prefixes)), thread_name_prefix="search")
+        try:
+            results = list(executor.map(search, prefixes))
+        finally:
+            executor.shutdown(cancel_futures=True)
+        if any(matches is None for matches in results):
+            return None
+
+    return [server_data for matches in results for server_data in matches]
 
 
 def fetch_server_version(
@@ -63,9 +325,73 @@ def fetch_server_version(
     # URL encode the server name (e.g., "ai.exa/exa" -> "ai.exa%2Fexa")
     encoded_name = quote(server_name, safe="")
     url = f"{base_url.rstrip('/')}/v0.1/servers/{encoded_name}/versions/{version}"
-    response = requests.get(url, timeout=timeout)
+    response = transport.get(url, timeout=timeout)
     response.raise_for_status()
-    return response.json()
+    return response.json(object_pairs_hook=interned_object)
+
+
+def _meta_value(server_data: dict[str, Any], key: str) -> Any:
+    """Return a field from the first registry _meta block that has it."""
+    for meta in server_data.get("_meta", {}).values():
+        if isinstance(meta, dict) and key in meta:
+            return meta[key]
+    return None
+
+
+def _is_deleted(server_data: dict[str, Any]) -> bool:
+    return _meta_value(server_data, "status") == "deleted"
+
+
+def _ignores_updated_since(delta: list[dict[str, Any]], since: str) -> bool:
+    """Detect a registry that returned older entries despite updated_since."""
+    since_time = datetime.fromisoformat(since)
+    for server_data in delta:
+        updated_at = _meta_value(server_data, "updatedAt")
+        if updated_at and datetime.fromisoformat(updated_at) < since_time:
+            return True
+    return False
+
+
+def sync_server_list(
+    base_url: str,
+    snapshots: SnapshotStore,
+    timeout: int = 30,
+) -> list[dict[str, Any]]:
+    """
+    Return a registry's full server list, kept up to date in a snapshot.
+
+    The first sync walks the whole listing. Later syncs only request
+    servers updated since the previous one and merge them into the stored
+    list: "deleted" entries are dropped, anything else (including status
+    changes such as "deprecated") replaces the stored version.
+    """
+    started = datetime.now(UTC)
+    snapshot = snapshots.load(base_url)
+
+    def key(server_data: dict[str, Any]) -> tuple[str, str]:
+        server_info = server_data.get("server", {})
+        return server_info.get("name", ""), server_info.get("version", "")
+
+    if snapshot is None:
+        merged: dict[tuple[str, str], dict[str, Any]] = {}
+        delta = list(fetch_server_list(base_url, timeout))
+    else:
+        merged = {key(s): s for s in snapshot.servers}
+        delta = list(fetch_server_list(base_url, timeout, updated_since=snapshot.synced_at))
+        if _ignores_updated_since(delta, snapshot.synced_at):
+            # Registry sent its full listing; don't keep entries it dropped
+            merged = {}
+
+    for server_data in delta:
+        if _is_deleted(server_data):
+            merged.pop(key(server_data), None)
+        else:
+            merged[key(server_data)] = server_data
+
+    servers = list(merged.values())
+    synced_at = (started - SYNC_OVERLAP).isoformat(timespec="seconds").replace("+00:00", "Z")
+    snapshots.save(Snapshot(url=base_url, synced_at=synced_at, servers=servers))
+    return servers
 
 
 def _parse_author_pattern(key: str) -> str | None:
@@ -80,9 +406,53 @@ def _parse_author_pattern(key: str) -> str | None:
     return None
 
 
+def _satisfies_version(server_data: dict[str, Any], version: str) -> bool:
+    """
+    Check whether a server list entry already is the requested version.
+
+    "latest" is satisfied when any registry's _meta marks the entry isLatest;
+    a pinned version when the entry's version matches exactly.
+    """
+    if version == "latest":
+        return any(
+            isinstance(meta, dict) and meta.get("isLatest") is True
+            for meta in server_data.get("_meta", {}).values()
+        )
+    return server_data.get("server", {}).get("version") == version
+
+
+def fetch_server_versions(
+    base_url: str,
+    wanted: list[tuple[str, str]],
+    timeout: int = 30,
+    workers: int = 1,
+) -> list[dict[str, Any]]:
+    """
+    Fetch several (server name, version) pairs from a registry.
+
+    Up to `workers` requests run concurrently. Results are returned in the
+    same order as `wanted`, regardless of which request finishes first.
+    """
+    def fetch(item: tuple[str, str]) -> dict[str, Any]:
+        server_name, version = item
+        return fetch_server_version(base_url, server_name, version, timeout)
+
+    if workers <= 1 or len(wanted) <= 1:
+        return [fetch(item) for item in wanted]
+
+    executor = DaemonThreadPool(min(workers, len(wanted)), thread_name_prefix="version-fetch")
+    try:
+        return list(executor.map(fetch, wanted))
+    finally:
+        # Don't start queued requests once one of them has failed
+        executor.shutdown(cancel_futures=True)
+
+
 def fetch_from_public_registry(
     registry_config: dict[str, Any],
     timeout: int = 30,
+    workers: int = 1,
+    snapshots: SnapshotStore | None = None,
 ) -> list[ServerEntry]:
     """
     Fetch servers from a public registry based on config.
@@ -91,18 +461,87 @@ def fetch_from_public_registry(
     - servers: "*" (all servers, with optional exclude list)
     - servers: {"name": "version", ...} (specific servers)
     - servers: {"author/*": "version", ...} (all servers from author)
+
+    Exclude entries may be exact names, author/* prefixes or globs, and
+    apply to every server selected. A name matching nested author/*
+    patterns gets the version of the longest one.
+
+    Pattern matches reuse the list entry when it already is the requested
+    version, so only the remaining lookups hit the version endpoint. Those
+    run on up to `workers` threads (overridden by the registry's own
+    "workers" setting); result order matches serial fetching.
+
+    Without a snapshot store, author/* patterns are looked up with the
+    registry's `search` param instead of listing the whole catalog, unless
+    the registry sets "search": false. Registries without search support
+    fall back to the full listing.
+
+    With a snapshot store, the server list is synced incrementally unless
+    the registry sets "incremental": false. The registry's "retry" and
+    "rateLimit" settings apply to the requests made for it.
+
+    A "*" registry with "passthrough": true (and no incremental sync)
+    returns passthrough entries, holding each server's JSON as listed
+    (see ServerEntry). Requests are made in the registry's
+    transport.registry_scope.
     """
+    with transport.registry_scope(registry_config["name"]):
+        return _fetch_registry(registry_config, timeout, workers, snapshots)
+
+
+def _fetch_registry(
+    registry_config: dict[str, Any],
+    timeout: int,
+    workers: int,
+    snapshots: SnapshotStore | None,
+) -> list[ServerEntry]:
     name = registry_config["name"]
     base_url = registry_config["url"]
     servers_config = registry_config["servers"]
-    exclude = set(registry_config.get("exclude", []))
+    exclude = NameMatcher(registry_config.get("exclude", []))
+    workers = registry_config.get("workers", workers)
+    transport.configure_registry(registry_config)
+
+    if snapshots is not None and not registry_config.get("incremental", True):
+        snapshots = None
+    passthrough = registry_config.get("passthrough", False) and snapshots is None
+
+    def list_servers() -> Iterable[dict[str, Any]]:
+        if snapshots is None:
+            return fetch_server_list(base_url, timeout)
+        return sync_server_list(base_url, snapshots, timeout)
+
+    def list_pattern_candidates(prefixes: list[str]) -> Iterable[dict[str, Any]]:
+        # A synced snapshot already holds the full listing cheaply
+        if snapshots is None and registry_config.get("search", True):
+            found = search_servers(base_url, prefixes, timeout, workers)
+            if found is not None:
+                return found
+        return list_servers()
 
     results: list[ServerEntry] = []
 
     try:
-        if servers_config == "*":
+        if servers_config == "*" and passthrough:
+            # Keep each server's text as listed; only its name and version are used
+            for server_data, text in fetch_server_list_text(base_url, timeout):
+                server_info = server_data.get("server", {})
+                server_name = server_info.get("name", "")
+
+                if server_name in exclude:
+                    continue
+
+                written_as_is = "server" in server_data and "_source" not in server_data
+                results.append(ServerEntry(
+                    name=server_name,
+                    version=server_info.get("version", ""),
+                    data=None if written_as_is else server_data,
+                    source=name,
+                    raw=text if written_as_is else None,
+                ))
+        elif servers_config == "*":
             # Fetch all servers
-            for server_data in fetch_server_list(base_url, timeout):
+            for server_data in list_servers():
                 server_info = server_data.get("server", {})
                 server_name = server_info.get("name", "")
 
@@ -117,48 +556,59 @@ def fetch_from_public_registry(
                 ))
         else:
             # Separate patterns from exact names
-            patterns: dict[str, str] = {}  # prefix -> version
+            patterns: dict[str, str] = {}  # "author/*" -> version
             exact_servers: dict[str, str] = {}  # name -> version
 
             for key, version in servers_config.items():
-                prefix = _parse_author_pattern(key)
-                if prefix:
-                    patterns[prefix] = version
+                if _parse_author_pattern(key):
+                    patterns[key] = version
                 else:
                     exact_servers[key] = version
 
-            # Handle patterns: fetch list, filter by prefix, then fetch versions
+            # Handle patterns: search or list, filter by prefix. Each matching
+            # server maps to (requested version, list entry to reuse or None)
+            pattern_hits: dict[str, tuple[str, dict[str, Any] | None]] = {}
             if patterns:
-                for server_data in fetch_server_list(base_url, timeout):
+                includes = NameMatcher(patterns)
+                prefixes = [_parse_author_pattern(key) for key in patterns]
+                for server_data in list_pattern_candidates(prefixes):
                     server_info = server_data.get("server", {})
                     server_name = server_info.get("name", "")
 
-                    # Check if server matches any pattern
-                    for prefix, version in patterns.items():
-                        if server_name.startswith(prefix):
-                            # Fetch the specific version requested
-                            versioned_data = fetch_server_version(
-                                base_url, server_name, version, timeout
-                            )
-                            versioned_info = versioned_data.get("server", {})
-                            results.append(ServerEntry(
-                                name=server_name,
-                                version=versioned_info.get("version", ""),
-                                data=versioned_data,
-                                source=name,
-                            ))
-                            break  # Don't match multiple patterns
+                    pattern = includes.match(server_name)
+                    if pattern is None or server_name in exclude:
+                        continue
+
+                    version = patterns[pattern]
+                    listed = server_data if _satisfies_version(server_data, version) else None
+                    # Listings may repeat a server once per version
+                    if server_name not in pattern_hits or (
+                        listed is not None and pattern_hits[server_name][1] is None
+                    ):
+                        pattern_hits[server_name] = (version, listed)
+
+            # Servers in result order (pattern matches first), and the
+            # (name, version) lookups still needed for them
+            resolved: list[tuple[str, dict[str, Any] | None]] = []
+            wanted: list[tuple[str, str]] = []
+
+            for server_name, (version, listed) in pattern_hits.items():
+                if listed is None:
+                    wanted.append((server_name, version))
+                resolved.append((server_name, listed))
 
             # Handle exact server names
             for server_name, version in exact_servers.items():
                 if server_name in exclude:
                     continue
+                wanted.append((server_name, version))
+                resolved.append((server_name, None))
 
-                server_data = fetch_server_version(
-                    base_url, server_name, version, timeout
-                )
+            # Fetch the specific versions requested
+            fetched = iter(fetch_server_versions(base_url, wanted, timeout, workers))
+            for server_name, listed in resolved:
+                server_data = listed if listed is not None else next(fetched)
                 server_info = server_data.get("server", {})
-
                 results.append(ServerEntry(
                     name=server_name,
                     version=server_info.get("version", ""),
@@ -0,0 +1,228 @@
+"""On-disk HTTP response cache with conditional revalidation.
+
+Bodies are stored with their ETag / Last-Modified validators, keyed by URL
+and query params. On the next request the validators are sent back as
+If-None-Match / If-Modified-Since, and a 304 reuses the stored body.
+Least recently used entries are evicted once the cache exceeds its size cap.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO
+from urllib.parse import urlencode
+
+DEFAULT_CACHE_DIR = ".cache/http"
+DEFAULT_MAX_SIZE_MB = 100
+
+
+@dataclass
+class CachedResponse:
+    """Validators and body location of a cached response."""
+    url: str
+    etag: str | None
+    last_modified: str | None
+    body_path: Path
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Request headers that revalidate this entry."""
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def read_body(self) -> bytes:
+        return self.body_path.read_bytes()
+
+
+@dataclass
+class CacheStats:
+    """Summary of the on-disk cache."""
+    directory: str
+    entries: int
+    size_bytes: int
+    max_size_bytes: int
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of HTTP response bodies on disk."""
+
+    def __init__(
+        self,
+        directory: Path,
+        max_size_bytes: int = DEFAULT_MAX_SIZE_MB * 1024 * 1024,
+    ):
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._size: int | None = None  # Computed lazily from disk
+
+    @staticmethod
+    def key(url: str, params: dict[str, Any] | None = None) -> str:
+        """Cache key for a URL and its query params (param order is ignored)."""
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _meta_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _body_path(self, key: str) -> Path:
+        return self.directory / f"{key}.body"
+
+    def lookup(self, key: str) -> CachedResponse | None:
+        """Return the cached entry for a key, or None if absent or unreadable."""
+        try:
+            with open(self._meta_path(key)) as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        body_path = self._body_path(key)
+        if not body_path.exists():
+            return None
+
+        return CachedResponse(
+            url=meta.get("url", ""),
+            etag=meta.get("etag"),
+            last_modified=meta.get("lastModified"),
+            body_path=body_path,
+        )
+
+    def touch(self, key: str) -> None:
+        """Mark an entry as recently used."""
+        try:
+            os.utime(self._body_path(key))
+        except OSError:
+            pass
+
+    def store(
+        self,
+        key: str,
+        url: str,
+        body: bytes,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        """Store a response body with its validators, then evict if over size."""
+        self.store_stream(key, url, [body], etag, last_modified).close()
+
+    def store_stream(
+        self,
+        key: str,
+        url: str,
+        chunks: Iterable[bytes],
+        etag: str | None,
+        last_modified: str | None,
+    ) -> BinaryIO:
+        """
+        Store a body written chunk by chunk as it arrives, then evict if over size.
+
+        Returns the stored body opened for reading, so the caller can stream
+        it even if it is evicted right away.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        body_path = self._body_path(key)
+        meta_path = self._meta_path(key)
+
+        # Write to temp files first so readers never see a partial entry
+        tmp_body = body_path.with_suffix(f".body.{threading.get_ident()}.tmp")
+        tmp_meta = meta_path.with_suffix(f".json.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_body, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            with open(tmp_meta, "w") as f:
+                json.dump({"url": url, "etag": etag, "lastModified": last_modified}, f)
+        except BaseException:
+            # A failed download (reset, timeout) must not leave files outside the size bound
+            tmp_body.unlink(missing_ok=True)
+            tmp_meta.unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            size_before = self._current_size()
+            previous = self._entry_size(key)
+            os.replace(tmp_body, body_path)
+            os.replace(tmp_meta, meta_path)
+            body = open(body_path, "rb")
+
+            self._size = size_before - previous + self._entry_size(key)
+            if self._size > self.max_size_bytes:
+                self._evict()
+        return body
+
+    def _entry_size(self, key: str) -> int:
+        total = 0
+        for path in (self._body_path(key), self._meta_path(key)):
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self._entry_files())
+        return self._size
+
+    def _entry_files(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        return [
+            p for p in self.directory.iterdir()
+            if p.suffix in (".body", ".json")
+        ]
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until under the size cap."""
+        bodies = sorted(
+            (p for p in self._entry_files() if p.suffix == ".body"),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for body_path in bodies:
+            if self._size is None or self._size <= self.max_size_bytes:
+                break
+            key = body_path.stem
+            freed = self._entry_size(key)
+            for path in (body_path, self._meta_path(key)):
+                path.unlink(missing_ok=True)
+            self._size -= freed
+
+    def clear(self) -> int:
+        """Delete every cached entry. Returns the number of entries removed."""
+        with self._lock:
+            removed = 0
+            for path in self._entry_files():
+                if path.suffix == ".body":
+                    removed += 1
+                path.unlink(missing_ok=True)
+            self._size = 0
+            return removed
+
+    def stats(self) -> CacheStats:
+        """Report entry count and total size on disk."""
+        with self._lock:
+            files = self._entry_files()
+            return CacheStats(
+                directory=str(self.directory),
+                entries=sum(1 for p in files if p.suffix == ".body"),
+                size_bytes=sum(p.stat().st_size for p in files),
+                max_size_bytes=self.max_size_bytes,
+            )
+
+
+def cache_from_config(config: dict[str, Any], root_dir: Path) -> ResponseCache | None:
+    """Build the response cache described by config.json, or None if disabled."""
+    settings = config.get("httpCache", {})
+    if not settings.get("enabled", True):
+        return None
+    directory = root_dir / settings.get("directory", DEFAULT_CACHE_DIR)
+    max_size_mb = settings.get("maxSizeMb", DEFAULT_MAX_SIZE_MB)
+    return ResponseCache(directory, max_size_mb * 1024 * 1024)
@@ -0,0 +1,270 @@
+"""Incremental decoding and encoding of large JSON objects.
+
+Registry list pages are objects like {"servers": [...], "metadata": {...}}.
+Decoding one with json.loads keeps the whole body and every server in memory
+at once. iter_members reads the body chunk by chunk instead and hands out
+each element of the big array as soon as it is complete, so only one
+element (plus a read buffer) is held at a time. write_array_document is the
+writing counterpart: it emits such an object one element at a time.
+"""
+
+import codecs
+import json
+import re
+from collections.abc import Callable, Collection, Iterable, Iterator
+from sys import intern
+from typing import Any, TextIO
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# A string (escapes included) or a run of whitespace between tokens
+_STRING_OR_WHITESPACE = re.compile(r'("[^"\\]*(?:\\.[^"\\]*)*")|[ \t\n\r]+')
+
+# Members whose string values repeat across server entries (schema URLs,
+# package registry and transport types, statuses)
+INTERNED_VALUES = frozenset({
+    "$schema", "format", "registryBaseUrl", "registryType", "runtimeHint", "status", "type",
+})
+
+
+def interned_object(pairs: list[tuple[str, Any]]) -> dict[str, Any]:
+    """
+    object_pairs_hook that shares repeated strings between decoded objects.
+
+    json only reuses key strings within one document; across thousands of
+    entries every "_meta" key and "$schema" URL is otherwise its own copy.
+    Keys are interned, and so are the values of INTERNED_VALUES members.
+    """
+    return {
+        intern(key): intern(value) if key in INTERNED_VALUES and type(value) is str else value
+        for key, value in pairs
+    }
+
+
+_decoder = json.JSONDecoder()
+_interning_decoder = json.JSONDecoder(object_pairs_hook=interned_object)
+
+
+class _Reader:
+    """Buffered text view over an iterable of UTF-8 byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes], decoder: json.JSONDecoder = _decoder):
+        self._chunks = iter(chunks)
+        self._decoder = decoder
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._eof = False
+        self.buf = ""
+        self.pos = 0
+
+    def fill(self) -> bool:
+        """Append the next chunk, dropping what was consumed. False at end of input."""
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            text = self._utf8.decode(b"", final=True)
+        else:
+            text = self._utf8.decode(chunk)
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.buf, self.pos)
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at end of input)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def take(self, expected: str) -> str:
+        """Consume the next character, which must be one of `expected`."""
+        char = self.peek()
+        if not char or char not in expected:
+            raise self.error(f"Expecting one of {expected!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        value, start = self._decode()
+        return value
+
+    def value_with_text(self) -> tuple[Any, str]:
+        """Decode the next complete JSON value; also return its text as read."""
+        value, start = self._decode()
+        return value, self.buf[start:self.pos]
+
+    def _decode(self) -> tuple[Any, int]:
+        """Decode the next value and move past it; return it and where it started."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number ending at the buffer edge may continue in the next chunk
+            if end == len(self.buf) and self.fill():
+                continue
+            start = self.pos
+            self.pos = end
+            return value, start
+
+
+def iter_members(
+    chunks: Iterable[bytes],
+    stream_keys: Collection[str] = (),
+    intern_strings: bool = False,
+    with_text: bool = False,
+) -> Iterator[tuple[str, Any]]:
+    """
+    Yield (key, value) for each member of a JSON object read from chunks.
+
+    Arrays under a key in `stream_keys` are not decoded as a whole: each
+    element is yielded as (key, element) once it has been read. Other
+    members (and non-array values of stream keys) are yielded whole.
+    With intern_strings, decoded objects share repeated strings (see
+    interned_object). With with_text, streamed elements are yielded as
+    (key, (element, text)), text being the element's JSON as received.
+    Raises json.JSONDecodeError on malformed or truncated input.
+    """
+    reader = _Reader(chunks, _interning_decoder if intern_strings else _decoder)
+    reader.take("{")
+
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise reader.error("Expecting property name")
+            reader.take(":")
+
+            if key in stream_keys and reader.peek() == "[":
+                reader.pos += 1
+                if reader.peek() == "]":
+                    reader.pos += 1
+                else:
+                    while True:
+                        yield key, reader.value_with_text() if with_text else reader.value()
+                        if reader.take(",]") == "]":
+                            break
+            else:
+                yield key, reader.value()
+
+            if reader.take(",}") == "}":
+                break
+
+    if reader.peek():
+        raise reader.error("Extra data")
+
+
+def _separators(
+    indent: int | None,
+    separators: tuple[str, str] | None,
+) -> tuple[str, str]:
+    """The separators json.dumps would use for these arguments."""
+    if separators is not None:
+        return separators
+    return (", ", ": ") if indent is None else (",", ": ")
+
+
+def _newline(indent: int | None, level: int) -> str:
+    return "" if indent is None else "\n" + " " * (indent * level)
+
+
+def encode(
+    value: Any,
+    indent: int | None = None,
+    level: int = 0,
+    separators: tuple[str, str] | None = None,
+    sort_keys: bool = False,
+) -> str:
+    """
+    Encode a value as if nested `level` levels deep in an indented document.
+
+    The first line is not indented; the caller writes it at its position.
+    """
+    text = json.dumps(value, indent=indent, separators=separators, sort_keys=sort_keys)
+    return nest(text, indent, level)
+
+
+def minify(text: str) -> str:
+    """Drop the whitespace between tokens of JSON text; strings are left as they are."""
+    return _STRING_OR_WHITESPACE.sub(r"\1", text)
+
+
+def nest(text: str, indent: int | None, level: int) -> str:
+    """Re-indent JSON text encoded at level 0 for nesting `level` levels deep."""
+    if indent is None or level == 0:
+        return text
+    # Newlines inside strings are escaped, so every "\n" is a line break
+    return text.replace("\n", _newline(indent, level))
+
+
+def append_member(
+    text: str,
+    key: str,
+    value: Any,
+    indent: int | None = None,
+    level: int = 0,
+    separators: tuple[str, str] | None = None,
+) -> str:
+    """
+    Add a member to the end of a non-empty object encoded by encode().
+
+    Gives the same text as encoding the object with the member added,
+    without copying the object.
+    """
+    item_sep, key_sep = _separators(indent, separators)
+    # Drop the closing brace and the line break before it
+    body = text[:text.rfind("}")].rstrip()
+    return (
+        body + item_sep + _newline(indent, level + 1)
+        + json.dumps(key) + key_sep + encode(value, indent, level + 1, separators)
+        + _newline(indent, level) + "}"
+    )
+
+
+def write_array_document(
+    out: TextIO,
+    key: str,
+    items: Iterable[str],
+    trailer: Callable[[int], dict[str, Any]],
+    indent: int | None = None,
+    separators: tuple[str, str] | None = None,
+) -> int:
+    """
+    Write {key: [items...], **trailer(count)} one item at a time.
+
+    Items are JSON texts encoded at level 2 with the same indent and
+    separators (see encode). The result is identical to json.dumps of the
+    whole document, but only one item is held at a time. Returns the
+    number of items written.
+    """
+    item_sep, key_sep = _separators(indent, separators)
+
+    count = 0
+    out.write("{" + _newline(indent, 1) + json.dumps(key) + key_sep + "[")
+    for text in items:
+        if count:
+            out.write(item_sep)
+        out.write(_newline(indent, 2) + text)
+        count += 1
+    if count:
+        out.write(_newline(indent, 1))
+    out.write("]")
+
+    for name, value in trailer(count).items():
+        out.write(
+            item_sep + _newline(indent, 1)
+            + json.dumps(name) + key_sep + encode(value, indent, 1, separators)
+        )
+    out.write(_newline(indent, 0) + "}")
+    return count
@@ -0,0 +1,311 @@
+"""Build manifest for incremental compiles.
+
+After a successful compile the manifest records content hashes of
+config.json, registry.json and every private server.json, and for each
+public registry the hash of its registry.json entry plus the validators
+(ETag / Last-Modified) of every response its fetch used. The next compile
+compares against it: unchanged server files skip validation, and a public
+registry whose entry is unchanged and whose responses all revalidate with
+a 304 is merged from the build cache instead of being fetched again.
+It also records a hash of every output (the compiled registry, its
+precompressed siblings, the delta feed and the static API tree), so a
+missing or modified output is rebuilt.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from scripts import transport
+from scripts.compiler import CompileResult, load_saved_entries, saved_entries
+from scripts.daemon_pool import DaemonThreadPool
+from scripts.fetcher import ServerEntry
+from scripts.snapshot import LastGoodStore
+
+MANIFEST_VERSION = 2
+DEFAULT_MANIFEST_PATH = "dist/.manifest.json"
+DEFAULT_BUILD_CACHE_DIR = ".cache/build"
+
+
+def file_digest(path: Path) -> str | None:
+    """SHA-256 of a file's contents, or None if it doesn't exist."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def output_digest(path: Path) -> str | None:
+    """
+    SHA-256 of an output file, or of a directory's file names and contents.
+
+    None if the output doesn't exist.
+    """
+    if not path.is_dir():
+        return file_digest(path)
+    digest = hashlib.sha256()
+    for file in sorted(p for p in path.rglob("*") if p.is_file()):
+        digest.update(f"{file.relative_to(path).as_posix()}\0{file_digest(file)}\n".encode())
+    return digest.hexdigest()
+
+
+def digest_outputs(root_dir: Path, paths: list[Path]) -> dict[str, str | None]:
+    """Digests of a compile's outputs, by path relative to root_dir."""
+    return {
+        (path.relative_to(root_dir).as_posix() if path.is_relative_to(root_dir) else str(path)):
+            output_digest(path)
+        for path in paths
+    }
+
+
+def config_digest(data: Any) -> str:
+    """SHA-256 of a JSON value, independent of key order and formatting."""
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+@dataclass
+class UpstreamResponse:
+    """A response a registry fetch used, with the validators it was served with."""
+    url: str
+    params: dict[str, Any] | None
+    etag: str | None
+    last_modified: str | None
+
+
+@dataclass
+class RegistryRecord:
+    """What a public registry's entries were built from."""
+    config: str  # Digest of the registry's entry in registry.json
+    responses: list[UpstreamResponse] = field(default_factory=list)
+
+
+@dataclass
+class BuildManifest:
+    """Inputs and output of the last successful compile."""
+    config: str | None  # Digest of config.json (None if absent)
+    registry: str | None  # Digest of registry.json
+    servers: dict[str, str] = field(default_factory=dict)  # Private server path -> digest
+    registries: dict[str, RegistryRecord] = field(default_factory=dict)  # By name
+    outputs: dict[str, str] = field(default_factory=dict)  # Output path -> digest
+
+    @classmethod
+    def load(cls, path: Path) -> "BuildManifest | None":
+        """Read a manifest, or None if it is missing, unreadable or outdated."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+
+        return cls(
+            config=data.get("config"),
+            registry=data.get("registry"),
+            servers=data.get("servers", {}),
+            registries={
+                name: RegistryRecord(
+                    config=record["config"],
+                    responses=[
+                        UpstreamResponse(
+                            url=r["url"],
+                            params=r.get("params"),
+                            etag=r.get("etag"),
+                            last_modified=r.get("lastModified"),
+                        )
+                        for r in record.get("responses", [])
+                    ],
+                )
+                for name, record in data.get("registries", {}).items()
+            },
+            outputs=data.get("outputs", {}),
+        )
+
+    def save(self, path: Path) -> None:
+        """Write the manifest, replacing the previous one atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "config": self.config,
+                "registry": self.registry,
+                "servers": self.servers,
+                "registries": {
+                    name: {
+                        "config": record.config,
+                        "responses": [
+                            {
+                                "url": r.url,
+                                "params": r.params,
+                                "etag": r.etag,
+                                "lastModified": r.last_modified,
+                            }
+                            for r in record.responses
+                        ],
+                    }
+                    for name, record in self.registries.items()
+                },
+                "outputs": self.outputs,
+            }, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def digest_inputs(root_dir: Path) -> BuildManifest:
+    """Hash the local inputs of a compile (no registries or output yet)."""
+    try:
+        with open(root_dir / "registry.json") as f:
+            registry_config = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        registry_config = {}  # Validation reports it
+
+    servers: dict[str, str] = {}
+    for reg in registry_config.get("registries", []):
+        if reg.get("type") == "private":
+            for rel_path in reg.get("servers_relative_path", []):
+                digest = file_digest(root_dir / rel_path)
+                if digest is not None:
+                    servers[rel_path] = digest
+
+    return BuildManifest(
+        config=file_digest(root_dir / "config.json"),
+        registry=file_digest(root_dir / "registry.json"),
+        servers=servers,
+    )
+
+
+def unchanged_servers(current: BuildManifest, previous: BuildManifest | None) -> set[str]:
+    """Private server files validated by the previous build and unchanged since."""
+    if previous is None or previous.config != current.config:
+        return set()
+    return {
+        rel_path for rel_path, digest in current.servers.items()
+        if previous.servers.get(rel_path) == digest
+    }
+
+
+def upstream_unchanged(record: RegistryRecord, timeout: int = 30, workers: int = 1) -> bool:
+    """Revalidate every response a registry's fetch used; True if all are 304."""
+    if not record.responses:
+        return False
+
+    def check(response: UpstreamResponse) -> bool:
+        return transport.is_unchanged(
+            response.url, response.params, response.etag, response.last_modified, timeout
+        )
+
+    if workers <= 1:
+        return all(check(r) for r in record.responses)
+    # DaemonThreadPool carries the registry scope (and so its rate limit) into its threads
+    with DaemonThreadPool(min(workers, len(record.responses)), "revalidate") as executor:
+        return all(executor.map(check, record.responses))
+
+
+def reusable_registries(
+    registry_config: dict[str, Any],
+    current: BuildManifest,
+    previous: BuildManifest | None,
+    build_cache: LastGoodStore,
+    timeout: int = 30,
+    workers: int = 1,
+) -> dict[str, list[ServerEntry]]:
+    """
+    Entries of public registries that need no fetch, by registry name.
+
+    A registry qualifies when config.json and its registry.json entry are
+    unchanged, its entries are in the build cache, and upstream confirms
+    every response it was built from is unchanged.
+    """
+    if previous is None or previous.config != current.config:
+        return {}
+
+    reuse: dict[str, list[ServerEntry]] = {}
+    for reg in registry_config.get("registries", []):
+        if reg.get("type") == "private":
+            continue
+        record = previous.registries.get(reg["name"])
+        if record is None or record.config != config_digest(reg):
+            continue
+
+        entries = load_saved_entries(build_cache, reg)
+        if entries is None:
+            continue
+        with transport.registry_scope(reg["name"]):
+            transport.configure_registry(reg)
+            if upstream_unchanged(record, timeout, reg.get("workers", workers)):
+                reuse[reg["name"]] = entries
+    return reuse
+
+
+def record_registry(reg: dict[str, Any]) -> RegistryRecord:
+    """Record a freshly fetched registry, from the requests the transport saw."""
+    responses: dict[str, UpstreamResponse] = {}
+    for url, params, etag, last_modified in transport.requests_seen(reg["name"]):
+        # The last response for a URL is the one the entries were built from
+        responses[config_digest([url, params])] = UpstreamResponse(
+            url, params, etag, last_modified
+        )
+    return RegistryRecord(config=config_digest(reg), responses=list(responses.values()))
+
+
+def save_build(
+    manifest_path: Path,
+    current: BuildManifest,
+    previous: BuildManifest | None,
+    registry_config: dict[str, Any],
+    result: CompileResult,
+    reuse: dict[str, list[ServerEntry]],
+    build_cache: LastGoodStore,
+    outputs: dict[str, str | None],
+) -> None:
+    """
+    Record a successful compile: cache freshly fetched entries and save the manifest.
+
+    Reused registries keep their previous record; stale ones get none, so
+    they are fetched again next time. outputs are the digests of what the
+    compile wrote (see digest_outputs).
+    """
+    for reg in registry_config.get("registries", []):
+        name = reg["name"]
+        if name in result.fetched:
+            build_cache.save(name, reg["url"], saved_entries(result.fetched[name]))
+            current.registries[name] = record_registry(reg)
+        elif name in reuse and previous is not None:
+            current.registries[name] = previous.registries[name]
+
+    current.outputs = {path: digest for path, digest in outputs.items() if digest is not None}
+    current.save(manifest_path)
+
+
+def is_up_to_date(
+    current: BuildManifest,
+    previous: BuildManifest | None,
+    registry_config: dict[str, Any],
+    reuse: dict[str, list[ServerEntry]],
+    outputs: dict[str, str | None],
+) -> bool:
+    """
+    True if no input changed, every public registry is reusable and the outputs are intact.
+
+    outputs are the current digests of everything this compile would write
+    (see digest_outputs); each must exist and match the previous build's.
+    """
+    if previous is None:
+        return False
+    public = [r for r in registry_config.get("registries", []) if r.get("type") != "private"]
+    return (
+        current.config == previous.config
+        and current.registry == previous.registry
+        and current.servers == previous.servers
+        and all(reg["name"] in reuse for reg in public)
+        and bool(outputs)
+        and all(
+            digest is not None and previous.outputs.get(path) == digest
+            for path, digest in outputs.items()
+        )
+    )
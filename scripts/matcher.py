@@ -0,0 +1,110 @@
+"""Compiled server name matching for registry include and exclude lists.
+
+A NameMatcher is built once from a list of patterns and then answers each
+name with about one lookup, however many patterns there are:
+- exact names ("ai.exa/exa") live in a set
+- author/* prefixes ("microsoft/*") live in a trie keyed by name segment
+- globs ("*-preview", "acme/test-?") are joined into a single regex
+"""
+
+import fnmatch
+import re
+from collections.abc import Iterable
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+def _is_glob(text: str) -> bool:
+    return any(char in _GLOB_CHARS for char in text)
+
+
+class _TrieNode:
+    __slots__ = ("children", "pattern")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        self.pattern: str | None = None  # Set when an author/* pattern ends here
+
+
+class NameMatcher:
+    """Matches server names against exact names, author/* prefixes and globs."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: list[str] = list(dict.fromkeys(patterns))
+        self._exact: set[str] = set()
+        self._root = _TrieNode()
+        globs: list[str] = []
+
+        for pattern in self.patterns:
+            if pattern.endswith("/*") and not _is_glob(pattern[:-2]):
+                node = self._root
+                for segment in pattern[:-2].split("/"):
+                    node = node.children.setdefault(segment, _TrieNode())
+                node.pattern = pattern
+            elif _is_glob(pattern):
+                globs.append(pattern)
+            else:
+                self._exact.add(pattern)
+
+        self._globs = globs
+        self._glob_re = (
+            re.compile("|".join(
+                f"(?P<g{i}>{fnmatch.translate(glob)})" for i, glob in enumerate(globs)
+            ))
+            if globs else None
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def __contains__(self, name: str) -> bool:
+        return self.match(name) is not None
+
+    def match(self, name: str) -> str | None:
+        """
+        Return the pattern a name matches, or None.
+
+        An exact name wins over an author/* prefix (the longest prefix wins
+        among nested ones), which wins over the first matching glob.
+        """
+        if name in self._exact:
+            return name
+
+        node = self._root
+        matched = None
+        for segment in name.split("/")[:-1]:
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.pattern is not None:
+                matched = node.pattern
+        if matched is not None:
+            return matched
+
+        if self._glob_re is not None:
+            found = self._glob_re.match(name)
+            if found is not None:
+                return self._globs[int(found.lastgroup[1:])]
+        return None
+
+    def unmatched(self, names: Iterable[str]) -> list[str]:
+        """Return the patterns, in declaration order, that match none of names."""
+        remaining = set(self.patterns)
+        for name in names:
+            if not remaining:
+                break
+            pattern = self.match(name)
+            remaining.discard(pattern)
+            if pattern is not None and remaining:
+                # A name can satisfy several patterns; count them all
+                remaining -= {p for p in remaining if _matches(p, name)}
+        return [p for p in self.patterns if p in remaining]
+
+
+def _matches(pattern: str, name: str) -> bool:
+    """Match a single pattern without compiling a matcher."""
+    if pattern.endswith("/*") and not _is_glob(pattern[:-2]):
+        return name.startswith(pattern[:-1])
+    if _is_glob(pattern):
+        return fnmatch.fnmatchcase(name, pattern)
+    return name == pattern
@@ -0,0 +1,104 @@
+"""Local mirror of public registry responses for offline compiles.
+
+`mirror` records every response a normal compile needs (server list pages,
+version documents and the schemas used for validation) into a directory,
+one file per URL. An offline compile then replays those files through the
+transport, so the fetch code and the ServerEntry objects it produces are
+exactly the same as online.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode, urlsplit
+
+import requests
+
+from scripts import transport
+from scripts.fetcher import fetch_from_public_registry
+from scripts.validator import loaded_schemas, validate_server_json
+
+DEFAULT_MIRROR_DIR = ".cache/mirror"
+
+
+class Mirror:
+    """Directory of recorded responses, laid out by host and URL path."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def path_for(self, url: str, params: dict[str, Any] | None = None) -> Path:
+        """
+        File holding the response for a URL and query params.
+
+        e.g. https://host/v0.1/servers/ai.exa%2Fexa/versions/latest
+        -> <mirror>/host/v0.1/servers/ai.exa%2Fexa/versions/latest.json
+        Requests with params get a suffix derived from them.
+        """
+        parts = urlsplit(url)
+        path = parts.path.strip("/") or "index"
+        if params:
+            query = urlencode(sorted(params.items()))
+            path += "@" + hashlib.sha256(query.encode()).hexdigest()[:16]
+        return self.directory / parts.netloc.lower() / f"{path}.json"
+
+    def record(self, url: str, params: dict[str, Any] | None, body: bytes) -> None:
+        """Store a response body (used as the transport recorder)."""
+        path = self.path_for(url, params)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".json.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(body)
+        os.replace(tmp_path, path)
+
+    def replay(self, url: str, params: dict[str, Any] | None = None) -> requests.Response:
+        """Answer a request from the mirror (used as the offline transport)."""
+        try:
+            body = self.path_for(url, params).read_bytes()
+        except FileNotFoundError:
+            return transport.build_response(url, 404, b"", reason="Not in mirror")
+        return transport.build_response(url, 200, body, reason="OK (mirror)")
+
+
+def fill_mirror(
+    registry_config: dict[str, Any],
+    mirror: Mirror,
+    root_dir: Path,
+    timeout: int = 30,
+    workers: int = 1,
+) -> dict[str, int]:
+    """
+    Record everything an offline compile needs into the mirror.
+
+    Private server definitions are validated (recording the schemas they
+    declare, wherever they were resolved from) and each public registry is
+    fetched exactly as compile does it, with the transport recording responses.
+    Returns registry name -> servers mirrored. Raises FetchError if a
+    registry can't be fetched.
+    """
+    counts: dict[str, int] = {}
+    transport.set_recorder(mirror.record)
+    try:
+        for reg in registry_config.get("registries", []):
+            if reg.get("type") == "private":
+                for rel_path in reg.get("servers_relative_path", []):
+                    validate_server_json(root_dir / rel_path, root_dir)
+                continue
+            servers = fetch_from_public_registry(reg, timeout, workers)
+            counts[reg["name"]] = len(servers)
+    finally:
+        transport.set_recorder(None)
+
+    # The schema store answers without a request, so record every schema
+    # validation resolved rather than relying on the transport recorder
+    for url, schema in loaded_schemas().items():
+        mirror.record(url, None, json.dumps(schema).encode())
+
+    # Remember what was mirrored, for humans browsing the directory
+    mirror.directory.mkdir(parents=True, exist_ok=True)
+    with open(mirror.directory / "mirror.json", "w") as f:
+        json.dump({"registries": counts}, f, indent=2)
+    return counts
+
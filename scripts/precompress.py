@@ -0,0 +1,73 @@
+"""Precompressed siblings of compiled output.
+
+A static host or CDN can serve registry.json.gz / registry.json.br directly
+instead of compressing registry.json on every request. Compression settings
+are fixed and the gzip header carries no name or timestamp, so a sibling's
+bytes (and hash) only change when the file's content does.
+
+Brotli needs the optional brotli package; without it only gzip is written.
+"""
+
+import gzip
+import os
+from collections.abc import Collection
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # Optional dependency: pip install mcp-registry-template[brotli]
+    brotli = None
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+CHUNK_SIZE = 64 * 1024
+
+# Format name (as in config.json) -> file suffix
+SUFFIXES = {"gzip": ".gz", "brotli": ".br"}
+
+
+def available_formats(formats: Collection[str]) -> list[str]:
+    """The requested formats that can be written here."""
+    return [f for f in formats if f != "brotli" or brotli is not None]
+
+
+def sibling_path(path: Path, fmt: str) -> Path:
+    """The compressed sibling of path in a format: path + ".gz" / ".br"."""
+    return path.with_name(path.name + SUFFIXES[fmt])
+
+
+def _compress(path: Path, out_path: Path, fmt: str) -> None:
+    with open(path, "rb") as src, open(out_path, "wb") as dst:
+        if fmt == "gzip":
+            # No file name and a zero mtime keep the output reproducible
+            with gzip.GzipFile(
+                filename="", mode="wb", compresslevel=GZIP_LEVEL, fileobj=dst, mtime=0
+            ) as gz:
+                while chunk := src.read(CHUNK_SIZE):
+                    gz.write(chunk)
+        else:
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            while chunk := src.read(CHUNK_SIZE):
+                dst.write(compressor.process(chunk))
+            dst.write(compressor.finish())
+
+
+def precompress(path: Path, formats: Collection[str]) -> list[Path]:
+    """
+    Write a compressed sibling of path (path + ".gz" / ".br") per format.
+
+    Formats that can't be written here are skipped. Each sibling replaces
+    the previous one atomically. Returns the paths written.
+    """
+    written = []
+    for fmt in available_formats(formats):
+        out_path = sibling_path(path, fmt)
+        tmp_path = out_path.with_name(f".{out_path.name}.tmp")
+        try:
+            _compress(path, tmp_path, fmt)
+            os.replace(tmp_path, out_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        written.append(out_path)
+    return written
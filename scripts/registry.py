@@ -3,6 +3,7 @@
 
 import argparse
 import json
+import os
 import sys
 from pathlib import Path
 
@@ -16,6 +17,7 @@ def load_config() -> dict:
     defaults = {
         "output": "dist/registry.json",
         "fetchTimeout": 30,
+        "fetchWorkers": 8,
         "registryName": "io.modelcontextprotocol.registry/publisher-provided",
     }
     if config_path.exists():
@@ -25,11 +27,49 @@ def load_config() -> dict:
     return defaults
 
 
+def configure_transport(config: dict) -> None:
+    """Apply config.json's connection pool, response cache and schema cache settings."""
+    from scripts import transport
+    from scripts.http_cache import cache_from_config
+    from scripts.schema_store import schema_store_from_config
+    from scripts.validator import set_schema_store
+
+    transport.configure_from_config(config)
+    transport.set_cache(cache_from_config(config, ROOT_DIR))
+    set_schema_store(schema_store_from_config(config, ROOT_DIR))
+
+
 def cmd_validate(args: argparse.Namespace) -> int:
     """Validate registry.json and all server definitions."""
+    from scripts.snapshot import snapshots_from_config
+    from scripts.validation_cache import changed_files, validation_cache_from_config
     from scripts.validator import validate_all
 
-    result = validate_all(ROOT_DIR)
+    config = load_config()
+    configure_transport(config)
+
+    # With --changed-since, only server files changed since the ref are validated
+    only_servers = None
+    if args.changed_since:
+        try:
+            only_servers = changed_files(ROOT_DIR, args.changed_since)
+        except ValueError as e:
+            if args.json:
+                print(json.dumps({"valid": False, "error": str(e)}, indent=2))
+            else:
+                print(f"Error: --changed-since {args.changed_since}: {e}")
+            return 1
+
+    cache = validation_cache_from_config(config, ROOT_DIR)
+    result = validate_all(
+        ROOT_DIR,
+        snapshots_from_config(config, ROOT_DIR),
+        jobs=args.jobs,
+        cache=cache,
+        only_servers=only_servers,
+    )
+    if cache is not None:
+        cache.save()
 
     if args.json:
         output = {
@@ -38,9 +78,16 @@ def cmd_validate(args: argparse.Namespace) -> int:
                 {"file": e.file, "path": e.path, "message": e.message}
                 for e in result.errors
             ],
+            "warnings": [
+                {"file": w.file, "path": w.path, "message": w.message}
+                for w in result.warnings
+            ],
         }
         print(json.dumps(output, indent=2))
     else:
+        if not args.quiet:
+            for warning in result.warnings:
+                print(f"Warning: {warning}")
         if result.is_valid:
             if not args.quiet:
                 print("All validations passed")
@@ -53,11 +100,54 @@ def cmd_validate(args: argparse.Namespace) -> int:
 
 def cmd_compile(args: argparse.Namespace) -> int:
     """Fetch public registries, merge with private, output compiled registry."""
-    from scripts.compiler import compile_registry, write_compiled_registry
+    from scripts import manifest as build
+    from scripts import transport
+    from scripts.compiler import (
+        OutputHistory,
+        compile_registry,
+        utc_now,
+        write_compiled_registry,
+    )
+    from scripts.snapshot import (
+        DEFAULT_LAST_GOOD_DIR,
+        DEFAULT_STALE_DEADLINE,
+        LastGoodStore,
+        last_good_from_config,
+        snapshots_from_config,
+    )
+    from scripts.validation_cache import validation_cache_from_config
     from scripts.validator import validate_all
 
+    config = load_config()
+    configure_transport(config)
+    if args.offline:
+        from scripts.mirror import DEFAULT_MIRROR_DIR, Mirror
+
+        mirror = Mirror(ROOT_DIR / config.get("mirrorDirectory", DEFAULT_MIRROR_DIR))
+        transport.set_offline(mirror.replay)
+
+    # With an incremental compile, compare inputs against the last build
+    build_settings = config.get("incrementalCompile", {})
+    current = previous = None
+    if build_settings.get("enabled", False) and not args.offline:
+        manifest_path = ROOT_DIR / build_settings.get("manifest", build.DEFAULT_MANIFEST_PATH)
+        build_cache = LastGoodStore(
+            ROOT_DIR / build_settings.get("directory", build.DEFAULT_BUILD_CACHE_DIR)
+        )
+        current = build.digest_inputs(ROOT_DIR)
+        if not args.force:
+            previous = build.BuildManifest.load(manifest_path)
+
     # First validate
-    validation = validate_all(ROOT_DIR)
+    skip_servers = build.unchanged_servers(current, previous) if current else set()
+    validation_cache = validation_cache_from_config(config, ROOT_DIR)
+    if validation_cache is not None and args.force:
+        validation_cache.clear()
+    validation = validate_all(
+        ROOT_DIR, skip_servers=skip_servers, jobs=args.jobs, cache=validation_cache
+    )
+    if validation_cache is not None:
+        validation_cache.save()
     if not validation.is_valid:
         if args.json:
             print(json.dumps({
@@ -71,11 +161,79 @@ def cmd_compile(args: argparse.Namespace) -> int:
                 print(f"  Error: {error}")
         return 1
 
-    # Load configs
-    config = load_config()
+    # Load registry config
     with open(ROOT_DIR / "registry.json") as f:
         registry_config = json.load(f)
 
+    snapshots = snapshots_from_config(config, ROOT_DIR)
+    if snapshots is not None and args.full_sync:
+        snapshots.clear()
+
+    stale_settings = config.get("staleOnError", {})
+    last_good = last_good_from_config(config, ROOT_DIR)
+    if last_good is None and args.stale_on_error:
+        directory = stale_settings.get("directory", DEFAULT_LAST_GOOD_DIR)
+        last_good = LastGoodStore(ROOT_DIR / directory)
+
+    if args.offline:
+        # The mirror holds full listings; snapshots and fallbacks don't apply
+        snapshots = None
+        last_good = None
+
+    output_path = ROOT_DIR / config.get("output", "dist/registry.json")
+    timeout = config.get("fetchTimeout", 30)
+    workers = config.get("fetchWorkers", 8)
+
+    precompress_settings = config.get("precompress", {})
+    precompressed = []
+    if precompress_settings.get("enabled", False):
+        from scripts.precompress import SUFFIXES, available_formats
+
+        formats = precompress_settings.get("formats", ["gzip", "brotli"])
+        precompressed = available_formats(formats)
+        if not args.quiet and not args.json:
+            for fmt in formats:
+                if fmt not in precompressed:
+                    print(f"Warning: {fmt} is not installed; skipping {SUFFIXES[fmt]} files")
+
+    static_settings = config.get("staticApi", {})
+    static_dir = None
+    if static_settings.get("enabled", False):
+        from scripts.static_api import API_VERSION, DEFAULT_STATIC_API_DIR
+
+        static_dir = ROOT_DIR / static_settings.get("directory", DEFAULT_STATIC_API_DIR)
+
+    # Everything this compile writes; all of it must be intact to skip the build
+    outputs = [output_path]
+    if args.emit_delta:
+        from scripts.delta import delta_path_for
+
+        outputs.append(delta_path_for(output_path))
+    if precompressed:
+        from scripts.precompress import sibling_path
+
+        outputs += [sibling_path(path, fmt) for path in outputs for fmt in precompressed]
+    if static_dir is not None:
+        outputs.append(static_dir / API_VERSION)
+
+    reuse = {}
+    if current is not None:
+        reuse = build.reusable_registries(
+            registry_config, current, previous, build_cache, timeout, workers
+        )
+        output_digests = build.digest_outputs(ROOT_DIR, outputs)
+        if build.is_up_to_date(current, previous, registry_config, reuse, output_digests):
+            if args.json:
+                print(json.dumps({
+                    "success": True,
+                    "upToDate": True,
+                    "output": str(output_path),
+                }, indent=2))
+            elif not args.quiet:
+                print(f"{output_path} is up to date")
+            return 0
+        transport.clear_requests_seen()
+
     if not args.quiet:
         print("Compiling registry...")
 
@@ -83,7 +241,12 @@ def cmd_compile(args: argparse.Namespace) -> int:
     result = compile_registry(
         registry_config,
         ROOT_DIR,
-        timeout=config.get("fetchTimeout", 30),
+        timeout=timeout,
+        workers=workers,
+        snapshots=snapshots,
+        last_good=last_good,
+        deadline=stale_settings.get("deadline", DEFAULT_STALE_DEADLINE),
+        reuse=reuse,
     )
 
     if not result.is_success:
@@ -92,6 +255,8 @@ def cmd_compile(args: argparse.Namespace) -> int:
                 "success": False,
                 "stage": "compilation",
                 "errors": [e.message for e in result.errors],
+                "retries": result.retries,
+                "stale": result.stale,
             }, indent=2))
         else:
             print("Compilation failed:")
@@ -100,20 +265,212 @@ def cmd_compile(args: argparse.Namespace) -> int:
         return 1
 
     # Write output
-    output_path = ROOT_DIR / config.get("output", "dist/registry.json")
-
     registry_name = config.get("registryName", DEFAULT_REGISTRY_NAME)
-    write_compiled_registry(result.servers, output_path, registry_name)
+    compact = config.get("outputFormat", "pretty") == "compact"
+    now = utc_now()
+    # Digests of the previous output, read before it is replaced
+    previous_output = None
+    if args.emit_delta:
+        from scripts import delta
+        from scripts.precompress import precompress
+
+        previous_output = delta.load_digests(output_path)
+
+    # Canonical output carries private timestamps over from the last build.
+    # A delta needs it: otherwise every private entry is rewritten with a
+    # new timestamp, and so reported as replaced, on every compile
+    canonical = config.get("canonicalOutput", False) or args.emit_delta
+    history = OutputHistory.load(output_path, registry_name) if canonical else None
+    write_compiled_registry(
+        result.servers, output_path, registry_name, compact, now, precompressed,
+        canonical, history,
+    )
+
+    if static_dir is not None:
+        from scripts.static_api import DEFAULT_PAGE_SIZE, write_static_api
+
+        write_static_api(
+            result.servers,
+            static_dir,
+            registry_name,
+            static_settings.get("pageSize", DEFAULT_PAGE_SIZE),
+            compact,
+            now,
+            precompressed,
+            history,
+        )
+
+    delta_summary = None
+    if previous_output is not None:
+        delta_path = delta.delta_path_for(output_path)
+        delta_summary = delta.write_delta(previous_output, output_path, delta_path)
+        precompress(delta_path, precompressed)
+
+    if current is not None:
+        build.save_build(
+            manifest_path, current, previous, registry_config,
+            result, reuse, build_cache, build.digest_outputs(ROOT_DIR, outputs),
+        )
 
     if args.json:
         print(json.dumps({
             "success": True,
             "servers": len(result.servers),
             "output": str(output_path),
+            "retries": result.retries,
+            "stale": result.stale,
+            "reused": sorted(reuse),
+            "staticApi": str(static_dir) if static_dir else None,
+            "delta": {
+                "path": str(delta_path),
+                "added": delta_summary.added,
+                "changed": delta_summary.changed,
+                "removed": delta_summary.removed,
+            } if delta_summary else None,
         }, indent=2))
     elif not args.quiet:
+        for reason in result.stale.values():
+            print(f"Warning: using last-good snapshot ({reason})")
         print(f"Compiled {len(result.servers)} servers to {output_path}")
+        if static_dir:
+            print(f"Wrote static API to {static_dir}")
+        if delta_summary:
+            print(
+                f"Delta: {delta_summary.added} added, {delta_summary.changed} changed, "
+                f"{delta_summary.removed} removed ({delta_path})"
+            )
+
+    return 0
+
+
+def cmd_mirror(args: argparse.Namespace) -> int:
+    """Record public registry responses for offline compiles."""
+    from scripts.fetcher import FetchError
+    from scripts.mirror import DEFAULT_MIRROR_DIR, Mirror, fill_mirror
+
+    config = load_config()
+    configure_transport(config)
+    with open(ROOT_DIR / "registry.json") as f:
+        registry_config = json.load(f)
+
+    mirror = Mirror(ROOT_DIR / config.get("mirrorDirectory", DEFAULT_MIRROR_DIR))
+    if not args.quiet and not args.json:
+        print(f"Mirroring public registries to {mirror.directory}...")
+
+    try:
+        counts = fill_mirror(
+            registry_config,
+            mirror,
+            ROOT_DIR,
+            timeout=config.get("fetchTimeout", 30),
+            workers=config.get("fetchWorkers", 8),
+        )
+    except FetchError as e:
+        if args.json:
+            print(json.dumps({"success": False, "errors": [str(e)]}, indent=2))
+        else:
+            print(f"Error: {e}")
+        return 1
+
+    if args.json:
+        print(json.dumps({
+            "success": True,
+            "registries": counts,
+            "mirror": str(mirror.directory),
+        }, indent=2))
+    elif not args.quiet:
+        for name, count in counts.items():
+            print(f"  {name}: {count} servers")
+    return 0
+
+
+def cmd_cache(args: argparse.Namespace) -> int:
+    """Inspect or clear the HTTP response cache."""
+    from scripts.http_cache import DEFAULT_CACHE_DIR, ResponseCache, cache_from_config
+
+    config = load_config()
+    cache = cache_from_config(config, ROOT_DIR)
+    if cache is None:
+        # Still allow clearing a cache left behind before it was disabled
+        directory = config.get("httpCache", {}).get("directory", DEFAULT_CACHE_DIR)
+        cache = ResponseCache(ROOT_DIR / directory)
+
+    if args.cache_command == "clear":
+        removed = cache.clear()
+        if args.json:
+            print(json.dumps({"cleared": removed, "directory": str(cache.directory)}, indent=2))
+        elif not args.quiet:
+            print(f"Removed {removed} cached responses from {cache.directory}")
+        return 0
+
+    stats = cache.stats()
+    if args.json:
+        print(json.dumps({
+            "directory": stats.directory,
+            "entries": stats.entries,
+            "sizeBytes": stats.size_bytes,
+            "maxSizeBytes": stats.max_size_bytes,
+        }, indent=2))
+    else:
+        print(f"Directory: {stats.directory}")
+        print(f"Entries:   {stats.entries}")
+        print(
+            f"Size:      {stats.size_bytes / 1024 / 1024:.1f} MB"
+            f" of {stats.max_size_bytes / 1024 / 1024:.0f} MB"
+        )
+    return 0
+
+
+def cmd_schemas(args: argparse.Namespace) -> int:
+    """Vendor remote schemas into schemas/remote for offline validation."""
+    import requests
+
+    from scripts import transport
+    from scripts.schema_store import schema_store_from_config
+
+    config = load_config()
+    configure_transport(config)
+    store = schema_store_from_config(config, ROOT_DIR)
+
+    urls = list(args.urls)
+    if not urls:
+        # Every $schema the private servers declare, plus what is bundled already
+        index_path = store.bundled_dir / "index.json"
+        if index_path.exists():
+            with open(index_path) as f:
+                urls.extend(json.load(f).get("schemas", {}))
+        with open(ROOT_DIR / "registry.json") as f:
+            registry_config = json.load(f)
+        for reg in registry_config.get("registries", []):
+            for rel_path in reg.get("servers_relative_path", []):
+                try:
+                    with open(ROOT_DIR / rel_path) as f:
+                        schema_url = json.load(f).get("$schema")
+                except (OSError, json.JSONDecodeError):
+                    continue  # validate reports it
+                if schema_url:
+                    urls.append(schema_url)
+
+    vendored = []
+    for url in dict.fromkeys(urls):
+        try:
+            response = transport.get(url, timeout=config.get("fetchTimeout", 30))
+            response.raise_for_status()
+            schema = response.json()
+        except requests.RequestException as e:
+            if args.json:
+                print(json.dumps({"success": False, "url": url, "error": str(e)}, indent=2))
+            else:
+                print(f"Error: failed to fetch {url}: {e}")
+            return 1
+        path = store.vendor(url, schema)
+        vendored.append({"url": url, "file": str(path)})
 
+    if args.json:
+        print(json.dumps({"vendored": vendored}, indent=2))
+    elif not args.quiet:
+        for item in vendored:
+            print(f"Vendored {item['url']} -> {item['file']}")
     return 0
 
 
@@ -173,14 +530,90 @@ def main() -> int:
     validate_parser = subparsers.add_parser(
         "validate", help="Validate registry.json and server definitions"
     )
+    validate_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Validate server definitions on this many processes (default: CPU count)",
+    )
+    validate_parser.add_argument(
+        "--changed-since",
+        metavar="GIT_REF",
+        help="Only validate server definitions changed in the working tree since GIT_REF",
+    )
     validate_parser.set_defaults(func=cmd_validate)
 
     # compile command
     compile_parser = subparsers.add_parser(
         "compile", help="Compile registry from public + private sources"
     )
+    compile_parser.add_argument(
+        "--full-sync",
+        action="store_true",
+        help="Ignore stored snapshots and re-list every public registry",
+    )
+    compile_parser.add_argument(
+        "--stale-on-error",
+        action="store_true",
+        help="Fall back to the last successful fetch when a public registry fails",
+    )
+    compile_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore the build manifest and validation cache and rebuild everything",
+    )
+    compile_parser.add_argument(
+        "--emit-delta",
+        action="store_true",
+        help="Write the changes from the previous output as an NDJSON delta feed "
+        "(implies canonical output)",
+    )
+    compile_parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Resolve public registries from the local mirror instead of the network",
+    )
+    compile_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Validate server definitions on this many processes (default: CPU count)",
+    )
     compile_parser.set_defaults(func=cmd_compile)
 
+    # mirror command
+    mirror_parser = subparsers.add_parser(
+        "mirror", help="Record public registry responses for offline compiles"
+    )
+    mirror_parser.set_defaults(func=cmd_mirror)
+
+    # cache command
+    cache_parser = subparsers.add_parser(
+        "cache", help="Inspect or clear the HTTP response cache"
+    )
+    cache_parser.add_argument(
+        "cache_command",
+        choices=["stats", "clear"],
+        help="Show cache size or delete all cached responses",
+    )
+    cache_parser.set_defaults(func=cmd_cache)
+
+    # schemas command
+    schemas_parser = subparsers.add_parser(
+        "schemas", help="Vendor remote JSON schemas for offline validation"
+    )
+    schemas_parser.add_argument(
+        "schemas_command",
+        choices=["vendor"],
+        help="Download schemas into schemas/remote and record their hashes",
+    )
+    schemas_parser.add_argument(
+        "urls",
+        nargs="*",
+        help="Schema URLs (default: every $schema of the private servers, plus those bundled)",
+    )
+    schemas_parser.set_defaults(func=cmd_schemas)
+
     # add command
     add_parser = subparsers.add_parser(
         "add", help="Add a new private MCP server"
@@ -0,0 +1,89 @@
+"""Retry and rate limiting policies for registry requests."""
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient failures."""
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    max_backoff: float = 60.0
+    retry_statuses: frozenset[int] = field(default=RETRY_STATUSES)
+
+    def backoff(self, retry: int) -> float:
+        """Seconds to wait before the given retry (1 for the first retry)."""
+        ceiling = min(self.max_backoff, self.backoff_factor * 2 ** (retry - 1))
+        return random.uniform(0, ceiling)
+
+    def delay(self, retry: int, retry_after: float | None) -> float:
+        """Seconds to wait, honoring the server's Retry-After when it asks for longer."""
+        delay = self.backoff(retry)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+    @classmethod
+    def from_config(cls, settings: dict[str, Any]) -> "RetryPolicy":
+        """Build a policy from a registry's "retry" section."""
+        defaults = cls()
+        return cls(
+            max_retries=settings.get("maxRetries", defaults.max_retries),
+            backoff_factor=settings.get("backoffFactor", defaults.backoff_factor),
+            max_backoff=settings.get("maxBackoff", defaults.max_backoff),
+        )
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    @classmethod
+    def from_config(cls, settings: dict[str, Any]) -> "TokenBucket":
+        """Build a limiter from a registry's "rateLimit" section."""
+        rate = settings["requestsPerSecond"]
+        return cls(rate, settings.get("burst", max(1, int(rate))))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds from now."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=UTC)
+    return max(0.0, (when - datetime.now(UTC)).total_seconds())
@@ -0,0 +1,138 @@
+"""Remote JSON schemas kept on disk between runs.
+
+Schemas referenced by $schema (and remote $refs) are looked up in order:
+1. the bundled set in schemas/remote/, vendored copies of known schema
+   versions listed in its index.json (refreshed with `schemas vendor`)
+2. the schema cache directory, while a copy is younger than the TTL
+3. the network, saving the result to the cache directory
+4. an expired cached copy, if the network fails
+
+Every stored schema carries a SHA-256 of its content; a copy that doesn't
+match its hash is ignored. Versioned schema URLs don't change content, so
+with the bundled set, validation needs no network round-trips.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+DEFAULT_SCHEMA_CACHE_DIR = ".cache/schemas"
+DEFAULT_SCHEMA_TTL = 7 * 24 * 60 * 60  # Seconds
+BUNDLED_SCHEMA_DIR = "schemas/remote"
+
+
+def schema_digest(schema: dict[str, Any]) -> str:
+    """SHA-256 of a schema's content, independent of key order and formatting."""
+    encoded = json.dumps(schema, sort_keys=True, separators=(",", ":")).encode()
+    return "sha256:" + hashlib.sha256(encoded).hexdigest()
+
+
+def bundled_file_name(url: str) -> str:
+    """File name of a vendored schema, e.g. "<host>_schemas_<version>_server.schema.json"."""
+    return url.split("://", 1)[-1].rstrip("/").replace("/", "_")
+
+
+def _read_json(path: Path) -> Any:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _write_json(path: Path, data: Any, indent: int | None = None) -> None:
+    """Write JSON, replacing the previous file atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=indent)
+        if indent is not None:
+            f.write("\n")
+    os.replace(tmp_path, path)
+
+
+class SchemaStore:
+    """Bundled schemas plus an optional TTL-bound cache directory."""
+
+    def __init__(
+        self,
+        directory: Path | None,
+        ttl: float = DEFAULT_SCHEMA_TTL,
+        bundled_dir: Path | None = None,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.bundled_dir = bundled_dir
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha256(url.encode()).hexdigest()[:16]
+        return self.directory / f"{digest}.json"
+
+    def bundled(self, url: str) -> dict[str, Any] | None:
+        """The vendored copy of a schema, or None if there is no intact one."""
+        if self.bundled_dir is None:
+            return None
+        index = _read_json(self.bundled_dir / "index.json") or {}
+        entry = index.get("schemas", {}).get(url)
+        if entry is None:
+            return None
+        schema = _read_json(self.bundled_dir / entry["file"])
+        if not isinstance(schema, dict) or schema_digest(schema) != entry.get("sha256"):
+            return None
+        return schema
+
+    def load(self, url: str, allow_expired: bool = False) -> dict[str, Any] | None:
+        """A cached schema younger than the TTL (or any age), or None."""
+        if self.directory is None:
+            return None
+        data = _read_json(self._path(url))
+        if not isinstance(data, dict) or data.get("url") != url:
+            return None
+        schema = data.get("schema")
+        if not isinstance(schema, dict) or schema_digest(schema) != data.get("sha256"):
+            return None
+        if not allow_expired and time.time() - data.get("fetchedAt", 0) > self.ttl:
+            return None
+        return schema
+
+    def save(self, url: str, schema: dict[str, Any]) -> None:
+        """Cache a freshly fetched schema."""
+        if self.directory is None:
+            return
+        _write_json(self._path(url), {
+            "url": url,
+            "fetchedAt": time.time(),
+            "sha256": schema_digest(schema),
+            "schema": schema,
+        })
+
+    def vendor(self, url: str, schema: dict[str, Any]) -> Path:
+        """Add or update a schema in the bundled set; returns its file."""
+        if self.bundled_dir is None:
+            raise ValueError("No bundled schema directory configured")
+        path = self.bundled_dir / bundled_file_name(url)
+        _write_json(path, schema, indent=2)
+
+        index_path = self.bundled_dir / "index.json"
+        index = _read_json(index_path) or {}
+        schemas = index.setdefault("schemas", {})
+        schemas[url] = {"file": path.name, "sha256": schema_digest(schema)}
+        index["schemas"] = dict(sorted(schemas.items()))
+        _write_json(index_path, index, indent=2)
+        return path
+
+
+def schema_store_from_config(config: dict[str, Any], root_dir: Path) -> SchemaStore:
+    """Build the schema store described by config.json (bundled schemas always apply)."""
+    settings = config.get("schemaCache", {})
+    directory = None
+    if settings.get("enabled", True):
+        directory = root_dir / settings.get("directory", DEFAULT_SCHEMA_CACHE_DIR)
+    return SchemaStore(
+        directory,
+        settings.get("ttl", DEFAULT_SCHEMA_TTL),
+        root_dir / BUNDLED_SCHEMA_DIR,
+    )
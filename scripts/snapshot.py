@@ -0,0 +1,131 @@
+"""Local snapshots of public registry data.
+
+A listing snapshot holds the server list of one registry as of its last
+successful sync, so later compiles only need to ask upstream for what
+changed since. A last-good snapshot holds the entries a registry resolved
+to in the last successful fetch, to fall back on when it is unreachable.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from scripts.json_stream import interned_object
+
+DEFAULT_SNAPSHOT_DIR = ".cache/snapshots"
+DEFAULT_LAST_GOOD_DIR = ".cache/last-good"
+DEFAULT_STALE_DEADLINE = 120
+
+
+@dataclass
+class Snapshot:
+    """Server list entries of one registry and when they were synced."""
+    url: str
+    synced_at: str  # RFC 3339 timestamp, sent back as updated_since
+    servers: list[dict[str, Any]] = field(default_factory=list)
+
+
+class SnapshotStore:
+    """Directory of snapshots, one file per registry URL."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha256(url.rstrip("/").encode()).hexdigest()[:16]
+        return self.directory / f"{digest}.json"
+
+    def load(self, url: str) -> Snapshot | None:
+        """Return the snapshot for a registry URL, or None if there is none."""
+        try:
+            with open(self._path(url)) as f:
+                data = json.load(f, object_pairs_hook=interned_object)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if data.get("url") != url.rstrip("/"):
+            return None
+        return Snapshot(
+            url=data["url"],
+            synced_at=data["syncedAt"],
+            servers=data.get("servers", []),
+        )
+
+    def save(self, snapshot: Snapshot) -> None:
+        """Write a snapshot, replacing the previous one atomically."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(snapshot.url)
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "url": snapshot.url.rstrip("/"),
+                "syncedAt": snapshot.synced_at,
+                "servers": snapshot.servers,
+            }, f)
+        os.replace(tmp_path, path)
+
+    def clear(self) -> None:
+        """Delete all snapshots, forcing the next sync to be a full one."""
+        if self.directory.exists():
+            for path in self.directory.glob("*.json"):
+                path.unlink()
+
+
+class LastGoodStore:
+    """Directory of the last successfully fetched entries, one file per registry."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def _path(self, registry_name: str, url: str) -> Path:
+        identity = f"{registry_name}\n{url.rstrip('/')}"
+        digest = hashlib.sha256(identity.encode()).hexdigest()[:16]
+        return self.directory / f"{digest}.json"
+
+    def load(self, registry_name: str, url: str) -> Snapshot | None:
+        """Return a registry's last-good entries, or None if never saved."""
+        try:
+            with open(self._path(registry_name, url)) as f:
+                data = json.load(f, object_pairs_hook=interned_object)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return Snapshot(
+            url=data["url"],
+            synced_at=data["fetchedAt"],
+            servers=data.get("servers", []),
+        )
+
+    def save(self, registry_name: str, url: str, servers: list[dict[str, Any]]) -> None:
+        """Record a registry's freshly fetched entries, replacing older ones."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(registry_name, url)
+        tmp_path = path.with_suffix(".json.tmp")
+        fetched_at = datetime.now(UTC).isoformat(timespec="seconds").replace("+00:00", "Z")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "name": registry_name,
+                "url": url.rstrip("/"),
+                "fetchedAt": fetched_at,
+                "servers": servers,
+            }, f)
+        os.replace(tmp_path, path)
+
+
+def snapshots_from_config(config: dict[str, Any], root_dir: Path) -> SnapshotStore | None:
+    """Build the snapshot store described by config.json, or None if disabled."""
+    settings = config.get("incrementalSync", {})
+    if not settings.get("enabled", False):
+        return None
+    return SnapshotStore(root_dir / settings.get("directory", DEFAULT_SNAPSHOT_DIR))
+
+
+def last_good_from_config(config: dict[str, Any], root_dir: Path) -> LastGoodStore | None:
+    """Build the last-good store described by config.json, or None if disabled."""
+    settings = config.get("staleOnError", {})
+    if not settings.get("enabled", False):
+        return None
+    return LastGoodStore(root_dir / settings.get("directory", DEFAULT_LAST_GOOD_DIR))
@@ -0,0 +1,120 @@
+"""Static file tree mirroring the registry API.
+
+Next to the compiled registry, compile can write the documents a registry
+client requests, so any static file host can serve them:
+
+    v0.1/servers/page-1.json                        first page of the list
+    v0.1/servers/page-N.json                        page N, linked by metadata.nextCursor
+    v0.1/servers/{encoded-name}/versions/{v}.json   one server version
+    v0.1/servers/{encoded-name}/versions/latest.json
+
+Names and versions are URL-encoded the same way fetch_server_version
+encodes them, so the version paths match the API URLs exactly.
+"""
+
+import os
+import shutil
+from collections.abc import Collection
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote
+
+from scripts.compiler import OutputHistory, canonical_order, encode_server, utc_now
+from scripts.fetcher import ServerEntry
+from scripts.json_stream import nest, write_array_document
+from scripts.precompress import precompress
+
+API_VERSION = "v0.1"
+DEFAULT_STATIC_API_DIR = "dist"
+DEFAULT_PAGE_SIZE = 100
+
+
+@dataclass
+class StaticApiStats:
+    """What write_static_api produced."""
+    pages: int
+    servers: int
+
+
+def page_cursor(page: int) -> str:
+    """Cursor naming a list page; the page's file is servers/{cursor}.json."""
+    return f"page-{page}"
+
+
+def _write_text(path: Path, text: str, precompressed: Collection[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    precompress(path, precompressed)
+
+
+def write_static_api(
+    servers: list[ServerEntry],
+    output_dir: Path,
+    registry_name: str = "io.modelcontextprotocol.registry/private",
+    page_size: int = DEFAULT_PAGE_SIZE,
+    compact: bool = False,
+    now: str | None = None,
+    precompressed: Collection[str] = (),
+    history: OutputHistory | None = None,
+) -> StaticApiStats:
+    """
+    Write the static API tree for compiled servers under output_dir/v0.1.
+
+    Each server is encoded once and written to its list page and version
+    documents. The tree is built next to the old one and swapped in when
+    complete, so servers removed since the last compile disappear. Every
+    document gets a compressed sibling per format in precompressed.
+    With a history, documents are canonical as in write_compiled_registry.
+    """
+    now = now or utc_now()
+    if history is not None:
+        servers = canonical_order(servers)
+    indent = None if compact else 2
+    separators = (",", ":") if compact else None
+
+    final_dir = output_dir / API_VERSION
+    build_dir = output_dir / f".{API_VERSION}.tmp"
+    shutil.rmtree(build_dir, ignore_errors=True)
+    servers_dir = build_dir / "servers"
+    servers_dir.mkdir(parents=True)
+
+    page_count = max(1, -(-len(servers) // page_size))
+    try:
+        for page in range(1, page_count + 1):
+            batch = servers[(page - 1) * page_size:page * page_size]
+            metadata: dict[str, Any] = {"count": len(batch)}
+            if page < page_count:
+                metadata["nextCursor"] = page_cursor(page + 1)
+
+            documents: list[str] = []
+            for server in batch:
+                text = encode_server(server, registry_name, now, compact, history=history)
+                versions_dir = servers_dir / quote(server.name, safe="") / "versions"
+                version_path = versions_dir / f"{quote(server.version, safe='')}.json"
+                _write_text(version_path, text, precompressed)
+                _write_text(versions_dir / "latest.json", text, precompressed)
+                documents.append(nest(text, indent, 2))
+
+            page_path = servers_dir / f"{page_cursor(page)}.json"
+            with open(page_path, "w", encoding="utf-8") as f:
+                write_array_document(
+                    f, "servers", documents, lambda count: {"metadata": metadata},
+                    indent, separators,
+                )
+            precompress(page_path, precompressed)
+
+        # Swap the new tree in, then drop the old one
+        old_dir = output_dir / f".{API_VERSION}.old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if final_dir.exists():
+            os.replace(final_dir, old_dir)
+        os.replace(build_dir, final_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    return StaticApiStats(pages=page_count, servers=len(servers))
+
@@ -0,0 +1,435 @@
+"""Shared HTTP transport for registry and schema requests.
+
+All outgoing requests go through one pooled `requests.Session`, so
+connections (and their TLS handshakes) are reused across pages, version
+lookups and schema downloads instead of being opened per request. When a
+response cache is set, GETs are revalidated against it and 304s are served
+from disk. Transient failures are retried with backoff, and a public
+registry's requests can be rate limited (see configure_registry).
+"""
+
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, BinaryIO
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scripts.http_cache import ResponseCache
+from scripts.retry import RetryPolicy, TokenBucket, parse_retry_after
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_PER_HOST = 10
+
+# Bytes read at a time from streamed response bodies
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_settings: dict[str, Any] = {
+    "pool_size": DEFAULT_POOL_SIZE,
+    "max_per_host": DEFAULT_MAX_PER_HOST,
+    "gzip": True,
+}
+_session: requests.Session | None = None
+_cache: ResponseCache | None = None
+_lock = threading.Lock()
+
+# Offline source answering requests instead of the network, and a recorder
+# receiving (url, params, body) of every successful response
+_offline: Callable[[str, dict[str, Any] | None], requests.Response] | None = None
+_recorder: Callable[[str, dict[str, Any] | None, bytes], None] | None = None
+
+# Per-registry retry policy, rate limiter and retry counter
+_default_retry = RetryPolicy()
+_retry_policies: dict[str, RetryPolicy] = {}
+_rate_limits: dict[str, TokenBucket] = {}
+_retries: dict[str, int] = {}
+
+# Per-registry (url, params, ETag, Last-Modified) of every successful request,
+# so a later run can ask whether those responses have changed
+_seen: dict[str, list[tuple[str, dict[str, Any] | None, str | None, str | None]]] = {}
+
+# Public registry the current requests are made for (see registry_scope)
+_registry: ContextVar[str | None] = ContextVar("registry", default=None)
+
+
+def configure(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    max_per_host: int = DEFAULT_MAX_PER_HOST,
+    gzip: bool = True,
+) -> None:
+    """
+    Set connection pool settings for the shared session.
+
+    pool_size: number of hosts to keep connection pools for
+    max_per_host: maximum open connections to a single host; extra
+        requests wait for a free connection instead of opening a new one
+    gzip: negotiate compressed responses
+    """
+    global _session
+    with _lock:
+        _settings.update(pool_size=pool_size, max_per_host=max_per_host, gzip=gzip)
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def configure_from_config(config: dict[str, Any]) -> None:
+    """Apply the "http" section of config.json."""
+    http = config.get("http", {})
+    configure(
+        pool_size=http.get("poolSize", DEFAULT_POOL_SIZE),
+        max_per_host=http.get("maxConnectionsPerHost", DEFAULT_MAX_PER_HOST),
+        gzip=http.get("gzip", True),
+    )
+
+
+def set_cache(cache: ResponseCache | None) -> None:
+    """Set (or with None, disable) the response cache used by get()."""
+    global _cache
+    _cache = cache
+
+
+def get_cache() -> ResponseCache | None:
+    """Return the response cache in use, if any."""
+    return _cache
+
+
+def set_offline(
+    source: Callable[[str, dict[str, Any] | None], requests.Response] | None,
+) -> None:
+    """Answer every request from `source` instead of the network (None to go online)."""
+    global _offline
+    _offline = source
+
+
+def set_recorder(
+    recorder: Callable[[str, dict[str, Any] | None, bytes], None] | None,
+) -> None:
+    """Hand every successful response body to `recorder` (None to stop)."""
+    global _recorder
+    _recorder = recorder
+
+
+def configure_policy(
+    registry: str,
+    retry: RetryPolicy | None = None,
+    rate_limit: TokenBucket | None = None,
+) -> None:
+    """
+    Set the retry policy and rate limiter for a registry's requests (see registry_scope).
+
+    Registries without a policy, and requests made outside any registry's
+    scope, use the default RetryPolicy and no rate limit.
+    """
+    with _lock:
+        if retry is None:
+            _retry_policies.pop(registry, None)
+        else:
+            _retry_policies[registry] = retry
+        if rate_limit is None:
+            _rate_limits.pop(registry, None)
+        else:
+            _rate_limits[registry] = rate_limit
+
+
+def configure_registry(registry_config: dict[str, Any]) -> None:
+    """Apply a public registry's "retry" and "rateLimit" settings to its requests."""
+    retry = registry_config.get("retry")
+    rate_limit = registry_config.get("rateLimit")
+    configure_policy(
+        registry_config["name"],
+        retry=RetryPolicy.from_config(retry) if retry is not None else None,
+        rate_limit=TokenBucket.from_config(rate_limit) if rate_limit is not None else None,
+    )
+
+
+def _policy() -> tuple[RetryPolicy, TokenBucket | None]:
+    """Retry policy and rate limiter of the registry in scope."""
+    registry = _registry.get()
+    if registry is None:
+        return _default_retry, None
+    with _lock:
+        return _retry_policies.get(registry, _default_retry), _rate_limits.get(registry)
+
+
+@contextmanager
+def registry_scope(name: str) -> Iterator[None]:
+    """
+    Attribute the requests made inside the block to a public registry.
+
+    Retry policies, rate limits, seen requests and retries all apply per
+    registry, so registries sharing a host keep them apart. Threads started
+    through DaemonThreadPool and page prefetching inherit the scope.
+    """
+    token = _registry.set(name)
+    try:
+        yield
+    finally:
+        _registry.reset(token)
+
+
+def retry_count(registry: str) -> int:
+    """Number of retries made so far for a registry's requests (see registry_scope)."""
+    with _lock:
+        return _retries.get(registry, 0)
+
+
+def requests_seen(
+    registry: str,
+) -> list[tuple[str, dict[str, Any] | None, str | None, str | None]]:
+    """(url, params, ETag, Last-Modified) of each successful request made for a registry."""
+    with _lock:
+        return list(_seen.get(registry, []))
+
+
+def clear_requests_seen() -> None:
+    """Forget the requests recorded for requests_seen."""
+    with _lock:
+        _seen.clear()
+
+
+def _note_request(
+    url: str,
+    params: dict[str, Any] | None,
+    etag: str | None,
+    last_modified: str | None,
+) -> None:
+    registry = _registry.get()
+    if registry is None:
+        return
+    with _lock:
+        _seen.setdefault(registry, []).append((url, params, etag, last_modified))
+
+
+def is_unchanged(
+    url: str,
+    params: dict[str, Any] | None,
+    etag: str | None,
+    last_modified: str | None,
+    timeout: int = 30,
+) -> bool:
+    """
+    Ask whether a response is unchanged since it was served with these validators.
+
+    Sends one conditional GET (subject to the rate limit of the registry in scope). Only a
+    304 counts as unchanged; missing validators, errors and any other
+    status count as changed, and offline mode never confirms anything.
+    """
+    if _offline is not None or not (etag or last_modified):
+        return False
+
+    headers: dict[str, str] = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    _, limiter = _policy()
+    if limiter is not None:
+        limiter.acquire()
+
+    try:
+        response = get_session().get(
+            url, params=params, timeout=timeout, headers=headers, stream=True
+        )
+    except requests.RequestException:
+        return False
+    response.close()
+    return response.status_code == 304
+
+
+def _build_session() -> requests.Session:
+    """Create a keep-alive session with bounded per-host pools."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=_settings["pool_size"],
+        pool_maxsize=_settings["max_per_host"],
+        pool_block=True,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate" if _settings["gzip"] else "identity"
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the shared session, creating it on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def get(
+    url: str,
+    params: dict[str, Any] | None = None,
+    timeout: int = 30,
+    stream: bool = False,
+) -> requests.Response:
+    """
+    Send a GET request over the shared session.
+
+    With stream=True the body is not read up front; read it with
+    iter_content() and close the response when done. Cached bodies are
+    then streamed from disk rather than loaded into memory.
+
+    In offline mode the response comes from the offline source instead,
+    and a recorder, if set, is handed every successful response body.
+    """
+    if _offline is not None:
+        return _offline(url, params)
+
+    response = _get_with_retries(url, params, timeout, stream)
+    if _recorder is not None and response.status_code == 200:
+        _recorder(url, params, response.content)
+    return response
+
+
+def _get_with_retries(
+    url: str,
+    params: dict[str, Any] | None,
+    timeout: int,
+    stream: bool = False,
+) -> requests.Response:
+    """
+    Send a GET, retrying transient failures.
+
+    Connection errors, timeouts and retryable statuses (429, 5xx) are
+    retried per the RetryPolicy of the registry in scope, waiting at least as long as the
+    server's Retry-After. The final response is returned as is, so callers
+    still decide what to do with an error status.
+    """
+    policy, limiter = _policy()
+
+    retry = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+
+        try:
+            response = _get_once(url, params, timeout, stream)
+        except (requests.ConnectionError, requests.Timeout):
+            if retry >= policy.max_retries:
+                raise
+            retry_after = None
+        else:
+            if response.status_code not in policy.retry_statuses or retry >= policy.max_retries:
+                return response
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            response.close()
+
+        retry += 1
+        registry = _registry.get()
+        if registry is not None:
+            with _lock:
+                _retries[registry] = _retries.get(registry, 0) + 1
+        time.sleep(policy.delay(retry, retry_after))
+
+
+def _get_once(
+    url: str,
+    params: dict[str, Any] | None,
+    timeout: int,
+    stream: bool = False,
+) -> requests.Response:
+    """
+    Send a single GET, revalidating against the response cache if set.
+
+    A 304 is returned to the caller as a 200 carrying the cached body.
+    """
+    cache = _cache
+    if cache is None:
+        response = get_session().get(url, params=params, timeout=timeout, stream=stream)
+        if response.status_code == 200:
+            _note_request(
+                url, params, response.headers.get("ETag"), response.headers.get("Last-Modified")
+            )
+        return response
+
+    key = cache.key(url, params)
+    cached = cache.lookup(key)
+    headers = cached.conditional_headers() if cached else None
+    response = get_session().get(
+        url, params=params, timeout=timeout, headers=headers, stream=stream
+    )
+
+    if response.status_code == 304 and cached is not None:
+        cache.touch(key)
+        _note_request(url, params, cached.etag, cached.last_modified)
+        # Release the 304's connection back to the pool; the body comes from disk
+        response.close()
+        if stream:
+            return _cached_stream(response, open(cached.body_path, "rb"))
+        return _cached_response(response, cached.read_body())
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if response.status_code == 200:
+        _note_request(url, params, etag, last_modified)
+    if response.status_code == 200 and (etag or last_modified):
+        if stream:
+            # Spool the body to the cache as it arrives, then stream it back
+            body = cache.store_stream(
+                key, url, response.iter_content(STREAM_CHUNK_SIZE), etag, last_modified
+            )
+            response.close()
+            return _cached_stream(response, body, reason=response.reason)
+        cache.store(key, url, response.content, etag, last_modified)
+
+    return response
+
+
+def _cached_response(not_modified: requests.Response, body: bytes) -> requests.Response:
+    """Turn a 304 into a 200 response whose body comes from the cache."""
+    response = build_response(not_modified.url, 200, body, reason="OK (cached)")
+    response.headers = not_modified.headers
+    response.request = not_modified.request
+    return response
+
+
+def _cached_stream(
+    response: requests.Response,
+    body: BinaryIO,
+    reason: str = "OK (cached)",
+) -> requests.Response:
+    """Turn a response into a 200 whose body is streamed from a cache file."""
+    streamed = requests.Response()
+    streamed.status_code = 200
+    streamed.reason = reason
+    streamed.url = response.url
+    streamed.encoding = "utf-8"
+    streamed.headers = response.headers
+    streamed.request = response.request
+    streamed.raw = body
+    return streamed
+
+
+def build_response(
+    url: str,
+    status_code: int,
+    body: bytes,
+    reason: str = "",
+) -> requests.Response:
+    """Build a complete response for a body that didn't come off the wire."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = reason
+    response.url = url
+    response.encoding = "utf-8"
+    response._content = body
+    response._content_consumed = True
+    return response
+
+
+def close() -> None:
+    """Close the shared session and its pooled connections."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
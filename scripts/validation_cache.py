@@ -0,0 +1,107 @@
+"""Validation results of server files, kept between runs.
+
+For each private server.json the cache records the SHA-256 of its content,
+the digest of the schema it was validated against (see
+schema_store.schema_digest) and the errors found. A file whose content and
+schema are both unchanged is not validated again; its recorded errors are
+reported instead. Results that depended on a failed remote $ref lookup are
+never recorded.
+
+changed_files lists what changed in the working tree since a git ref, for
+`validate --changed-since` to limit validation to those server files.
+"""
+
+import json
+import os
+import subprocess
+from pathlib import Path
+from typing import Any
+
+VALIDATION_CACHE_VERSION = 1
+DEFAULT_VALIDATION_CACHE_PATH = ".cache/validation.json"
+
+
+class ValidationCache:
+    """Recorded errors of server files, by path relative to the repository root."""
+
+    def __init__(self, path: Path, files: dict[str, dict[str, Any]] | None = None):
+        self.path = path
+        self.files = files if files is not None else {}
+
+    @classmethod
+    def load(cls, path: Path) -> "ValidationCache":
+        """Read the cache; a missing, unreadable or outdated one starts empty."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != VALIDATION_CACHE_VERSION:
+            return cls(path)
+        return cls(path, data.get("files", {}))
+
+    def lookup(
+        self, rel_path: str, digest: str, schema_digest: str
+    ) -> list[tuple[str, str]] | None:
+        """Recorded (path, message) errors of an unchanged file, or None if not cached."""
+        entry = self.files.get(rel_path)
+        if entry is None or entry.get("sha256") != digest or entry.get("schema") != schema_digest:
+            return None
+        return [(path, message) for path, message in entry.get("errors", [])]
+
+    def record(
+        self, rel_path: str, digest: str, schema_digest: str, errors: list[tuple[str, str]]
+    ) -> None:
+        """Record the errors found in a file (an empty list when it is valid)."""
+        self.files[rel_path] = {
+            "sha256": digest,
+            "schema": schema_digest,
+            "errors": [list(error) for error in errors],
+        }
+
+    def clear(self) -> None:
+        self.files.clear()
+
+    def save(self) -> None:
+        """Write the cache, replacing the previous one atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "version": VALIDATION_CACHE_VERSION,
+                "files": dict(sorted(self.files.items())),
+            }, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def validation_cache_from_config(config: dict[str, Any], root_dir: Path) -> ValidationCache | None:
+    """Load the validation cache described by config.json, or None if disabled."""
+    settings = config.get("validationCache", {})
+    if not settings.get("enabled", False):
+        return None
+    return ValidationCache.load(root_dir / settings.get("path", DEFAULT_VALIDATION_CACHE_PATH))
+
+
+def changed_files(root_dir: Path, ref: str) -> set[str]:
+    """
+    Files under root_dir changed in the working tree since a git ref.
+
+    Covers committed, staged and unstaged changes plus untracked files;
+    paths are relative to root_dir. Raises ValueError if git fails (for
+    example, on an unknown ref).
+    """
+    changed: set[str] = set()
+    for command in (
+        ["git", "diff", "--name-only", "--relative", ref, "--"],
+        ["git", "ls-files", "--others", "--exclude-standard"],
+    ):
+        try:
+            completed = subprocess.run(
+                command, cwd=root_dir, capture_output=True, text=True, check=True
+            )
+        except FileNotFoundError as e:
+            raise ValueError("git is not installed") from e
+        except subprocess.CalledProcessError as e:
+            raise ValueError(e.stderr.strip() or f"{' '.join(command)} failed") from e
+        changed.update(os.path.normpath(line) for line in completed.stdout.splitlines() if line)
+    return changed
@@ -1,14 +1,41 @@
 """Validation logic for registry configurations and server definitions."""
 
+import hashlib
 import json
+import os
+import threading
+from collections.abc import Collection
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
 
 import jsonschema
 import requests
+from referencing import Registry, Resource
+from referencing.exceptions import Unresolvable
+from referencing.jsonschema import DRAFT7
+
+from scripts import transport
+from scripts.matcher import NameMatcher
+from scripts.schema_store import SchemaStore, schema_digest
+from scripts.snapshot import SnapshotStore
+from scripts.validation_cache import ValidationCache
 
 # Cache for remote schemas
 _schema_cache: dict[str, dict] = {}
+_schema_locks: dict[str, threading.Lock] = {}
+_schema_locks_guard = threading.Lock()
+
+# Bundled and on-disk schemas (see schema_store); None uses the network only
+_schema_store: SchemaStore | None = None
+
+# Compiled validators by schema digest, and by the identity of schema
+# dicts already seen (the remote schema cache hands out the same dict)
+_validator_cache: dict[str, Any] = {}
+_validators_by_id: dict[int, tuple[dict, Any]] = {}
+_validator_lock = threading.Lock()
+_MAX_VALIDATORS_BY_ID = 64
 
 
 @dataclass
@@ -26,8 +53,9 @@ class ValidationError:
 
 @dataclass
 class ValidationResult:
-    """Result of validation containing all errors."""
+    """Result of validation containing all errors, and warnings that don't fail it."""
     errors: list[ValidationError] = field(default_factory=list)
+    warnings: list[ValidationError] = field(default_factory=list)
 
     @property
     def is_valid(self) -> bool:
@@ -36,8 +64,12 @@ class ValidationResult:
     def add_error(self, file: str, path: str, message: str) -> None:
         self.errors.append(ValidationError(file, path, message))
 
+    def add_warning(self, file: str, path: str, message: str) -> None:
+        self.warnings.append(ValidationError(file, path, message))
+
     def merge(self, other: "ValidationResult") -> None:
         self.errors.extend(other.errors)
+        self.warnings.extend(other.warnings)
 
 
 def load_schema(schema_path: Path) -> dict:
@@ -46,18 +78,97 @@ def load_schema(schema_path: Path) -> dict:
         return json.load(f)
 
 
+def set_schema_store(store: SchemaStore | None) -> None:
+    """Use a schema store for remote schemas (None: memory and network only)."""
+    global _schema_store
+    _schema_store = store
+
+
+def loaded_schemas() -> dict[str, dict]:
+    """Remote schemas resolved so far this run ($schema and remote $refs), by URL."""
+    return dict(_schema_cache)
+
+
 def fetch_remote_schema(url: str, timeout: int = 10) -> dict:
-    """Fetch a JSON schema from a URL with caching."""
-    if url in _schema_cache:
-        return _schema_cache[url]
-
-    response = requests.get(url, timeout=timeout)
-    response.raise_for_status()
-    schema = response.json()
-    _schema_cache[url] = schema
+    """
+    Fetch a JSON schema from a URL with caching.
+
+    Schemas are kept in memory for the run and, with a schema store, come
+    from its bundled set or disk cache before the network. Concurrent
+    callers asking for the same URL share one lookup (and its timeout).
+    """
+    schema = _schema_cache.get(url)
+    if schema is not None:
+        return schema
+
+    with _schema_locks_guard:
+        lock = _schema_locks.setdefault(url, threading.Lock())
+    with lock:
+        schema = _schema_cache.get(url)
+        if schema is None:
+            schema = _load_schema(url, timeout)
+            _schema_cache[url] = schema
     return schema
 
 
+def _load_schema(url: str, timeout: int) -> dict:
+    store = _schema_store
+    if store is not None:
+        schema = store.bundled(url) or store.load(url)
+        if schema is not None:
+            return schema
+
+    try:
+        response = transport.get(url, timeout=timeout)
+        response.raise_for_status()
+        schema = response.json()
+    except (requests.RequestException, json.JSONDecodeError):
+        # Better an expired copy than no validation
+        schema = store.load(url, allow_expired=True) if store is not None else None
+        if schema is None:
+            raise
+        return schema
+
+    if store is not None:
+        store.save(url, schema)
+    return schema
+
+
+def _retrieve(uri: str) -> Resource:
+    """Resolve a remote $ref through the remote schema cache."""
+    return Resource.from_contents(fetch_remote_schema(uri), default_specification=DRAFT7)
+
+
+# Remote $refs are fetched once and then served from _schema_cache
+_ref_registry: Registry = Registry(retrieve=_retrieve)
+
+
+def schema_validator(schema: dict) -> Any:
+    """
+    Return a compiled validator for a schema, built once per distinct schema.
+
+    The validator class follows the schema's $schema (Draft 7 when it has
+    none). Schemas are cached by content, so they must not be modified
+    after their first use.
+    """
+    cached = _validators_by_id.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+
+    key = hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+    with _validator_lock:
+        validator = _validator_cache.get(key)
+        if validator is None:
+            cls = jsonschema.validators.validator_for(schema, default=jsonschema.Draft7Validator)
+            validator = cls(schema, registry=_ref_registry)
+            _validator_cache[key] = validator
+        # Keep the schema alive so its id isn't reused by another dict
+        if len(_validators_by_id) >= _MAX_VALIDATORS_BY_ID:
+            _validators_by_id.clear()
+        _validators_by_id[id(schema)] = (schema, validator)
+    return validator
+
+
 def validate_against_schema(
     data: dict,
     schema: dict,
@@ -65,7 +176,7 @@ def validate_against_schema(
 ) -> ValidationResult:
     """Validate data against a JSON schema, collecting all errors."""
     result = ValidationResult()
-    validator = jsonschema.Draft7Validator(schema)
+    validator = schema_validator(schema)
 
     for error in validator.iter_errors(data):
         path = ".".join(str(p) for p in error.absolute_path) if error.absolute_path else ""
@@ -112,46 +223,223 @@ def validate_registry(registry_path: Path, schema_path: Path) -> ValidationResul
     return validate_against_schema(registry, schema, str(registry_path))
 
 
-def validate_server_json(
-    server_path: Path,
-    root_dir: Path,
+def check_patterns(
+    registry: dict,
+    listings: dict[str, list[str]],
+    file_name: str,
 ) -> ValidationResult:
-    """Validate a server.json file against its declared schema."""
+    """
+    Warn about author/* patterns and exclude entries that match no server.
+
+    listings maps a public registry URL to the server names it lists;
+    registries without a listing are skipped.
+    """
     result = ValidationResult()
+
+    for index, reg in enumerate(registry.get("registries", [])):
+        names = listings.get(reg.get("url", ""))
+        if reg.get("type") == "private" or names is None:
+            continue
+
+        servers = reg.get("servers")
+        if isinstance(servers, dict):
+            includes = NameMatcher(key for key in servers if key.endswith("/*"))
+            for pattern in includes.unmatched(names):
+                result.add_warning(
+                    file_name,
+                    f"registries.{index}.servers",
+                    f"'{pattern}' matches no server in {reg['name']}",
+                )
+
+        excludes = NameMatcher(reg.get("exclude", []))
+        for pattern in excludes.unmatched(names):
+            result.add_warning(
+                file_name,
+                f"registries.{index}.exclude",
+                f"'{pattern}' excludes no server in {reg['name']}",
+            )
+
+    return result
+
+
+@dataclass
+class _ServerFile:
+    """A server.json read for validation, with its declared schema."""
+    result: ValidationResult  # Errors found while loading
+    data: dict | None = None  # None if the file or its schema couldn't be loaded
+    schema: dict | None = None
+    digest: str = ""  # SHA-256 of the file's content
+
+
+def _load_server_json(server_path: Path, root_dir: Path) -> _ServerFile:
+    """Read a server.json and fetch its declared schema."""
+    loaded = _ServerFile(ValidationResult())
     relative_path = server_path.relative_to(root_dir)
 
     if not server_path.exists():
-        result.add_error(str(relative_path), "", "File not found")
-        return result
+        loaded.result.add_error(str(relative_path), "", "File not found")
+        return loaded
 
+    content = server_path.read_bytes()
+    loaded.digest = hashlib.sha256(content).hexdigest()
     try:
-        with open(server_path) as f:
-            server_data = json.load(f)
+        server_data = json.loads(content)
     except json.JSONDecodeError as e:
-        result.add_error(str(relative_path), "", f"Invalid JSON: {e}")
-        return result
+        loaded.result.add_error(str(relative_path), "", f"Invalid JSON: {e}")
+        return loaded
 
     # Get schema URL from $schema field (now at root level)
     schema_url = server_data.get("$schema")
     if not schema_url:
-        result.add_error(str(relative_path), "", "Missing '$schema' field")
-        return result
+        loaded.result.add_error(str(relative_path), "", "Missing '$schema' field")
+        return loaded
 
-    # Fetch and validate against remote schema
+    # Fetch the remote schema
     try:
-        schema = fetch_remote_schema(schema_url)
-        schema_result = validate_against_schema(server_data, schema, str(relative_path))
-        result.merge(schema_result)
+        loaded.schema = fetch_remote_schema(schema_url)
     except requests.RequestException as e:
-        result.add_error(str(relative_path), "$schema", f"Failed to fetch schema: {e}")
+        loaded.result.add_error(str(relative_path), "$schema", f"Failed to fetch schema: {e}")
     except json.JSONDecodeError as e:
-        result.add_error(str(relative_path), "$schema", f"Invalid schema JSON: {e}")
+        loaded.result.add_error(str(relative_path), "$schema", f"Invalid schema JSON: {e}")
+    else:
+        loaded.data = server_data
+    return loaded
 
-    return result
 
+def _check_server(data: dict, schema: dict, file_name: str) -> tuple[ValidationResult, bool]:
+    """
+    Validate server data against its schema, reporting $ref failures as errors.
 
-def validate_all(root_dir: Path) -> ValidationResult:
-    """Validate all configuration files in the registry."""
+    Also returns whether the result can be cached: it can't when a remote
+    $ref couldn't be resolved.
+    """
+    try:
+        return validate_against_schema(data, schema, file_name), True
+    except requests.RequestException as e:
+        result = ValidationResult()
+        result.add_error(file_name, "$schema", f"Failed to fetch schema: {e}")
+    except Unresolvable as e:
+        result = ValidationResult()
+        result.add_error(file_name, "$schema", f"Failed to resolve schema $ref: {e}")
+    return result, False
+
+
+def validate_server_json(
+    server_path: Path,
+    root_dir: Path,
+) -> ValidationResult:
+    """Validate a server.json file against its declared schema."""
+    loaded = _load_server_json(server_path, root_dir)
+    if loaded.data is not None:
+        file_name = str(server_path.relative_to(root_dir))
+        loaded.result.merge(_check_server(loaded.data, loaded.schema, file_name)[0])
+    return loaded.result
+
+
+def _init_worker(schemas: dict[str, dict], store: SchemaStore | None) -> None:
+    """Seed a validation process with the schemas the parent already loaded."""
+    set_schema_store(store)
+    _schema_cache.update(schemas)
+
+
+def _check_server_in_worker(task: tuple[dict, str, str]) -> tuple[ValidationResult, bool]:
+    data, schema_url, file_name = task
+    return _check_server(data, _schema_cache[schema_url], file_name)
+
+
+def validate_server_files(
+    server_paths: list[Path],
+    root_dir: Path,
+    jobs: int = 1,
+    cache: ValidationCache | None = None,
+) -> list[ValidationResult]:
+    """
+    Validate server.json files, returning one result per path in order.
+
+    With jobs > 1, files are read and their schemas fetched on a thread
+    pool, and schema validation runs on a pool of `jobs` processes. Each
+    process receives every schema once, when it starts. Results are the
+    same, in the same order, as validating one file after another.
+
+    With a validation cache, files whose content and schema are unchanged
+    since they were recorded aren't validated again; the rest are recorded
+    (the caller saves the cache).
+    """
+    parallel = jobs > 1 and len(server_paths) > 1
+    if parallel:
+        with ThreadPoolExecutor(max_workers=min(jobs, len(server_paths))) as executor:
+            loaded = list(
+                executor.map(lambda path: _load_server_json(path, root_dir), server_paths)
+            )
+    else:
+        loaded = [_load_server_json(path, root_dir) for path in server_paths]
+
+    # Schema digests, computed once per schema
+    schema_digests: dict[str, str] = {}
+    pending: list[tuple[int, str, tuple[dict, str, str]]] = []
+    for index, server in enumerate(loaded):
+        if server.data is None:
+            continue
+        file_name = str(server_paths[index].relative_to(root_dir))
+        schema_url = server.data["$schema"]
+        if cache is not None:
+            if schema_url not in schema_digests:
+                schema_digests[schema_url] = schema_digest(server.schema)
+            errors = cache.lookup(file_name, server.digest, schema_digests[schema_url])
+            if errors is not None:
+                for path, message in errors:
+                    server.result.add_error(file_name, path, message)
+                continue
+        pending.append((index, file_name, (server.data, schema_url, file_name)))
+
+    if parallel and len(pending) > 1:
+        schemas = {s.data["$schema"]: s.schema for s in loaded if s.data is not None}
+        workers = min(jobs, len(pending))
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(schemas, _schema_store)
+        ) as executor:
+            checked = list(executor.map(
+                _check_server_in_worker,
+                [task for _, _, task in pending],
+                chunksize=max(1, len(pending) // (workers * 4)),
+            ))
+    else:
+        checked = [
+            _check_server(loaded[index].data, loaded[index].schema, file_name)
+            for index, file_name, _ in pending
+        ]
+
+    for (index, file_name, task), (server_result, cacheable) in zip(pending, checked, strict=True):
+        if cache is not None and cacheable:
+            cache.record(
+                file_name,
+                loaded[index].digest,
+                schema_digests[task[1]],
+                [(e.path, e.message) for e in server_result.errors],
+            )
+        loaded[index].result.merge(server_result)
+    return [server.result for server in loaded]
+
+
+def validate_all(
+    root_dir: Path,
+    snapshots: SnapshotStore | None = None,
+    skip_servers: Collection[str] = (),
+    jobs: int = 1,
+    cache: ValidationCache | None = None,
+    only_servers: Collection[str] | None = None,
+) -> ValidationResult:
+    """
+    Validate all configuration files in the registry.
+
+    With a snapshot store, patterns are also checked against the synced
+    listings of public registries (see check_patterns). Private server
+    files listed in skip_servers (relative paths, already known to be
+    valid) are not validated again, and with only_servers, neither is any
+    file it doesn't list. The rest are validated on `jobs` processes,
+    skipping those the validation cache holds unchanged (see
+    validate_server_files).
+    """
     result = ValidationResult()
     schemas_dir = root_dir / "schemas"
 
@@ -178,12 +466,29 @@ def validate_all(root_dir: Path) -> ValidationResult:
     with open(registry_path) as f:
         registry = json.load(f)
 
+    # Check patterns against locally synced listings
+    if snapshots is not None:
+        listings: dict[str, list[str]] = {}
+        for reg in registry.get("registries", []):
+            if reg.get("type") == "private":
+                continue
+            snapshot = snapshots.load(reg["url"])
+            if snapshot is not None:
+                listings[reg["url"]] = [
+                    s.get("server", {}).get("name", "") for s in snapshot.servers
+                ]
+        result.merge(check_patterns(registry, listings, str(registry_path)))
+
     # Validate each private server.json
-    for reg in registry.get("registries", []):
-        if reg.get("type") == "private":
-            for rel_path in reg.get("servers_relative_path", []):
-                server_path = root_dir / rel_path
-                server_result = validate_server_json(server_path, root_dir)
-                result.merge(server_result)
+    server_paths = [
+        root_dir / rel_path
+        for reg in registry.get("registries", [])
+        if reg.get("type") == "private"
+        for rel_path in reg.get("servers_relative_path", [])
+        if rel_path not in skip_servers
+        and (only_servers is None or os.path.normpath(rel_path) in only_servers)
+    ]
+    for server_result in validate_server_files(server_paths, root_dir, jobs, cache):
+        result.merge(server_result)
 
     return result
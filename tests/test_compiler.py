@@ -1,18 +1,27 @@
 """Tests for registry compilation using BDD style (Given-When-Then)."""
 
 import json
+import os
+import subprocess
+import sys
 import tempfile
+import threading
+import time
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
 from scripts.compiler import (
+    DIGEST_KEY,
+    STALE_META_KEY,
     check_conflicts,
     compile_registry,
     load_private_server,
     write_compiled_registry,
 )
-from scripts.fetcher import ServerEntry
+from scripts.fetcher import FetchError, ServerEntry
+from scripts.snapshot import LastGoodStore
 
 
 @pytest.fixture
@@ -165,6 +174,169 @@ class TestWriteCompiledRegistry:
         # Then
         assert output_path.exists()
 
+    def test_pretty_output_matches_indented_dump(self, temp_dir, sample_server_entry):
+        """
+        Given public and private servers
+        When write_compiled_registry streams them out
+        Then the file should equal json.dump of the whole registry with indent=2
+        """
+        # Given
+        private = ServerEntry("my-org/tool", "0.1.0", {"name": "my-org/tool"}, "private")
+        output_path = temp_dir / "registry.json"
+
+        # When
+        write_compiled_registry([sample_server_entry, private], output_path, "reg")
+
+        # Then
+        text = output_path.read_text()
+        data = json.loads(text)
+        assert text == json.dumps(data, indent=2)
+        assert data["servers"][0] == {**sample_server_entry.data, "_source": "Test Registry"}
+        assert data["servers"][1]["_meta"]["reg"]["isLatest"] is True
+        assert sample_server_entry.data == {
+            "server": {"name": "test-org/test-server", "version": "1.0.0"}
+        }
+
+    def test_passthrough_text_is_written_as_utf8_whatever_the_locale(self, temp_dir):
+        """
+        Given a passthrough entry listed with a CJK description
+        When the registry and static API are written under an ASCII-only locale
+        Then both are written as UTF-8 instead of failing mid-write
+        """
+        # Given
+        script = f"""
+import json
+from pathlib import Path
+
+from scripts.compiler import write_compiled_registry
+from scripts.fetcher import ServerEntry
+from scripts.static_api import write_static_api
+
+raw = json.dumps(
+    {{"server": {{"name": "a/b", "version": "1.0.0", "description": "\\u65e5\\u672c"}}}},
+    ensure_ascii=False,
+)
+servers = [ServerEntry("a/b", "1.0.0", None, "Public", raw)]
+write_compiled_registry(servers, Path({str(temp_dir)!r}) / "registry.json")
+write_static_api(servers, Path({str(temp_dir)!r}))
+"""
+        env = {**os.environ, "LC_ALL": "C", "PYTHONCOERCECLOCALE": "0", "PYTHONUTF8": "0"}
+
+        # When
+        subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=Path(__file__).parent.parent, env=env, check=True, timeout=30,
+        )
+
+        # Then
+        registry = json.loads((temp_dir / "registry.json").read_bytes())
+        page = json.loads((temp_dir / "v0.1" / "servers" / "page-1.json").read_bytes())
+        assert registry["servers"][0]["server"]["description"] == "\u65e5\u672c"
+        assert page["servers"][0]["server"]["description"] == "\u65e5\u672c"
+
+    def test_compact_output_is_minified(self, temp_dir, sample_server_entry):
+        """
+        Given compact=True
+        When write_compiled_registry is called
+        Then the file should be minified JSON with the same content, and no temp file left
+        """
+        # Given
+        output_path = temp_dir / "registry.json"
+
+        # When
+        write_compiled_registry([sample_server_entry], output_path, compact=True)
+
+        # Then
+        text = output_path.read_text()
+        data = json.loads(text)
+        assert text == json.dumps(data, separators=(",", ":"))
+        assert data["metadata"] == {"count": 1}
+        assert [p.name for p in temp_dir.iterdir()] == ["registry.json"]
+
+
+class TestCanonicalOutput:
+    """Tests for canonical (deterministic) compiled output."""
+
+    @staticmethod
+    def private(version: str = "0.1.0", description: str = "Tool") -> ServerEntry:
+        data = {"name": "my-org/tool", "version": version, "description": description}
+        return ServerEntry("my-org/tool", version, data, "private")
+
+    def test_recompiling_unchanged_inputs_is_byte_identical(self, temp_dir, sample_server_entry):
+        """
+        Given a canonical output written at one time
+        When the same servers are written later in a different order
+        Then the file is byte-for-byte unchanged
+        """
+        # Given
+        output_path = temp_dir / "registry.json"
+        write_compiled_registry(
+            [self.private(), sample_server_entry], output_path, "reg",
+            now="2026-01-01T00:00:00Z", canonical=True,
+        )
+        first = output_path.read_bytes()
+
+        # When
+        write_compiled_registry(
+            [sample_server_entry, self.private()], output_path, "reg",
+            now="2026-02-01T00:00:00Z", canonical=True,
+        )
+
+        # Then
+        assert output_path.read_bytes() == first
+
+    def test_entries_are_sorted_with_sorted_keys_and_digests(self, temp_dir, sample_server_entry):
+        """
+        Given servers out of name order
+        When a canonical output is written
+        Then servers are sorted by name, keys are sorted, and digests are present
+        """
+        # Given
+        output_path = temp_dir / "registry.json"
+
+        # When
+        write_compiled_registry(
+            [sample_server_entry, self.private()], output_path, "reg", canonical=True
+        )
+
+        # Then
+        data = json.loads(output_path.read_text())
+        assert [s["server"]["name"] for s in data["servers"]] == [
+            "my-org/tool", "test-org/test-server",
+        ]
+        for entry in data["servers"]:
+            assert list(entry) == sorted(entry)
+            assert list(entry["server"]) == sorted(entry["server"])
+        assert all(s[DIGEST_KEY].startswith("sha256:") for s in data["servers"])
+        assert data["metadata"]["digest"].startswith("sha256:")
+
+    def test_changed_entry_keeps_published_at_and_is_updated(self, temp_dir):
+        """
+        Given a canonical output with a private server
+        When its definition changes and the output is rewritten later
+        Then publishedAt is kept, updatedAt moves, and both digests change
+        """
+        # Given
+        output_path = temp_dir / "registry.json"
+        write_compiled_registry(
+            [self.private()], output_path, "reg", now="2026-01-01T00:00:00Z", canonical=True
+        )
+        before = json.loads(output_path.read_text())
+
+        # When
+        write_compiled_registry(
+            [self.private(description="Better tool")], output_path, "reg",
+            now="2026-02-01T00:00:00Z", canonical=True,
+        )
+
+        # Then
+        after = json.loads(output_path.read_text())
+        meta = after["servers"][0]["_meta"]["reg"]
+        assert meta["publishedAt"] == "2026-01-01T00:00:00Z"
+        assert meta["updatedAt"] == "2026-02-01T00:00:00Z"
+        assert after["servers"][0][DIGEST_KEY] != before["servers"][0][DIGEST_KEY]
+        assert after["metadata"]["digest"] != before["metadata"]["digest"]
+
 
 class TestCompileRegistry:
     """Tests for full registry compilation."""
@@ -223,3 +395,193 @@ class TestCompileRegistry:
         # Then
         assert not result.is_success
         assert len(result.errors) >= 1
+
+    def test_public_registries_are_fetched_concurrently_and_merged_in_order(self, temp_dir):
+        """
+        Given two public registries that both list the same server
+        When compile_registry is called
+        Then both should be fetched at the same time and the last one should win
+        """
+        # Given
+        registry_config = {
+            "registries": [
+                {"name": "first", "url": "https://first.example.com", "servers": "*"},
+                {"name": "second", "url": "https://second.example.com", "servers": "*"},
+            ]
+        }
+        in_flight = []
+        overlapped = threading.Event()
+
+        def fake_fetch(reg, timeout, workers, snapshots):
+            in_flight.append(reg["name"])
+            if len(in_flight) == 2:
+                overlapped.set()
+            # The first registry only finishes once the second has started
+            overlapped.wait(timeout=2)
+            return [ServerEntry("a/server", reg["name"], {}, reg["name"])]
+
+        with patch("scripts.compiler.fetch_from_public_registry", side_effect=fake_fetch):
+            # When
+            result = compile_registry(registry_config, temp_dir)
+
+        # Then
+        assert overlapped.is_set()
+        assert result.is_success
+        assert result.servers[0].source == "second"
+
+    def test_first_failing_registry_in_declaration_order_is_reported(self, temp_dir):
+        """
+        Given a public registry that fails
+        When compile_registry is called
+        Then its error should be returned without merged servers
+        """
+        # Given
+        registry_config = {
+            "registries": [
+                {"name": "broken", "url": "https://broken.example.com", "servers": "*"},
+                {"name": "fine", "url": "https://fine.example.com", "servers": "*"},
+            ]
+        }
+
+        def fake_fetch(reg, timeout, workers, snapshots):
+            if reg["name"] == "broken":
+                raise FetchError("broken", "502 Bad Gateway")
+            return [ServerEntry("a/server", "1.0", {}, reg["name"])]
+
+        with patch("scripts.compiler.fetch_from_public_registry", side_effect=fake_fetch):
+            # When
+            result = compile_registry(registry_config, temp_dir)
+
+        # Then
+        assert not result.is_success
+        assert result.errors[0].message == "broken: 502 Bad Gateway"
+        assert result.servers == []
+
+
+class TestStaleOnError:
+    """Tests for falling back to last-good snapshots."""
+
+    REGISTRY_CONFIG = {
+        "registries": [
+            {"name": "upstream", "url": "https://upstream.example.com", "servers": "*"},
+        ]
+    }
+
+    @staticmethod
+    def fetched(reg, timeout, workers, snapshots):
+        data = {"server": {"name": "a/server", "version": "1.0"}, "_meta": {}}
+        return [ServerEntry("a/server", "1.0", data, reg["name"])]
+
+    def test_failed_registry_uses_last_good_entries(self, temp_dir):
+        """
+        Given a registry that was fetched successfully once
+        When it fails on the next compile in stale-on-error mode
+        Then its last-good entries should be used and marked stale
+        """
+        # Given
+        last_good = LastGoodStore(temp_dir / "last-good")
+        with patch("scripts.compiler.fetch_from_public_registry", side_effect=self.fetched):
+            compile_registry(self.REGISTRY_CONFIG, temp_dir, last_good=last_good)
+
+        error = FetchError("upstream", "503 Service Unavailable")
+        with patch("scripts.compiler.fetch_from_public_registry", side_effect=error):
+            # When
+            result = compile_registry(self.REGISTRY_CONFIG, temp_dir, last_good=last_good)
+
+        # Then
+        assert result.is_success
+        assert result.stale == {"upstream": "upstream: 503 Service Unavailable"}
+        assert result.servers[0].name == "a/server"
+        assert STALE_META_KEY in result.servers[0].data["_meta"]
+
+    def test_slow_registry_past_deadline_uses_last_good_entries(self, temp_dir):
+        """
+        Given a saved last-good snapshot and a registry that doesn't answer in time
+        When compile_registry is called with a deadline
+        Then the snapshot should be used
+        """
+        # Given
+        last_good = LastGoodStore(temp_dir / "last-good")
+        last_good.save("upstream", "https://upstream.example.com", [
+            {"server": {"name": "a/server", "version": "1.0"}},
+        ])
+        release = threading.Event()
+
+        def slow_fetch(reg, timeout, workers, snapshots):
+            release.wait(timeout=5)
+            return []
+
+        with patch("scripts.compiler.fetch_from_public_registry", side_effect=slow_fetch):
+            # When
+            result = compile_registry(
+                self.REGISTRY_CONFIG, temp_dir, last_good=last_good, deadline=0.1
+            )
+            release.set()
+
+        # Then
+        assert result.is_success
+        assert "no response within" in result.stale["upstream"]
+        assert [s.name for s in result.servers] == ["a/server"]
+
+    @pytest.mark.parametrize("mode", ["deadline", "fail-fast"])
+    def test_abandoned_fetch_does_not_delay_exit(self, temp_dir, mode):
+        """
+        Given a registry whose fetch hangs for 10 seconds
+        When a compile gives up on it (past its deadline, or failing fast on another registry)
+        Then the process exits without waiting for the fetch to finish
+        """
+        # Given
+        script = f"""
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from scripts.compiler import compile_registry
+from scripts.fetcher import FetchError
+from scripts.snapshot import LastGoodStore
+
+def fetch(reg, timeout, workers, snapshots):
+    if reg["name"] == "broken":
+        time.sleep(0.2)  # Let the slow fetch start
+        raise FetchError("broken", "503 Service Unavailable")
+    time.sleep(10)
+    return []
+
+root = Path({str(temp_dir)!r})
+last_good = LastGoodStore(root / "last-good")
+last_good.save("slow", "https://slow.example.com", [])
+registries = [{{"name": "slow", "url": "https://slow.example.com", "servers": "*"}}]
+if {mode!r} == "fail-fast":
+    registries.insert(0, {{"name": "broken", "url": "https://broken.example.com", "servers": "*"}})
+    last_good = None
+with patch("scripts.compiler.fetch_from_public_registry", side_effect=fetch):
+    compile_registry({{"registries": registries}}, root, last_good=last_good, deadline=0.2)
+"""
+
+        # When
+        started = time.monotonic()
+        subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=Path(__file__).parent.parent, check=True, timeout=30,
+        )
+        elapsed = time.monotonic() - started
+
+        # Then
+        assert elapsed < 5
+
+    def test_failure_without_snapshot_is_still_an_error(self, temp_dir):
+        """
+        Given no last-good snapshot
+        When the registry fails in stale-on-error mode
+        Then compilation should fail as before
+        """
+        # Given
+        last_good = LastGoodStore(temp_dir / "last-good")
+        error = FetchError("upstream", "503 Service Unavailable")
+
+        with patch("scripts.compiler.fetch_from_public_registry", side_effect=error):
+            # When
+            result = compile_registry(self.REGISTRY_CONFIG, temp_dir, last_good=last_good)
+
+        # Then
+        assert not result.is_success
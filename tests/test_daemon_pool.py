@@ -0,0 +1,54 @@
+"""Tests for the daemon thread pool using BDD style (Given-When-Then)."""
+
+import threading
+import time
+
+import pytest
+
+from scripts.daemon_pool import DaemonThreadPool
+
+
+class TestDaemonThreadPool:
+    """Tests for running tasks on daemon threads."""
+
+    def test_map_keeps_order_and_raises_task_errors(self):
+        """
+        Given a pool of three workers
+        When tasks finishing in reverse order are mapped, and then a failing task
+        Then results come back in submission order and the failure is raised
+        """
+        # Given
+        pool = DaemonThreadPool(3)
+
+        def task(i):
+            time.sleep((5 - i) * 0.01)
+            if i < 0:
+                raise ValueError("bad item")
+            return i * 2
+
+        # When/Then
+        with pool:
+            assert list(pool.map(task, range(5))) == [0, 2, 4, 6, 8]
+            with pytest.raises(ValueError):
+                list(pool.map(task, [1, -1]))
+
+    def test_shutdown_cancels_queued_tasks_without_waiting(self):
+        """
+        Given a one-worker pool busy with a blocked task, and a second task queued
+        When it is shut down without waiting, cancelling queued tasks
+        Then the queued task is cancelled and the worker is a daemon thread
+        """
+        # Given
+        pool = DaemonThreadPool(1)
+        release = threading.Event()
+        running = pool.submit(release.wait, 5)
+        queued = pool.submit(lambda: "never")
+
+        # When
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        # Then
+        assert queued.cancelled()
+        assert all(t.daemon for t in pool._threads)
+        release.set()
+        assert running.result(timeout=5) is True
@@ -0,0 +1,115 @@
+"""Tests for the compiled registry delta feed using BDD style (Given-When-Then)."""
+
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from scripts.compiler import write_compiled_registry
+from scripts.delta import load_digests, write_delta
+from scripts.fetcher import ServerEntry
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def entry(name: str, version: str = "1.0.0", description: str = "") -> ServerEntry:
+    data = {"server": {"name": name, "version": version, "description": description}}
+    return ServerEntry(name, version, data, "Public")
+
+
+def read_delta(path: Path) -> tuple[dict, list[dict]]:
+    header, *changes = [json.loads(line) for line in path.read_text().splitlines()]
+    return header, changes
+
+
+class TestWriteDelta:
+    """Tests for diffing two compiled registries."""
+
+    @pytest.mark.parametrize("canonical", [False, True])
+    def test_reports_added_changed_and_removed_servers(self, temp_dir, canonical):
+        """
+        Given a compiled registry
+        When it is recompiled with one server added, one changed and one removed
+        Then the delta lists exactly those three changes and links both digests
+        """
+        # Given
+        output_path = temp_dir / "registry.json"
+        write_compiled_registry(
+            [entry("acme/kept"), entry("acme/tool"), entry("acme/old")],
+            output_path, canonical=canonical,
+        )
+        previous = load_digests(output_path)
+
+        # When
+        write_compiled_registry(
+            [entry("acme/kept"), entry("acme/tool", "2.0.0"), entry("acme/new")],
+            output_path, canonical=canonical,
+        )
+        summary = write_delta(previous, output_path, temp_dir / "registry.delta.ndjson")
+
+        # Then
+        header, changes = read_delta(temp_dir / "registry.delta.ndjson")
+        assert (summary.added, summary.changed, summary.removed) == (1, 1, 1)
+        assert header["from"] == previous.digest
+        assert header["to"] == load_digests(output_path).digest
+        assert header["from"] != header["to"]
+        ops = {(c["op"], c["name"], c["version"]) for c in changes}
+        assert ops == {
+            ("replace", "acme/tool", "2.0.0"),
+            ("add", "acme/new", "1.0.0"),
+            ("remove", "acme/old", "1.0.0"),
+        }
+        added = next(c for c in changes if c["op"] == "add")
+        assert added["entry"]["server"]["name"] == "acme/new"
+
+    def test_first_compile_adds_everything(self, temp_dir):
+        """
+        Given no previous compiled registry
+        When a delta is written
+        Then every server is added and "from" is null
+        """
+        # Given
+        output_path = temp_dir / "registry.json"
+        previous = load_digests(output_path)
+        write_compiled_registry([entry("acme/a"), entry("acme/b")], output_path)
+
+        # When
+        summary = write_delta(previous, output_path, temp_dir / "registry.delta.ndjson")
+
+        # Then
+        header, changes = read_delta(temp_dir / "registry.delta.ndjson")
+        assert header["from"] is None
+        assert summary.added == 2
+        assert [c["op"] for c in changes] == ["add", "add"]
+
+    def test_unchanged_canonical_recompile_is_empty(self, temp_dir):
+        """
+        Given a canonical registry with a private server
+        When it is recompiled later from the same inputs
+        Then the delta has no changes and from equals to
+        """
+        # Given
+        output_path = temp_dir / "registry.json"
+        private = ServerEntry("my-org/tool", "0.1.0", {"name": "my-org/tool"}, "private")
+        write_compiled_registry(
+            [private], output_path, now="2026-01-01T00:00:00Z", canonical=True
+        )
+        previous = load_digests(output_path)
+
+        # When
+        write_compiled_registry(
+            [private], output_path, now="2026-02-01T00:00:00Z", canonical=True
+        )
+        summary = write_delta(previous, output_path, temp_dir / "registry.delta.ndjson")
+
+        # Then
+        header, changes = read_delta(temp_dir / "registry.delta.ndjson")
+        assert (summary.added, summary.changed, summary.removed) == (0, 0, 0)
+        assert changes == []
+        assert header["from"] == header["to"]
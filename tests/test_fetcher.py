@@ -3,18 +3,25 @@
 Uses real network requests to public registries for integration testing.
 """
 
-from unittest.mock import patch
+import json
+import time
+from unittest.mock import MagicMock, patch
 
 import pytest
 import requests
 
+from scripts import fetcher
+from scripts.compiler import write_compiled_registry
 from scripts.fetcher import (
     FetchError,
+    ServerEntry,
     _parse_author_pattern,
     fetch_from_public_registry,
+    fetch_items,
     fetch_server_list,
     fetch_server_version,
 )
+from scripts.transport import build_response
 
 
 class TestFetchServerListReal:
@@ -128,7 +135,7 @@ class TestFetchErrorHandling:
             "servers": "*",
         }
 
-        with patch("scripts.fetcher.requests.get") as mock_get:
+        with patch("scripts.transport.get") as mock_get:
             mock_get.side_effect = requests.RequestException("Network error")
 
             # When/Then
@@ -150,7 +157,7 @@ class TestFetchErrorHandling:
             "servers": {"nonexistent/server": "latest"},
         }
 
-        with patch("scripts.fetcher.requests.get") as mock_get:
+        with patch("scripts.transport.get") as mock_get:
             response = mock_get.return_value
             response.raise_for_status.side_effect = requests.HTTPError("404 Not Found")
 
@@ -227,3 +234,484 @@ class TestAuthorWildcardPattern:
         assert any(n.startswith("microsoft/") for n in names)
         # markitdown appears in both pattern and exact, should be in results
         assert "microsoft/markitdown" in names
+
+
+class TestConcurrentVersionFetching:
+    """Tests for bounded-concurrency version lookups."""
+
+    def test_results_keep_config_order_when_fetched_concurrently(self):
+        """
+        Given several exact servers whose lookups finish in reverse order
+        When fetch_from_public_registry is called with multiple workers
+        Then results should be in the same order as the config
+        """
+        # Given
+        names = ["a/one", "b/two", "c/three", "d/four"]
+        config = {
+            "name": "Test Registry",
+            "url": "https://example.com",
+            "servers": {n: "latest" for n in names},
+            "workers": 4,
+        }
+        delays = {n: 0.05 * (len(names) - i) for i, n in enumerate(names)}
+
+        def fake_fetch(base_url, server_name, version, timeout):
+            time.sleep(delays[server_name])
+            return {"server": {"name": server_name, "version": "1.0.0"}}
+
+        with patch("scripts.fetcher.fetch_server_version", side_effect=fake_fetch):
+            # When
+            results = fetch_from_public_registry(config)
+
+        # Then
+        assert [r.name for r in results] == names
+
+    def test_error_in_concurrent_lookup_raises_fetch_error(self):
+        """
+        Given one server lookup that fails
+        When fetch_from_public_registry is called with multiple workers
+        Then it should raise FetchError with registry name
+        """
+        # Given
+        config = {
+            "name": "Flaky Registry",
+            "url": "https://example.com",
+            "servers": {"a/one": "latest", "b/two": "latest"},
+        }
+
+        def fake_fetch(base_url, server_name, version, timeout):
+            if server_name == "b/two":
+                raise requests.HTTPError("500 Server Error")
+            return {"server": {"name": server_name, "version": "1.0.0"}}
+
+        with patch("scripts.fetcher.fetch_server_version", side_effect=fake_fetch):
+            # When/Then
+            with pytest.raises(FetchError) as exc_info:
+                fetch_from_public_registry(config, workers=2)
+
+        assert "Flaky Registry" in str(exc_info.value)
+
+
+class TestPatternListReuse:
+    """Tests for reusing list entries in author/* patterns."""
+
+    @staticmethod
+    def listed(name, version, is_latest):
+        return {
+            "server": {"name": name, "version": version},
+            "_meta": {"io.modelcontextprotocol.registry/official": {"isLatest": is_latest}},
+        }
+
+    def test_latest_pattern_reuses_list_entries(self):
+        """
+        Given an author/* pattern for "latest" and list entries marked isLatest
+        When fetch_from_public_registry is called
+        Then no per-server version requests should be made
+        """
+        # Given
+        config = {
+            "name": "Test Registry",
+            "url": "https://example.com",
+            "servers": {"acme/*": "latest"},
+            "search": False,
+        }
+        listing = [
+            self.listed("acme/one", "1.0.0", True),
+            self.listed("other/two", "1.0.0", True),
+            self.listed("acme/three", "2.0.0", True),
+        ]
+
+        with patch("scripts.fetcher.fetch_server_list", return_value=iter(listing)), \
+                patch("scripts.fetcher.fetch_server_version") as mock_version:
+            # When
+            results = fetch_from_public_registry(config)
+
+        # Then
+        mock_version.assert_not_called()
+        assert [r.name for r in results] == ["acme/one", "acme/three"]
+        assert results[1].data is listing[2]
+
+    def test_older_versions_in_listing_are_not_duplicated(self):
+        """
+        Given a listing with an old and the latest version of one server
+        When an author/* pattern asks for "latest"
+        Then the server should appear once, taken from the latest entry
+        """
+        # Given
+        config = {
+            "name": "Test Registry",
+            "url": "https://example.com",
+            "servers": {"acme/*": "latest"},
+            "search": False,
+        }
+        listing = [
+            self.listed("acme/one", "1.0.0", False),
+            self.listed("acme/one", "1.1.0", True),
+        ]
+
+        with patch("scripts.fetcher.fetch_server_list", return_value=iter(listing)), \
+                patch("scripts.fetcher.fetch_server_version") as mock_version:
+            # When
+            results = fetch_from_public_registry(config)
+
+        # Then
+        mock_version.assert_not_called()
+        assert len(results) == 1
+        assert results[0].version == "1.1.0"
+
+    def test_pinned_pattern_falls_back_to_version_fetch(self):
+        """
+        Given an author/* pattern pinned to a version the listing doesn't have
+        When fetch_from_public_registry is called
+        Then the version should be fetched per server
+        """
+        # Given
+        config = {
+            "name": "Test Registry",
+            "url": "https://example.com",
+            "servers": {"acme/*": "0.9.0"},
+            "search": False,
+        }
+        listing = [self.listed("acme/one", "1.0.0", True)]
+        pinned = {"server": {"name": "acme/one", "version": "0.9.0"}}
+
+        with patch("scripts.fetcher.fetch_server_list", return_value=iter(listing)), \
+                patch("scripts.fetcher.fetch_server_version", return_value=pinned) as mock_version:
+            # When
+            results = fetch_from_public_registry(config)
+
+        # Then
+        mock_version.assert_called_once_with("https://example.com", "acme/one", "0.9.0", 30)
+        assert results[0].version == "0.9.0"
+
+
+class TestPagePrefetching:
+    """Tests for the background page prefetching pipeline."""
+
+    @staticmethod
+    def page_responses(count):
+        """Build mock responses for `count` chained pages."""
+        responses = []
+        for i in range(count):
+            next_cursor = f"c{i + 1}" if i + 1 < count else None
+            body = json.dumps({
+                "servers": [{"server": {"name": f"org/server-{i}"}}],
+                "metadata": {"nextCursor": next_cursor},
+            })
+            responses.append(build_response("https://example.com", 200, body.encode()))
+        return responses
+
+    def test_pages_are_yielded_in_order(self):
+        """
+        Given a three-page listing
+        When fetch_server_list is iterated with prefetching
+        Then servers should come back in page order
+        """
+        # Given
+        with patch("scripts.transport.get", side_effect=self.page_responses(3)):
+            # When
+            names = [s["server"]["name"] for s in fetch_server_list("https://example.com")]
+
+        # Then
+        assert names == ["org/server-0", "org/server-1", "org/server-2"]
+
+    def test_next_page_is_requested_while_consumer_is_busy(self):
+        """
+        Given a two-page listing
+        When the consumer has only taken the first page
+        Then the second page should already have been requested
+        """
+        # Given
+        with patch("scripts.transport.get", side_effect=self.page_responses(2)) as mock_get:
+            servers = fetch_items("https://example.com/v0.1/servers", prefetch=1)
+
+            # When
+            next(servers)
+            deadline = time.monotonic() + 2
+            while mock_get.call_count < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            # Then
+            assert mock_get.call_count == 2
+            assert mock_get.call_args.kwargs["params"] == {"cursor": "c1"}
+            servers.close()
+
+    def test_error_on_later_page_is_raised_to_consumer(self):
+        """
+        Given a listing whose second page fails
+        When fetch_server_list is iterated
+        Then the first page's servers should be yielded before the error
+        """
+        # Given
+        first, _ = self.page_responses(2)
+        side_effect = [first, requests.ConnectionError("reset")]
+
+        with patch("scripts.transport.get", side_effect=side_effect):
+            servers = fetch_server_list("https://example.com")
+
+            # When/Then
+            assert next(servers)["server"]["name"] == "org/server-0"
+            with pytest.raises(requests.ConnectionError):
+                next(servers)
+
+
+class TestStreamingDecode:
+    """Tests for decoding list pages as a stream."""
+
+    @staticmethod
+    def streamed_response(*chunks):
+        """Build a mock response whose body arrives in chunks (exceptions are raised)."""
+        def iter_content(chunk_size):
+            for chunk in chunks:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+
+        response = MagicMock()
+        response.iter_content.side_effect = iter_content
+        return response
+
+    def test_servers_are_yielded_before_page_is_read(self):
+        """
+        Given a page whose connection drops after the first server
+        When fetch_items is iterated
+        Then the first server should be yielded before the error
+        """
+        # Given
+        response = self.streamed_response(
+            b'{"servers": [{"server": {"name": "org/a"}},',
+            requests.ConnectionError("reset"),
+        )
+
+        with patch("scripts.transport.get", return_value=response) as mock_get:
+            servers = fetch_items("https://example.com/v0.1/servers", prefetch=0)
+
+            # When/Then
+            assert next(servers) == {"server": {"name": "org/a"}}
+            with pytest.raises(requests.ConnectionError):
+                next(servers)
+
+        assert mock_get.call_args.kwargs["stream"] is True
+        response.close.assert_called_once()
+
+    def test_malformed_page_raises_fetch_error(self):
+        """
+        Given a registry returning a truncated page
+        When fetch_from_public_registry is called
+        Then it should raise FetchError with registry name
+        """
+        # Given
+        config = {"name": "Truncated Registry", "url": "https://example.com", "servers": "*"}
+        response = self.streamed_response(b'{"servers": [{"server": ')
+
+        with patch("scripts.transport.get", return_value=response):
+            # When/Then
+            with pytest.raises(FetchError) as exc_info:
+                fetch_from_public_registry(config)
+
+        assert "Truncated Registry" in str(exc_info.value)
+
+
+class TestPassthrough:
+    """Tests for keeping "*" entries as the JSON text they were listed as."""
+
+    def test_entries_keep_listed_text_and_decode_on_access(self, tmp_path):
+        """
+        Given a "*" registry with passthrough and an excluded server
+        When it is fetched and compiled
+        Then entries hold their listed text, decode it on access, and are written as
+        listed (only minified, numbers untouched)
+        """
+        # Given
+        listed = [
+            '{"server": {"name": "org/a", "version": "1.0.0"}, "_meta": {"x": {"n": 1.50}}}',
+            '{"server": {"name": "org/skip", "version": "1.0.0"}}',
+        ]
+        body = '{"servers": [' + ", ".join(listed) + '], "metadata": {}}'
+        config = {
+            "name": "Public", "url": "https://example.com", "servers": "*",
+            "exclude": ["org/skip"], "passthrough": True,
+        }
+
+        # When
+        with patch(
+            "scripts.transport.get",
+            return_value=build_response("https://example.com", 200, body.encode()),
+        ):
+            entries = fetch_from_public_registry(config)
+        output_path = tmp_path / "registry.json"
+        write_compiled_registry(entries, output_path, compact=True)
+
+        # Then
+        assert [(e.name, e.version, e.raw) for e in entries] == [("org/a", "1.0.0", listed[0])]
+        assert entries[0].data["_meta"] == {"x": {"n": 1.5}}
+        written = '{"server":{"name":"org/a","version":"1.0.0"},"_meta":{"x":{"n":1.50}}'
+        assert written + ',"_source":"Public"}' in output_path.read_text()
+        assert json.loads(output_path.read_text())["servers"][0]["_source"] == "Public"
+
+    def test_assigning_data_drops_listed_text(self):
+        """
+        Given a passthrough entry
+        When its data is replaced (as when marking it stale)
+        Then the new data is kept and the listed text dropped
+        """
+        # Given
+        entry = ServerEntry("org/a", "1.0.0", source="Public", raw='{"server": {"name": "org/a"}}')
+
+        # When
+        entry.data = {**entry.data, "_meta": {"stale": True}}
+
+        # Then
+        assert entry.raw is None
+        assert entry.data == {"server": {"name": "org/a"}, "_meta": {"stale": True}}
+
+
+class TestPatternSearch:
+    """Tests for resolving author/* patterns with the registry's search param."""
+
+    @pytest.fixture(autouse=True)
+    def forget_search_support(self):
+        fetcher._search_unsupported.clear()
+        yield
+        fetcher._search_unsupported.clear()
+
+    @staticmethod
+    def listed(name):
+        return {
+            "server": {"name": name, "version": "1.0.0"},
+            "_meta": {"io.modelcontextprotocol.registry/official": {"isLatest": True}},
+        }
+
+    def test_patterns_are_resolved_with_search(self):
+        """
+        Given author/* patterns and a registry that supports search
+        When fetch_from_public_registry is called
+        Then one search per prefix should be made, and no full listing
+        """
+        # Given
+        config = {
+            "name": "Test Registry",
+            "url": "https://example.com",
+            "servers": {"acme/*": "latest", "beta/*": "latest"},
+        }
+        catalog = [self.listed(n) for n in ["acme/one", "xacme/two", "beta/three", "other/x"]]
+
+        def fake_list(base_url, timeout=30, updated_since=None, prefetch=2, search=None):
+            return iter([s for s in catalog if search and search in s["server"]["name"]])
+
+        with patch("scripts.fetcher.fetch_server_list", side_effect=fake_list) as mock_list:
+            # When
+            results = fetch_from_public_registry(config)
+
+        # Then
+        searches = [c.kwargs.get("search") for c in mock_list.call_args_list]
+        assert sorted(searches) == ["acme/", "beta/"]
+        assert [r.name for r in results] == ["acme/one", "beta/three"]
+
+    def test_registry_ignoring_search_falls_back_to_listing(self):
+        """
+        Given a registry that ignores the search param
+        When an author/* pattern is resolved
+        Then the full listing should be scanned, and search not retried
+        """
+        # Given
+        config = {
+            "name": "Test Registry",
+            "url": "https://example.com",
+            "servers": {"acme/*": "latest"},
+        }
+        catalog = [self.listed("other/x"), self.listed("acme/one")]
+
+        with patch(
+            "scripts.fetcher.fetch_server_list", side_effect=lambda *a, **k: iter(catalog)
+        ) as mock_list:
+            # When
+            first = fetch_from_public_registry(config)
+            second = fetch_from_public_registry(config)
+
+        # Then
+        assert [r.name for r in first] == [r.name for r in second] == ["acme/one"]
+        searches = [c.kwargs.get("search") for c in mock_list.call_args_list]
+        assert searches == ["acme/", None, None]
+
+    def test_registry_rejecting_search_falls_back_to_listing(self):
+        """
+        Given a registry that answers 400 to the search param
+        When an author/* pattern is resolved
+        Then the full listing should be scanned
+        """
+        # Given
+        config = {
+            "name": "Test Registry",
+            "url": "https://example.com",
+            "servers": {"acme/*": "latest"},
+        }
+        rejected = build_response("https://example.com/v0.1/servers", 400, b"")
+
+        def fake_list(base_url, timeout=30, updated_since=None, prefetch=2, search=None):
+            if search:
+                raise requests.HTTPError("400 Bad Request", response=rejected)
+            return iter([self.listed("acme/one")])
+
+        with patch("scripts.fetcher.fetch_server_list", side_effect=fake_list):
+            # When
+            results = fetch_from_public_registry(config)
+
+        # Then
+        assert [r.name for r in results] == ["acme/one"]
+
+
+class TestExcludePatterns:
+    """Tests for exclude prefixes and globs."""
+
+    def test_wildcard_registry_excludes_prefixes_and_globs(self):
+        """
+        Given a "*" registry excluding an author and a glob
+        When fetch_from_public_registry is called
+        Then matching servers should be left out
+        """
+        # Given
+        config = {
+            "name": "Test Registry",
+            "url": "https://example.com",
+            "servers": "*",
+            "exclude": ["spam/*", "*-preview", "acme/old"],
+        }
+        names = ["acme/tool", "spam/one", "acme/tool-preview", "acme/old", "beta/x"]
+        listing = [{"server": {"name": n, "version": "1.0.0"}} for n in names]
+
+        with patch("scripts.fetcher.fetch_server_list", return_value=iter(listing)):
+            # When
+            results = fetch_from_public_registry(config)
+
+        # Then
+        assert [r.name for r in results] == ["acme/tool", "beta/x"]
+
+    def test_exclude_applies_to_pattern_matches(self):
+        """
+        Given an author/* pattern and an exclude glob under that author
+        When fetch_from_public_registry is called
+        Then excluded servers should not be selected by the pattern
+        """
+        # Given
+        config = {
+            "name": "Test Registry",
+            "url": "https://example.com",
+            "servers": {"acme/*": "latest"},
+            "exclude": ["acme/*-preview"],
+            "search": False,
+        }
+        listing = [
+            {
+                "server": {"name": n, "version": "1.0.0"},
+                "_meta": {"io.modelcontextprotocol.registry/official": {"isLatest": True}},
+            }
+            for n in ["acme/tool", "acme/tool-preview"]
+        ]
+
+        with patch("scripts.fetcher.fetch_server_list", return_value=iter(listing)):
+            # When
+            results = fetch_from_public_registry(config)
+
+        # Then
+        assert [r.name for r in results] == ["acme/tool"]
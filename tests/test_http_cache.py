@@ -0,0 +1,255 @@
+"""Tests for the on-disk HTTP response cache using BDD style (Given-When-Then)."""
+
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from scripts import transport
+from scripts.http_cache import ResponseCache
+
+
+@pytest.fixture
+def cache():
+    """Create a response cache in a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield ResponseCache(Path(tmpdir) / "http", max_size_bytes=10_000)
+
+
+def fake_response(status_code, body=b"", headers=None):
+    """Build a mock requests.Response."""
+    response = MagicMock()
+    response.status_code = status_code
+    response.content = body
+    response.headers = headers or {}
+    return response
+
+
+class TestResponseCache:
+    """Tests for storing, evicting and clearing cached responses."""
+
+    def test_key_ignores_param_order(self):
+        """
+        Given the same URL with params in different order
+        When keys are computed
+        Then they should be equal
+        """
+        # When
+        url = "https://example.com/v0.1/servers"
+        first = ResponseCache.key(url, {"limit": 100, "cursor": "a"})
+        second = ResponseCache.key(url, {"cursor": "a", "limit": 100})
+
+        # Then
+        assert first == second
+
+    def test_stores_body_with_validators(self, cache):
+        """
+        Given a response body with an ETag
+        When it is stored and looked up
+        Then the body and conditional headers should be returned
+        """
+        # Given
+        key = cache.key("https://example.com/a")
+
+        # When
+        cache.store(key, "https://example.com/a", b'{"servers": []}', '"v1"', None)
+        cached = cache.lookup(key)
+
+        # Then
+        assert cached is not None
+        assert cached.read_body() == b'{"servers": []}'
+        assert cached.conditional_headers() == {"If-None-Match": '"v1"'}
+
+    def test_evicts_least_recently_used_entries(self, cache):
+        """
+        Given a full cache where the oldest entry was recently read
+        When a new entry pushes the cache over its size cap
+        Then the least recently used entry should be evicted
+        """
+        # Given
+        keys = [cache.key(f"https://example.com/{i}") for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.store(key, f"https://example.com/{i}", b"x" * 3000, '"v"', None)
+            os.utime(cache.directory / f"{key}.body", (i, i))
+        cache.touch(keys[0])
+
+        # When
+        new_key = cache.key("https://example.com/new")
+        cache.store(new_key, "https://example.com/new", b"x" * 3000, '"v"', None)
+
+        # Then
+        assert cache.lookup(keys[0]) is not None
+        assert cache.lookup(keys[1]) is None
+        assert cache.lookup(new_key) is not None
+        assert cache.stats().size_bytes <= cache.max_size_bytes
+
+    def test_interrupted_stream_leaves_no_files_behind(self, cache):
+        """
+        Given a cached entry and a body whose download fails partway through
+        When the body is stored as it streams in
+        Then the error should propagate, the old entry stay intact and no temp file remain
+        """
+        # Given
+        key = cache.key("https://example.com/a")
+        cache.store(key, "https://example.com/a", b"old", '"v1"', None)
+        files_before = sorted(cache.directory.iterdir())
+
+        def chunks():
+            yield b"partial"
+            raise ConnectionResetError("connection reset")
+
+        # When
+        with pytest.raises(ConnectionResetError):
+            cache.store_stream(key, "https://example.com/a", chunks(), '"v2"', None)
+
+        # Then
+        assert sorted(cache.directory.iterdir()) == files_before
+        assert cache.lookup(key).read_body() == b"old"
+
+    def test_clear_removes_all_entries(self, cache):
+        """
+        Given a cache with entries
+        When clear is called
+        Then stats should report an empty cache
+        """
+        # Given
+        key = cache.key("https://example.com/a")
+        cache.store(key, "https://example.com/a", b"{}", '"v1"', None)
+
+        # When
+        removed = cache.clear()
+
+        # Then
+        assert removed == 1
+        assert cache.stats().entries == 0
+
+
+class TestCachedTransport:
+    """Tests for conditional requests through the shared transport."""
+
+    @pytest.fixture(autouse=True)
+    def use_cache(self, cache):
+        transport.set_cache(cache)
+        yield
+        transport.set_cache(None)
+
+    def test_not_modified_returns_cached_body(self, cache):
+        """
+        Given a response cached with an ETag
+        When the server answers the next request with 304
+        Then the cached body should be returned and validators sent
+        """
+        # Given
+        session = MagicMock()
+        session.get.side_effect = [
+            fake_response(200, b'{"servers": [1]}', {"ETag": '"v1"'}),
+            fake_response(304),
+        ]
+
+        with patch.object(transport, "get_session", return_value=session):
+            transport.get("https://example.com/v0.1/servers", params={"limit": 100})
+
+            # When
+            response = transport.get("https://example.com/v0.1/servers", params={"limit": 100})
+
+        # Then
+        assert response.status_code == 200
+        assert response.json() == {"servers": [1]}
+        _, kwargs = session.get.call_args
+        assert kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+    def test_response_without_validators_is_not_cached(self, cache):
+        """
+        Given a response with no ETag or Last-Modified
+        When it is fetched
+        Then nothing should be stored
+        """
+        # Given
+        session = MagicMock()
+        session.get.return_value = fake_response(200, b"{}")
+
+        with patch.object(transport, "get_session", return_value=session):
+            # When
+            transport.get("https://example.com/a")
+
+        # Then
+        assert cache.stats().entries == 0
+
+    def test_streamed_body_is_spooled_and_served_from_cache(self, cache):
+        """
+        Given a streamed 200 response with an ETag, then a 304
+        When both are requested with stream=True
+        Then each body should be read back from the cache file
+        """
+        # Given
+        first = fake_response(200, headers={"ETag": '"v1"'})
+        first.iter_content.return_value = iter([b'{"servers": ', b"[1]}"])
+        session = MagicMock()
+        session.get.side_effect = [first, fake_response(304)]
+
+        with patch.object(transport, "get_session", return_value=session):
+            # When
+            bodies = []
+            for _ in range(2):
+                response = transport.get("https://example.com/a", stream=True)
+                bodies.append(b"".join(response.iter_content(4)))
+                response.close()
+
+        # Then
+        assert bodies == [b'{"servers": [1]}', b'{"servers": [1]}']
+        assert cache.stats().entries == 1
+        first.close.assert_called_once()
+
+    def test_streamed_revalidations_release_their_connection(self, cache):
+        """
+        Given a local server answering with an ETag, and a one-connection pool
+        When the same page is streamed repeatedly and each answer is a 304
+        Then every request completes instead of waiting for a free connection
+        """
+        # Given
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self.send_response(304)
+                    self.send_header("ETag", '"v1"')
+                    self.end_headers()
+                    return
+                body = b'{"servers": []}'
+                self.send_response(200)
+                self.send_header("ETag", '"v1"')
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/v0.1/servers"
+        transport.configure(max_per_host=1)
+        bodies = []
+
+        def fetch():
+            for _ in range(4):
+                response = transport.get(url, timeout=5, stream=True)
+                bodies.append(b"".join(response.iter_content(1024)))
+                response.close()
+
+        # When
+        try:
+            worker = threading.Thread(target=fetch, daemon=True)
+            worker.start()
+            worker.join(timeout=10)
+        finally:
+            server.shutdown()
+            server.server_close()
+            transport.configure()
+
+        # Then
+        assert not worker.is_alive()
+        assert bodies == [b'{"servers": []}'] * 4
@@ -0,0 +1,115 @@
+"""Tests for incremental JSON decoding using BDD style (Given-When-Then)."""
+
+import json
+
+import pytest
+
+from scripts.json_stream import iter_members, minify
+
+
+def chunked(text, size):
+    """Split text into UTF-8 byte chunks of `size` bytes."""
+    data = text.encode()
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestIterMembers:
+    """Tests for streaming the members of a JSON object."""
+
+    def test_streams_array_elements_across_chunk_boundaries(self):
+        """
+        Given a page split into tiny chunks, including inside numbers and non-ASCII text
+        When iter_members streams the servers array
+        Then every element and the metadata should be decoded intact
+        """
+        # Given
+        page = {
+            "servers": [{"name": "org/é-server", "stars": 12345}, {"name": "b"}, 678],
+            "metadata": {"nextCursor": "abc", "count": 3},
+        }
+
+        # When
+        members = list(iter_members(chunked(json.dumps(page, indent=2), 3), {"servers"}))
+
+        # Then
+        assert members == [
+            ("servers", {"name": "org/é-server", "stars": 12345}),
+            ("servers", {"name": "b"}),
+            ("servers", 678),
+            ("metadata", {"nextCursor": "abc", "count": 3}),
+        ]
+
+    def test_other_members_are_yielded_whole(self):
+        """
+        Given an object whose metadata comes first and a non-streamed array
+        When iter_members is called
+        Then non-streamed members should be yielded as complete values
+        """
+        # Given
+        text = '{"metadata": {"nextCursor": null}, "tags": [1, 2], "servers": []}'
+
+        # When
+        members = list(iter_members(chunked(text, 5), {"servers"}))
+
+        # Then
+        assert members == [("metadata", {"nextCursor": None}), ("tags", [1, 2])]
+
+    def test_empty_object(self):
+        """Given '{}', no members are yielded."""
+        assert list(iter_members([b" { } "])) == []
+
+    @pytest.mark.parametrize("text", [
+        '{"servers": [{"name": "a"}',
+        '{"servers": [1 2]}',
+        '{"servers": []} trailing',
+        '[1, 2]',
+    ])
+    def test_malformed_input_raises_decode_error(self, text):
+        """Given truncated or malformed input, iter_members raises JSONDecodeError."""
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_members(chunked(text, 4), {"servers"}))
+
+    def test_interned_elements_share_repeated_strings(self):
+        """
+        Given two servers with the same $schema URL and _meta key
+        When iter_members decodes them with intern_strings
+        Then both share one copy of each, and other values are left alone
+        """
+        # Given - built at runtime so the literals aren't shared already
+        schema = "".join(["https://example.com/", "server.schema.json"])
+        meta_key = "".join(["io.example/", "official"])
+        servers = [
+            {"$schema": schema, "description": f"server {i}", "_meta": {meta_key: {}}}
+            for i in range(2)
+        ]
+        body = json.dumps({"servers": servers})
+
+        # When
+        first, second = (
+            value for _, value in iter_members(chunked(body, 16), {"servers"}, intern_strings=True)
+        )
+
+        # Then
+        assert first == servers[0] and second == servers[1]
+        assert first["$schema"] is second["$schema"]
+        assert next(iter(first["_meta"])) is next(iter(second["_meta"]))
+
+
+class TestMinify:
+    """Tests for stripping whitespace from JSON text."""
+
+    def test_whitespace_between_tokens_is_dropped_and_strings_kept(self):
+        """
+        Given indented JSON with spaces, escaped quotes and backslashes inside strings
+        When it is minified
+        Then it equals the compact encoding of the same value
+        """
+        # Given
+        value = {"name": "a/b", "description": 'say "hi"  there \\ ', "tags": [1, {"x": None}]}
+        text = json.dumps(value, indent=4, ensure_ascii=False)
+
+        # When
+        minified = minify(text)
+
+        # Then
+        assert minified == json.dumps(value, separators=(",", ":"), ensure_ascii=False)
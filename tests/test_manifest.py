@@ -0,0 +1,329 @@
+"""Tests for the incremental compile manifest using BDD style (Given-When-Then)."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from scripts import transport
+from scripts.compiler import CompileResult, compile_registry, write_compiled_registry
+from scripts.fetcher import ServerEntry
+from scripts.manifest import (
+    BuildManifest,
+    RegistryRecord,
+    UpstreamResponse,
+    config_digest,
+    digest_inputs,
+    digest_outputs,
+    is_up_to_date,
+    record_registry,
+    reusable_registries,
+    save_build,
+    unchanged_servers,
+)
+from scripts.snapshot import LastGoodStore
+
+REG = {"name": "upstream", "url": "https://upstream.example.com", "servers": "*"}
+
+
+@pytest.fixture
+def root(tmp_path):
+    """A registry root with one public registry and one private server."""
+    server = tmp_path / "mcps" / "acme" / "server.json"
+    server.parent.mkdir(parents=True)
+    server.write_text('{"name": "acme/tool", "version": "1.0.0"}')
+    (tmp_path / "registry.json").write_text(json.dumps({"registries": [
+        REG,
+        {"name": "private", "type": "private", "servers_relative_path": ["mcps/acme/server.json"]},
+    ]}))
+    return tmp_path
+
+
+@pytest.fixture
+def forget_requests():
+    yield
+    transport.clear_requests_seen()
+
+
+def write_outputs(root):
+    """Write a compiled registry, its gzip sibling and a static API tree."""
+    (root / "out.json").write_text("{}")
+    (root / "out.json.gz").write_bytes(b"gz")
+    page = root / "static" / "v0.1" / "servers" / "page-1.json"
+    page.parent.mkdir(parents=True)
+    page.write_text('{"servers": []}')
+    return [root / "out.json", root / "out.json.gz", root / "static" / "v0.1"]
+
+
+def built(root):
+    """Record a build in which REG was fetched with an ETag; returns its outputs too."""
+    registry_config = json.loads((root / "registry.json").read_text())
+    build_cache = LastGoodStore(root / "build")
+    entry = ServerEntry("a/server", "1.0", {"server": {"name": "a/server"}}, REG["name"])
+    result = CompileResult(servers=[entry], fetched={REG["name"]: [entry]})
+    outputs = write_outputs(root)
+
+    transport.clear_requests_seen()
+    with transport.registry_scope(REG["name"]):
+        transport._note_request(f"{REG['url']}/v0.1/servers", {"limit": 100}, '"v1"', None)
+    current = digest_inputs(root)
+    save_build(
+        root / "manifest.json", current, None, registry_config,
+        result, {}, build_cache, digest_outputs(root, outputs),
+    )
+    return registry_config, build_cache, outputs
+
+
+class TestBuildManifest:
+    """Tests for recording and comparing builds."""
+
+    def test_manifest_round_trips(self, root, forget_requests):
+        """
+        Given a recorded build
+        When the manifest is loaded back
+        Then it should hold the input, output and upstream digests
+        """
+        # Given
+        built(root)
+
+        # When
+        manifest = BuildManifest.load(root / "manifest.json")
+
+        # Then
+        assert manifest == BuildManifest(
+            config=None,
+            registry=digest_inputs(root).registry,
+            servers=digest_inputs(root).servers,
+            registries={"upstream": RegistryRecord(
+                config=config_digest(REG),
+                responses=[UpstreamResponse(
+                    f"{REG['url']}/v0.1/servers", {"limit": 100}, '"v1"', None
+                )],
+            )},
+            outputs=manifest.outputs,
+        )
+        assert sorted(manifest.outputs) == ["out.json", "out.json.gz", "static/v0.1"]
+
+    def test_only_changed_server_files_are_revalidated(self, root, forget_requests):
+        """
+        Given a recorded build and a private server file edited since
+        When unchanged_servers is called
+        Then the edited file should not be listed
+        """
+        # Given
+        built(root)
+        previous = BuildManifest.load(root / "manifest.json")
+        assert unchanged_servers(digest_inputs(root), previous) == {"mcps/acme/server.json"}
+
+        # When
+        (root / "mcps" / "acme" / "server.json").write_text('{"name": "acme/tool"}')
+
+        # Then
+        assert unchanged_servers(digest_inputs(root), previous) == set()
+
+
+class TestReuse:
+    """Tests for skipping fetches of unchanged registries."""
+
+    def test_unchanged_registry_is_reused_and_build_is_up_to_date(self, root, forget_requests):
+        """
+        Given a recorded build whose upstream answers 304
+        When the next compile is planned
+        Then the registry should be reused and the build reported up to date
+        """
+        # Given
+        registry_config, build_cache, outputs = built(root)
+        previous = BuildManifest.load(root / "manifest.json")
+        current = digest_inputs(root)
+
+        with patch.object(transport, "is_unchanged", return_value=True) as mock_check:
+            # When
+            reuse = reusable_registries(registry_config, current, previous, build_cache)
+
+        # Then
+        mock_check.assert_called_once_with(
+            f"{REG['url']}/v0.1/servers", {"limit": 100}, '"v1"', None, 30
+        )
+        assert [e.name for e in reuse["upstream"]] == ["a/server"]
+        assert is_up_to_date(
+            current, previous, registry_config, reuse, digest_outputs(root, outputs)
+        )
+
+    def test_changed_upstream_or_entry_is_fetched_again(self, root, forget_requests):
+        """
+        Given a recorded build
+        When upstream changed, or the registry's entry in registry.json did
+        Then the registry should not be reused
+        """
+        # Given
+        registry_config, build_cache, _ = built(root)
+        previous = BuildManifest.load(root / "manifest.json")
+        current = digest_inputs(root)
+
+        # When/Then
+        with patch.object(transport, "is_unchanged", return_value=False):
+            assert reusable_registries(registry_config, current, previous, build_cache) == {}
+
+        edited = {"registries": [{**REG, "exclude": ["a/server"]}]}
+        with patch.object(transport, "is_unchanged", return_value=True):
+            assert reusable_registries(edited, current, previous, build_cache) == {}
+
+    @pytest.mark.parametrize("damage", [
+        lambda root: (root / "out.json").write_text('{"tampered": true}'),
+        lambda root: (root / "out.json.gz").unlink(),
+        lambda root: (root / "static" / "v0.1" / "servers" / "page-1.json").unlink(),
+        lambda root: (root / "static" / "v0.1" / "servers" / "page-2.json").write_text("{}"),
+    ], ids=["edited-output", "deleted-sibling", "deleted-page", "added-page"])
+    def test_damaged_output_is_not_up_to_date(self, root, forget_requests, damage):
+        """
+        Given a recorded build with a compiled registry, a gzip sibling and a static API tree
+        When any of those outputs is edited, deleted or added to
+        Then the build should not be reported up to date
+        """
+        # Given
+        registry_config, _, outputs = built(root)
+        previous = BuildManifest.load(root / "manifest.json")
+        reuse = {"upstream": []}
+
+        # When
+        damage(root)
+
+        # Then
+        assert not is_up_to_date(
+            digest_inputs(root), previous, registry_config, reuse, digest_outputs(root, outputs)
+        )
+
+    def test_output_missing_from_the_previous_build_is_not_up_to_date(
+        self, root, forget_requests
+    ):
+        """
+        Given a recorded build that didn't write a delta feed
+        When the next compile also expects one
+        Then the build should not be reported up to date
+        """
+        # Given
+        registry_config, _, outputs = built(root)
+        previous = BuildManifest.load(root / "manifest.json")
+        (root / "out.delta.ndjson").write_text("")
+
+        # When
+        expected = digest_outputs(root, [*outputs, root / "out.delta.ndjson"])
+
+        # Then
+        reuse = {"upstream": []}
+        assert not is_up_to_date(digest_inputs(root), previous, registry_config, reuse, expected)
+
+
+    @pytest.mark.parametrize("compact", [False, True], ids=["pretty", "compact"])
+    def test_reused_passthrough_entries_are_written_byte_for_byte(
+        self, tmp_path, forget_requests, compact
+    ):
+        """
+        Given a passthrough registry listing servers with its own whitespace
+        When the registry is compiled fresh, and then again from the build cache
+        Then both outputs are identical, and minified when compact
+        """
+        # Given
+        reg = {**REG, "passthrough": True}
+        listing = (
+            b'{"servers": [\n  {"server": {"name": "a/server",  "version": "1.0"},\n'
+            b'   "_meta": {"note": "two  spaces"}}\n], "metadata": {}}'
+        )
+
+        def get(url, params=None, **kwargs):
+            response = transport.build_response(url, 200, listing)
+            response.headers["ETag"] = '"v1"'
+            return response
+
+        session = MagicMock()
+        session.get.side_effect = get
+        build_cache = LastGoodStore(tmp_path / "build")
+        current = BuildManifest(config=None, registry=None)
+
+        def compile_to(path, reuse):
+            result = compile_registry({"registries": [reg]}, tmp_path, reuse=reuse)
+            write_compiled_registry(
+                result.servers, path, compact=compact, now="2025-01-01T00:00:00Z"
+            )
+            return result
+
+        # When
+        with patch.object(transport, "get_session", return_value=session):
+            result = compile_to(tmp_path / "fresh.json", {})
+        save_build(
+            tmp_path / "manifest.json", current, None, {"registries": [reg]},
+            result, {}, build_cache, {},
+        )
+        previous = BuildManifest.load(tmp_path / "manifest.json")
+        with patch.object(transport, "is_unchanged", return_value=True):
+            reuse = reusable_registries({"registries": [reg]}, current, previous, build_cache)
+        compile_to(tmp_path / "reused.json", reuse)
+
+        # Then
+        assert list(reuse) == ["upstream"]
+        fresh = (tmp_path / "fresh.json").read_bytes()
+        assert (tmp_path / "reused.json").read_bytes() == fresh
+        assert b'"two  spaces"' in fresh
+        if compact:
+            assert b"\n" not in fresh and b'"name":"a/server","version":"1.0"' in fresh
+
+
+class TestRecordRegistry:
+    """Tests for recording the responses a registry was built from."""
+
+    def test_registries_on_one_host_record_only_their_own_requests(self, forget_requests):
+        """
+        Given two public registries served from the same host
+        When both are fetched concurrently
+        Then each registry's record holds only the responses fetched for it
+        """
+        # Given
+        registries = [
+            {"name": name, "url": f"https://shared.example.com/{name}", "servers": "*"}
+            for name in ("first", "second")
+        ]
+
+        def get(url, params=None, **kwargs):
+            response = transport.build_response(url, 200, b'{"servers": [], "metadata": {}}')
+            response.headers["ETag"] = f'"{url}"'
+            return response
+
+        session = MagicMock()
+        session.get.side_effect = get
+
+        # When
+        with patch.object(transport, "get_session", return_value=session):
+            compile_registry({"registries": registries}, None)
+
+        # Then
+        for reg in registries:
+            urls = [r.url for r in record_registry(reg).responses]
+            assert urls == [f"{reg['url']}/v0.1/servers"]
+
+
+class TestConditionalCheck:
+    """Tests for transport.is_unchanged."""
+
+    def test_not_modified_means_unchanged(self):
+        """
+        Given recorded validators
+        When upstream answers 304
+        Then the response is unchanged, and the validators were sent
+        """
+        # Given
+        session = MagicMock()
+        session.get.return_value.status_code = 304
+
+        with patch.object(transport, "get_session", return_value=session):
+            # When
+            unchanged = transport.is_unchanged("https://example.com/a", None, '"v1"', None)
+
+        # Then
+        assert unchanged
+        assert session.get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+    def test_missing_validators_mean_changed(self):
+        """Given no validators, nothing is requested and the response counts as changed."""
+        with patch.object(transport, "get_session") as mock_session:
+            assert not transport.is_unchanged("https://example.com/a", None, None, None)
+        mock_session.assert_not_called()
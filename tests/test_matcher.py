@@ -0,0 +1,68 @@
+"""Tests for compiled name matching using BDD style (Given-When-Then)."""
+
+from scripts.matcher import NameMatcher
+
+
+class TestNameMatcher:
+    """Tests for exact, author/* and glob patterns."""
+
+    def test_author_pattern_matches_names_under_prefix(self):
+        """
+        Given an author/* pattern
+        When names are matched
+        Then only names under that author should match
+        """
+        # Given
+        matcher = NameMatcher(["microsoft/*"])
+
+        # Then
+        assert matcher.match("microsoft/markitdown") == "microsoft/*"
+        assert matcher.match("microsoftx/tool") is None
+        assert matcher.match("microsoft") is None
+
+    def test_longest_author_pattern_wins(self):
+        """Given nested author/* patterns, the most specific one matches."""
+        matcher = NameMatcher(["acme/*", "acme/labs/*"])
+        assert matcher.match("acme/labs/x") == "acme/labs/*"
+        assert matcher.match("acme/tool") == "acme/*"
+
+    def test_exact_name_wins_over_pattern(self):
+        """Given an exact name also covered by a pattern, the exact name matches."""
+        matcher = NameMatcher(["acme/*", "acme/tool", "*tool"])
+        assert matcher.match("acme/tool") == "acme/tool"
+
+    def test_globs_match_whole_names(self):
+        """
+        Given glob patterns
+        When names are matched
+        Then globs should match the whole name, case-sensitively
+        """
+        # Given
+        matcher = NameMatcher(["*-preview", "acme/test-?"])
+
+        # Then
+        assert matcher.match("vendor/tool-preview") == "*-preview"
+        assert matcher.match("acme/test-1") == "acme/test-?"
+        assert matcher.match("acme/test-10") is None
+        assert "vendor/TOOL-PREVIEW" not in matcher
+
+    def test_unmatched_reports_patterns_without_hits(self):
+        """
+        Given patterns where one name satisfies both an exact name and a prefix
+        When unmatched is called
+        Then only patterns matching no name should be reported, in order
+        """
+        # Given
+        matcher = NameMatcher(["acme/tool", "acme/*", "ghost/*", "*-beta"])
+
+        # When
+        unmatched = matcher.unmatched(["acme/tool", "other/x"])
+
+        # Then
+        assert unmatched == ["ghost/*", "*-beta"]
+
+    def test_empty_matcher_matches_nothing(self):
+        """Given no patterns, nothing matches and the matcher is falsy."""
+        matcher = NameMatcher([])
+        assert not matcher
+        assert "acme/tool" not in matcher
@@ -0,0 +1,155 @@
+"""Tests for the offline registry mirror using BDD style (Given-When-Then)."""
+
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from scripts import transport, validator
+from scripts.fetcher import FetchError, fetch_from_public_registry
+from scripts.mirror import Mirror, fill_mirror
+from scripts.schema_store import SchemaStore
+
+URL = "https://registry.example.com"
+
+
+@pytest.fixture
+def mirror():
+    """Create a mirror in a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Mirror(Path(tmpdir) / "mirror")
+
+
+@pytest.fixture(autouse=True)
+def go_online():
+    """Make sure no test leaves the transport offline."""
+    yield
+    transport.set_offline(None)
+
+
+def fake_response(url, payload):
+    """Build a 200 response carrying a JSON payload."""
+    return transport.build_response(url, 200, json.dumps(payload).encode())
+
+
+class TestMirror:
+    """Tests for recording and replaying responses."""
+
+    def test_version_url_maps_to_readable_path(self, mirror):
+        """Given a version URL, the mirror file mirrors its path."""
+        path = mirror.path_for(f"{URL}/v0.1/servers/ai.exa%2Fexa/versions/latest")
+        expected = "registry.example.com/v0.1/servers/ai.exa%2Fexa/versions/latest.json"
+        assert path == mirror.directory / expected
+
+    def test_replays_recorded_response(self, mirror):
+        """
+        Given a recorded page
+        When the same URL and params are replayed
+        Then the recorded body should be returned
+        """
+        # Given
+        mirror.record(f"{URL}/v0.1/servers", {"limit": 100}, b'{"servers": []}')
+
+        # When
+        response = mirror.replay(f"{URL}/v0.1/servers", {"limit": 100})
+
+        # Then
+        assert response.status_code == 200
+        assert response.json() == {"servers": []}
+
+    def test_missing_response_is_not_found(self, mirror):
+        """Given nothing recorded, replay answers 404."""
+        assert mirror.replay(f"{URL}/v0.1/servers").status_code == 404
+
+
+class TestOfflineCompile:
+    """Tests for filling the mirror and fetching from it offline."""
+
+    def test_offline_fetch_matches_online_fetch(self, mirror, tmp_path):
+        """
+        Given a mirror filled from a registry with an exact server and a pattern
+        When the same registry is fetched offline
+        Then the entries should equal those fetched online
+        """
+        # Given
+        reg = {
+            "name": "Upstream",
+            "url": URL,
+            "servers": {"acme/*": "latest", "ai.exa/exa": "latest"},
+        }
+        listed = {
+            "server": {"name": "acme/one", "version": "1.0.0"},
+            "_meta": {"io.modelcontextprotocol.registry/official": {"isLatest": True}},
+        }
+        exa = {"server": {"name": "ai.exa/exa", "version": "2.0.0"}}
+
+        def online_get(url, params=None, timeout=30, headers=None, stream=False):
+            if url.endswith("/v0.1/servers"):
+                return fake_response(url, {"servers": [listed], "metadata": {}})
+            return fake_response(url, exa)
+
+        session = MagicMock()
+        session.get.side_effect = online_get
+        with patch.object(transport, "get_session", return_value=session):
+            online = fetch_from_public_registry(reg)
+            fill_mirror({"registries": [reg]}, mirror, tmp_path)
+
+        # When
+        transport.set_offline(mirror.replay)
+        offline = fetch_from_public_registry(reg)
+
+        # Then
+        assert offline == online
+
+    def test_server_missing_from_mirror_raises_fetch_error(self, mirror):
+        """
+        Given an empty mirror
+        When a registry is fetched offline
+        Then FetchError should be raised
+        """
+        # Given
+        transport.set_offline(mirror.replay)
+        reg = {"name": "Upstream", "url": URL, "servers": {"ai.exa/exa": "latest"}}
+
+        # When/Then
+        with pytest.raises(FetchError, match="Not in mirror"):
+            fetch_from_public_registry(reg)
+
+
+class TestFillMirror:
+    """Tests for recording what an offline compile needs."""
+
+    def test_schema_from_the_schema_store_is_mirrored(self, mirror, tmp_path):
+        """
+        Given a private server whose schema is already in the on-disk schema cache
+        When the mirror is filled
+        Then the schema is recorded without a request, and replays offline
+        """
+        # Given
+        schema_url = "https://schemas.example.com/server.schema.json"
+        schema = {"type": "object", "required": ["name"]}
+        store = SchemaStore(tmp_path / "schemas")
+        store.save(schema_url, schema)
+        validator.set_schema_store(store)
+        validator._schema_cache.clear()
+        server = tmp_path / "mcps" / "tool" / "server.json"
+        server.parent.mkdir(parents=True)
+        server.write_text(json.dumps({"$schema": schema_url, "name": "acme/tool"}))
+        registry_config = {"registries": [
+            {"name": "private", "type": "private",
+             "servers_relative_path": ["mcps/tool/server.json"]},
+        ]}
+
+        # When
+        try:
+            with patch("scripts.transport.get") as mock_get:
+                fill_mirror(registry_config, mirror, tmp_path)
+        finally:
+            validator.set_schema_store(None)
+            validator._schema_cache.clear()
+
+        # Then
+        mock_get.assert_not_called()
+        assert mirror.replay(schema_url).json() == schema
@@ -0,0 +1,135 @@
+"""Tests for precompressed output using BDD style (Given-When-Then)."""
+
+import gzip
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from scripts import precompress as precompress_module
+from scripts.fetcher import ServerEntry
+from scripts.precompress import available_formats, precompress
+from scripts.static_api import write_static_api
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class TestPrecompress:
+    """Tests for compressed siblings of a file."""
+
+    def test_gzip_sibling_round_trips(self, temp_dir):
+        """
+        Given a JSON file
+        When precompress is called with gzip
+        Then registry.json.gz decompresses to the original bytes
+        """
+        # Given
+        path = temp_dir / "registry.json"
+        path.write_text('{"servers": []}' * 1000)
+
+        # When
+        written = precompress(path, ["gzip"])
+
+        # Then
+        assert written == [temp_dir / "registry.json.gz"]
+        assert gzip.decompress(written[0].read_bytes()) == path.read_bytes()
+
+    def test_gzip_output_is_deterministic(self, temp_dir):
+        """
+        Given a file compressed once
+        When the same content is rewritten later under a different mtime and compressed again
+        Then the sibling's hash is unchanged
+        """
+        # Given
+        path = temp_dir / "registry.json"
+        path.write_text('{"servers": []}')
+        precompress(path, ["gzip"])
+        first = digest(temp_dir / "registry.json.gz")
+
+        # When
+        path.write_text('{"servers": []}')
+        os.utime(path, (0, 0))
+        precompress(path, ["gzip"])
+
+        # Then
+        assert digest(temp_dir / "registry.json.gz") == first
+
+    def test_brotli_sibling_round_trips(self, temp_dir):
+        """
+        Given the brotli package is installed
+        When precompress is called with brotli
+        Then registry.json.br decompresses to the original bytes
+        """
+        brotli = pytest.importorskip("brotli")
+
+        # Given
+        path = temp_dir / "registry.json"
+        path.write_text('{"servers": []}' * 1000)
+
+        # When
+        precompress(path, ["brotli"])
+
+        # Then
+        assert brotli.decompress((temp_dir / "registry.json.br").read_bytes()) == path.read_bytes()
+
+    def test_brotli_is_skipped_without_the_package(self, temp_dir):
+        """
+        Given the brotli package is not installed
+        When precompress is called with gzip and brotli
+        Then only the gzip sibling is written
+        """
+        # Given
+        path = temp_dir / "registry.json"
+        path.write_text("{}")
+
+        # When
+        with patch.object(precompress_module, "brotli", None):
+            assert available_formats(["gzip", "brotli"]) == ["gzip"]
+            precompress(path, ["gzip", "brotli"])
+
+        # Then
+        assert (temp_dir / "registry.json.gz").exists()
+        assert not (temp_dir / "registry.json.br").exists()
+
+
+class TestPrecompressedStaticApi:
+    """Tests for compressed siblings in the static API tree."""
+
+    def test_every_document_gets_a_gzip_sibling(self, temp_dir):
+        """
+        Given a server
+        When write_static_api is called with gzip
+        Then the list page, version and latest documents each have a .gz sibling
+        """
+        # Given
+        server = ServerEntry(
+            name="acme/tool",
+            version="1.0.0",
+            data={"server": {"name": "acme/tool", "version": "1.0.0"}},
+            source="Public",
+        )
+
+        # When
+        write_static_api([server], temp_dir, precompressed=["gzip"])
+
+        # Then
+        servers_dir = temp_dir / "v0.1" / "servers"
+        for path in [
+            servers_dir / "page-1.json",
+            servers_dir / "acme%2Ftool" / "versions" / "1.0.0.json",
+            servers_dir / "acme%2Ftool" / "versions" / "latest.json",
+        ]:
+            sibling = path.with_name(path.name + ".gz")
+            assert gzip.decompress(sibling.read_bytes()) == path.read_bytes()
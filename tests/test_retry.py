@@ -0,0 +1,239 @@
+"""Tests for retries and rate limiting using BDD style (Given-When-Then)."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from scripts import transport
+from scripts.retry import RetryPolicy, TokenBucket, parse_retry_after
+
+URL = "https://registry.example.com/v0.1/servers"
+
+
+@pytest.fixture(autouse=True)
+def reset_registry_policy():
+    """Clear any per-registry policy set by a test."""
+    yield
+    transport.configure_policy("upstream")
+    transport.configure_policy("other")
+
+
+def fake_response(status_code, headers=None):
+    """Build a mock requests.Response."""
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class FakeClock:
+    """Stand-in for the time module whose sleep advances monotonic time."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestRetryPolicy:
+    """Tests for backoff and Retry-After handling."""
+
+    def test_backoff_grows_exponentially_up_to_cap(self):
+        """
+        Given a policy with backoff factor 1 and cap 5
+        When backoff is computed for later retries
+        Then it should stay within the exponential ceiling and the cap
+        """
+        # Given
+        policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+
+        # When/Then
+        assert 0 <= policy.backoff(1) <= 1
+        assert 0 <= policy.backoff(3) <= 4
+        assert 0 <= policy.backoff(10) <= 5
+
+    def test_retry_after_wins_when_longer(self):
+        """Given Retry-After of 7s, delay is at least 7s (within the cap)."""
+        policy = RetryPolicy(backoff_factor=0.1, max_backoff=60)
+        assert policy.delay(1, 7) >= 7
+
+    def test_parses_retry_after_seconds_and_dates(self):
+        """Given seconds or a past HTTP date, returns seconds to wait."""
+        assert parse_retry_after("12") == 12
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(None) is None
+
+
+class TestTokenBucket:
+    """Tests for the rate limiter."""
+
+    def test_waits_once_burst_is_spent(self):
+        """
+        Given a bucket of 2 requests per second with burst 2
+        When three tokens are taken
+        Then the third should wait for a refill
+        """
+        # Given
+        clock = FakeClock()
+        with patch("scripts.retry.time", clock):
+            bucket = TokenBucket(rate=2, burst=2)
+
+            # When
+            bucket.acquire()
+            bucket.acquire()
+            bucket.acquire()
+
+        # Then
+        assert clock.slept == [pytest.approx(0.5)]
+
+
+class TestTransportRetries:
+    """Tests for retries in transport.get."""
+
+    def test_retries_transient_status_then_succeeds(self):
+        """
+        Given a registry that answers 502 then 200
+        When transport.get is called
+        Then the 200 should be returned and the retry counted
+        """
+        # Given
+        session = MagicMock()
+        session.get.side_effect = [fake_response(502), fake_response(200)]
+        before = transport.retry_count("upstream")
+
+        with patch.object(transport, "get_session", return_value=session), \
+                patch("scripts.transport.time.sleep"), \
+                transport.registry_scope("upstream"):
+            # When
+            response = transport.get(URL)
+
+        # Then
+        assert response.status_code == 200
+        assert transport.retry_count("upstream") - before == 1
+        assert transport.retry_count("other") == 0
+
+    def test_honors_retry_after_on_429(self):
+        """
+        Given a 429 with Retry-After: 3
+        When transport.get retries
+        Then it should sleep at least 3 seconds first
+        """
+        # Given
+        session = MagicMock()
+        session.get.side_effect = [
+            fake_response(429, {"Retry-After": "3"}),
+            fake_response(200),
+        ]
+
+        with patch.object(transport, "get_session", return_value=session), \
+                patch("scripts.transport.time.sleep") as mock_sleep:
+            # When
+            transport.get(URL)
+
+        # Then
+        assert mock_sleep.call_args.args[0] >= 3
+
+    def test_gives_up_after_max_retries(self):
+        """
+        Given a registry configured with one retry that keeps failing
+        When transport.get is called for it
+        Then the last error response should be returned after two attempts
+        """
+        # Given
+        transport.configure_policy("upstream", retry=RetryPolicy(max_retries=1))
+        session = MagicMock()
+        session.get.return_value = fake_response(503)
+
+        with patch.object(transport, "get_session", return_value=session), \
+                patch("scripts.transport.time.sleep"), \
+                transport.registry_scope("upstream"):
+            # When
+            response = transport.get(URL)
+
+        # Then
+        assert response.status_code == 503
+        assert session.get.call_count == 2
+
+    def test_connection_errors_are_retried(self):
+        """
+        Given a connection reset followed by success
+        When transport.get is called
+        Then the request should be retried
+        """
+        # Given
+        session = MagicMock()
+        session.get.side_effect = [requests.ConnectionError("reset"), fake_response(200)]
+
+        with patch.object(transport, "get_session", return_value=session), \
+                patch("scripts.transport.time.sleep"):
+            # When
+            response = transport.get(URL)
+
+        # Then
+        assert response.status_code == 200
+
+    def test_registry_rate_limit_is_applied(self):
+        """
+        Given a registry config with a rateLimit
+        When its requests are sent
+        Then each request should take a token from the limiter
+        """
+        # Given
+        transport.configure_registry({
+            "name": "upstream",
+            "url": URL,
+            "rateLimit": {"requestsPerSecond": 100, "burst": 5},
+        })
+        session = MagicMock()
+        session.get.return_value = fake_response(200)
+
+        with patch.object(transport, "get_session", return_value=session), \
+                patch.object(TokenBucket, "acquire") as mock_acquire, \
+                transport.registry_scope("upstream"):
+            # When
+            transport.get(URL)
+            transport.get(URL)
+
+        # Then
+        assert mock_acquire.call_count == 2
+
+    def test_registries_on_one_host_keep_their_own_policies(self):
+        """
+        Given two registries on the same host, only the first with a rateLimit and retry
+        When the second is configured after the first, and each makes a failing request
+        Then only the first's requests are rate limited and retried per its own policy
+        """
+        # Given
+        transport.configure_registry({
+            "name": "upstream",
+            "url": URL,
+            "retry": {"maxRetries": 1},
+            "rateLimit": {"requestsPerSecond": 100, "burst": 5},
+        })
+        transport.configure_registry({"name": "other", "url": URL})
+        session = MagicMock()
+        session.get.return_value = fake_response(503)
+        calls = {}
+
+        with patch.object(transport, "get_session", return_value=session), \
+                patch("scripts.transport.time.sleep"), \
+                patch.object(TokenBucket, "acquire") as mock_acquire:
+            # When
+            for name in ("upstream", "other"):
+                session.get.reset_mock()
+                mock_acquire.reset_mock()
+                with transport.registry_scope(name):
+                    transport.get(URL)
+                calls[name] = (session.get.call_count, mock_acquire.call_count)
+
+        # Then
+        default_attempts = RetryPolicy().max_retries + 1
+        assert calls == {"upstream": (2, 2), "other": (default_attempts, 0)}
@@ -0,0 +1,201 @@
+"""Tests for the remote schema store using BDD style (Given-When-Then)."""
+
+import json
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from scripts import validator
+from scripts.schema_store import SchemaStore, schema_store_from_config
+from scripts.transport import build_response
+from scripts.validator import fetch_remote_schema, set_schema_store, validate_server_files
+
+REPO_ROOT = Path(__file__).parent.parent
+
+URL = "https://example.com/schemas/2025-01-01/server.schema.json"
+SCHEMA = {"type": "object", "required": ["name"]}
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture(autouse=True)
+def fresh_run():
+    """Start each test as a new CLI run: no schemas in memory, no store."""
+    validator._schema_cache.clear()
+    yield
+    validator._schema_cache.clear()
+    set_schema_store(None)
+
+
+def schema_response(*args, **kwargs):
+    return build_response(URL, 200, json.dumps(SCHEMA).encode())
+
+
+class TestSchemaStore:
+    """Tests for the on-disk schema cache and the bundled set."""
+
+    def test_cached_schema_expires_after_ttl(self, temp_dir):
+        """
+        Given a schema cached an hour ago with a ten minute TTL
+        When it is loaded
+        Then it is expired, but still available when expired copies are allowed
+        """
+        # Given
+        store = SchemaStore(temp_dir / "cache", ttl=600)
+        with patch("time.time", return_value=time.time() - 3600):
+            store.save(URL, SCHEMA)
+
+        # When/Then
+        assert store.load(URL) is None
+        assert store.load(URL, allow_expired=True) == SCHEMA
+
+    def test_tampered_copies_are_ignored(self, temp_dir):
+        """
+        Given a cached and a vendored schema whose content no longer matches its hash
+        When they are loaded
+        Then neither is used
+        """
+        # Given
+        store = SchemaStore(temp_dir / "cache", bundled_dir=temp_dir / "remote")
+        store.save(URL, SCHEMA)
+        vendored = store.vendor(URL, SCHEMA)
+        for path in [*(temp_dir / "cache").glob("*.json"), vendored]:
+            path.write_text(path.read_text().replace('"name"', '"other"'))
+
+        # When/Then
+        assert store.load(URL) is None
+        assert store.bundled(URL) is None
+
+
+class TestFetchRemoteSchema:
+    """Tests for the lookup order of remote schemas."""
+
+    def test_bundled_schema_needs_no_network(self, temp_dir):
+        """
+        Given a schema vendored into the bundled set
+        When it is fetched
+        Then no request is made
+        """
+        # Given
+        store = SchemaStore(None, bundled_dir=temp_dir / "remote")
+        store.vendor(URL, SCHEMA)
+        set_schema_store(store)
+
+        # When
+        with patch("scripts.transport.get") as mock_get:
+            schema = fetch_remote_schema(URL)
+
+        # Then
+        assert schema == SCHEMA
+        mock_get.assert_not_called()
+
+    def test_fetched_schema_is_reused_by_the_next_run(self, temp_dir):
+        """
+        Given a schema fetched by one run
+        When a later run fetches it within the TTL
+        Then it comes from disk without a request
+        """
+        # Given
+        set_schema_store(SchemaStore(temp_dir / "cache"))
+        with patch("scripts.transport.get", side_effect=schema_response):
+            fetch_remote_schema(URL)
+        validator._schema_cache.clear()
+
+        # When
+        with patch("scripts.transport.get") as mock_get:
+            schema = fetch_remote_schema(URL)
+
+        # Then
+        assert schema == SCHEMA
+        mock_get.assert_not_called()
+
+    def test_expired_copy_is_used_when_the_fetch_fails(self, temp_dir):
+        """
+        Given an expired cached schema
+        When the schema host is unreachable
+        Then the expired copy is used
+        """
+        # Given
+        store = SchemaStore(temp_dir / "cache", ttl=0)
+        with patch("time.time", return_value=time.time() - 60):
+            store.save(URL, SCHEMA)
+        set_schema_store(store)
+
+        # When
+        with patch("scripts.transport.get", side_effect=requests.ConnectionError("down")):
+            schema = fetch_remote_schema(URL)
+
+        # Then
+        assert schema == SCHEMA
+
+
+class TestBundledSchemaSet:
+    """Tests for validating server files offline from the bundled set."""
+
+    def sample_server(self, root: Path) -> Path:
+        """Copy one of the repository's server files into root."""
+        path = root / "mcps" / "sonarqube" / "server.json"
+        path.parent.mkdir(parents=True)
+        path.write_text((REPO_ROOT / "mcps" / "sonarqube" / "server.json").read_text())
+        return path
+
+    def test_vendored_schema_validates_a_server_with_the_network_down(self, temp_dir):
+        """
+        Given a sample server whose schema is vendored, and no schema cache
+        When it is validated while every request fails
+        Then it validates against the vendored copy without a request
+        """
+        # Given
+        path = self.sample_server(temp_dir)
+        schema_url = json.loads(path.read_text())["$schema"]
+        store = SchemaStore(None, bundled_dir=temp_dir / "remote")
+        store.vendor(schema_url, SCHEMA)
+        set_schema_store(store)
+
+        # When
+        with patch(
+            "scripts.transport.get", side_effect=requests.ConnectionError("offline")
+        ) as mock_get:
+            results = validate_server_files([path], temp_dir)
+
+        # Then
+        assert [r.is_valid for r in results] == [True]
+        mock_get.assert_not_called()
+
+    @pytest.mark.xfail(
+        strict=True,
+        reason="server.schema.json (2025-09-29) is not vendored yet; run `schemas vendor`",
+    )
+    def test_repository_servers_validate_from_the_shipped_bundle(self):
+        """
+        Given the repository's bundled set and no schema cache
+        When every private server is validated while every request fails
+        Then all of them validate without a request
+        """
+        # Given
+        registry_config = json.loads((REPO_ROOT / "registry.json").read_text())
+        paths = [
+            REPO_ROOT / rel_path
+            for reg in registry_config["registries"]
+            for rel_path in reg.get("servers_relative_path", [])
+        ]
+        set_schema_store(schema_store_from_config({"schemaCache": {"enabled": False}}, REPO_ROOT))
+
+        # When
+        with patch(
+            "scripts.transport.get", side_effect=requests.ConnectionError("offline")
+        ) as mock_get:
+            results = validate_server_files(paths, REPO_ROOT)
+
+        # Then
+        assert paths and all(r.is_valid for r in results)
+        mock_get.assert_not_called()
@@ -0,0 +1,128 @@
+"""Tests for incremental registry sync using BDD style (Given-When-Then)."""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from scripts.fetcher import sync_server_list
+from scripts.snapshot import Snapshot, SnapshotStore
+
+URL = "https://example.com"
+
+
+@pytest.fixture
+def store():
+    """Create a snapshot store in a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield SnapshotStore(Path(tmpdir) / "snapshots")
+
+
+def listed(name, version, status="active", updated_at="2025-10-01T00:00:00Z"):
+    """Build a server list entry."""
+    return {
+        "server": {"name": name, "version": version},
+        "_meta": {
+            "io.modelcontextprotocol.registry/official": {
+                "status": status,
+                "updatedAt": updated_at,
+            }
+        },
+    }
+
+
+class TestSnapshotStore:
+    """Tests for saving and loading snapshots."""
+
+    def test_round_trips_snapshot(self, store):
+        """
+        Given a saved snapshot
+        When it is loaded by URL (with or without trailing slash)
+        Then the same servers and timestamp should be returned
+        """
+        # Given
+        store.save(Snapshot(URL, "2025-10-01T00:00:00Z", [listed("a/one", "1.0.0")]))
+
+        # When
+        snapshot = store.load(URL + "/")
+
+        # Then
+        assert snapshot is not None
+        assert snapshot.synced_at == "2025-10-01T00:00:00Z"
+        assert snapshot.servers[0]["server"]["name"] == "a/one"
+
+    def test_missing_snapshot_returns_none(self, store):
+        """Given no snapshot, load returns None."""
+        assert store.load(URL) is None
+
+
+class TestSyncServerList:
+    """Tests for merging deltas into the stored listing."""
+
+    def test_first_sync_fetches_full_listing(self, store):
+        """
+        Given no snapshot
+        When sync_server_list is called
+        Then the full listing should be fetched without updated_since
+        """
+        # Given
+        listing = [listed("a/one", "1.0.0"), listed("b/two", "1.0.0")]
+
+        with patch("scripts.fetcher.fetch_server_list", return_value=iter(listing)) as mock_list:
+            # When
+            servers = sync_server_list(URL, store)
+
+        # Then
+        mock_list.assert_called_once_with(URL, 30)
+        assert len(servers) == 2
+        assert store.load(URL) is not None
+
+    def test_delta_is_merged_into_snapshot(self, store):
+        """
+        Given a snapshot and a delta with a new, a deprecated and a deleted server
+        When sync_server_list is called
+        Then only the delta should be requested and merged into the listing
+        """
+        # Given
+        store.save(Snapshot(URL, "2025-10-01T00:00:00Z", [
+            listed("a/one", "1.0.0"),
+            listed("b/two", "1.0.0"),
+            listed("c/three", "1.0.0"),
+        ]))
+        delta = [
+            listed("b/two", "1.0.0", status="deprecated", updated_at="2025-10-02T00:00:00Z"),
+            listed("c/three", "1.0.0", status="deleted", updated_at="2025-10-02T00:00:00Z"),
+            listed("d/four", "1.0.0", updated_at="2025-10-02T00:00:00Z"),
+        ]
+
+        with patch("scripts.fetcher.fetch_server_list", return_value=iter(delta)) as mock_list:
+            # When
+            servers = sync_server_list(URL, store)
+
+        # Then
+        mock_list.assert_called_once_with(URL, 30, updated_since="2025-10-01T00:00:00Z")
+        names = [s["server"]["name"] for s in servers]
+        assert names == ["a/one", "b/two", "d/four"]
+        status = servers[1]["_meta"]["io.modelcontextprotocol.registry/official"]["status"]
+        assert status == "deprecated"
+
+    def test_registry_ignoring_updated_since_replaces_snapshot(self, store):
+        """
+        Given a registry that returns entries older than updated_since
+        When sync_server_list is called
+        Then the response should be treated as the full listing
+        """
+        # Given
+        store.save(Snapshot(URL, "2025-10-01T00:00:00Z", [
+            listed("a/one", "1.0.0"),
+            listed("gone/server", "1.0.0"),
+        ]))
+        full = [listed("a/one", "1.0.0", updated_at="2025-09-01T00:00:00Z")]
+
+        with patch("scripts.fetcher.fetch_server_list", return_value=iter(full)):
+            # When
+            servers = sync_server_list(URL, store)
+
+        # Then
+        assert [s["server"]["name"] for s in servers] == ["a/one"]
@@ -0,0 +1,139 @@
+"""Tests for the static API tree using BDD style (Given-When-Then)."""
+
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from scripts.fetcher import ServerEntry
+from scripts.static_api import write_static_api
+
+NOW = "2026-01-01T00:00:00Z"
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def public_entry(name: str, version: str = "1.0.0") -> ServerEntry:
+    return ServerEntry(
+        name=name,
+        version=version,
+        data={"server": {"name": name, "version": version}},
+        source="Public",
+    )
+
+
+def load(path: Path) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+class TestListPages:
+    """Tests for the paginated server list."""
+
+    def test_pages_are_linked_by_next_cursor(self, temp_dir):
+        """
+        Given five servers and a page size of two
+        When write_static_api is called
+        Then three pages are written, each pointing at the next, the last without a cursor
+        """
+        # Given
+        servers = [public_entry(f"acme/server-{i}") for i in range(5)]
+
+        # When
+        stats = write_static_api(servers, temp_dir, page_size=2, now=NOW)
+
+        # Then
+        pages_dir = temp_dir / "v0.1" / "servers"
+        assert stats.pages == 3
+        first = load(pages_dir / "page-1.json")
+        assert [s["server"]["name"] for s in first["servers"]] == ["acme/server-0", "acme/server-1"]
+        assert first["metadata"] == {"count": 2, "nextCursor": "page-2"}
+        assert load(pages_dir / "page-2.json")["metadata"]["nextCursor"] == "page-3"
+        assert load(pages_dir / "page-3.json")["metadata"] == {"count": 1}
+
+    def test_empty_registry_writes_one_empty_page(self, temp_dir):
+        """
+        Given no servers
+        When write_static_api is called
+        Then a single empty first page is written
+        """
+        # When
+        write_static_api([], temp_dir, now=NOW)
+
+        # Then
+        page = load(temp_dir / "v0.1" / "servers" / "page-1.json")
+        assert page == {"servers": [], "metadata": {"count": 0}}
+
+    def test_removed_servers_disappear_on_rewrite(self, temp_dir):
+        """
+        Given a tree written with two servers
+        When it is rewritten with one of them
+        Then the other server's documents and the extra page are gone
+        """
+        # Given
+        write_static_api(
+            [public_entry("acme/a"), public_entry("acme/b")], temp_dir, page_size=1, now=NOW
+        )
+
+        # When
+        write_static_api([public_entry("acme/a")], temp_dir, page_size=1, now=NOW)
+
+        # Then
+        servers_dir = temp_dir / "v0.1" / "servers"
+        assert not (servers_dir / "page-2.json").exists()
+        assert not (servers_dir / "acme%2Fb").exists()
+        assert (servers_dir / "acme%2Fa" / "versions" / "latest.json").exists()
+
+
+class TestVersionDocuments:
+    """Tests for the per-server version documents."""
+
+    def test_version_and_latest_mirror_fetch_server_version_urls(self, temp_dir):
+        """
+        Given a server whose name contains a slash
+        When write_static_api is called
+        Then its version and latest documents live under the URL-encoded name
+        """
+        # Given
+        server = public_entry("io.github.acme/tool", "2.1.0")
+
+        # When
+        write_static_api([server], temp_dir, now=NOW)
+
+        # Then
+        versions_dir = temp_dir / "v0.1" / "servers" / "io.github.acme%2Ftool" / "versions"
+        expected = {
+            "server": {"name": "io.github.acme/tool", "version": "2.1.0"},
+            "_source": "Public",
+        }
+        assert load(versions_dir / "2.1.0.json") == expected
+        assert load(versions_dir / "latest.json") == expected
+
+    def test_private_server_documents_carry_publisher_meta(self, temp_dir):
+        """
+        Given a private server
+        When write_static_api is called
+        Then its version document matches its entry in the list page
+        """
+        # Given - flattened format, as loaded from server.json
+        server = ServerEntry(
+            name="my-org/private",
+            version="0.1.0",
+            data={"name": "my-org/private", "version": "0.1.0"},
+            source="private",
+        )
+
+        # When
+        write_static_api([server], temp_dir, registry_name="example/private", now=NOW)
+
+        # Then
+        servers_dir = temp_dir / "v0.1" / "servers"
+        document = load(servers_dir / "my-org%2Fprivate" / "versions" / "0.1.0.json")
+        assert document == load(servers_dir / "page-1.json")["servers"][0]
+        assert document["_meta"]["example/private"]["publishedAt"] == NOW
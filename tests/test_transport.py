@@ -0,0 +1,76 @@
+"""Tests for the shared HTTP transport using BDD style (Given-When-Then)."""
+
+import pytest
+
+from scripts import transport
+
+
+@pytest.fixture(autouse=True)
+def reset_transport():
+    """Restore default transport settings after each test."""
+    yield
+    transport.configure()
+
+
+class TestSharedSession:
+    """Tests for the pooled session."""
+
+    def test_session_is_reused_between_calls(self):
+        """
+        Given the shared transport
+        When get_session is called twice
+        Then the same session should be returned
+        """
+        # When
+        first = transport.get_session()
+        second = transport.get_session()
+
+        # Then
+        assert first is second
+
+    def test_configure_applies_pool_limits(self):
+        """
+        Given custom pool settings
+        When the session is created
+        Then its adapter should use those limits and block when exhausted
+        """
+        # Given
+        transport.configure(pool_size=4, max_per_host=2)
+
+        # When
+        adapter = transport.get_session().get_adapter("https://example.com")
+
+        # Then
+        assert adapter._pool_connections == 4
+        assert adapter._pool_maxsize == 2
+        assert adapter._pool_block is True
+
+    def test_configure_from_config_disables_gzip(self):
+        """
+        Given a config.json with gzip disabled
+        When configure_from_config is called
+        Then the session should not negotiate compression
+        """
+        # Given
+        config = {"http": {"gzip": False}}
+
+        # When
+        transport.configure_from_config(config)
+
+        # Then
+        assert transport.get_session().headers["Accept-Encoding"] == "identity"
+
+    def test_configure_replaces_existing_session(self):
+        """
+        Given an existing shared session
+        When configure is called
+        Then a new session should be created on next use
+        """
+        # Given
+        old = transport.get_session()
+
+        # When
+        transport.configure(pool_size=2)
+
+        # Then
+        assert transport.get_session() is not old
@@ -0,0 +1,144 @@
+"""Tests for the server validation cache using BDD style (Given-When-Then)."""
+
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from scripts import validator
+from scripts.validation_cache import ValidationCache, changed_files
+from scripts.validator import validate_server_files
+
+SCHEMA_URL = "https://example.com/schemas/server.schema.json"
+SCHEMA = {"type": "object", "required": ["name", "version"]}
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture(autouse=True)
+def known_schema():
+    validator._schema_cache[SCHEMA_URL] = SCHEMA
+    yield
+    validator._schema_cache.clear()
+
+
+def write_server(root: Path, name: str, **fields) -> Path:
+    path = root / "mcps" / name / "server.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"$schema": SCHEMA_URL, "name": f"acme/{name}", **fields}))
+    return path
+
+
+def validate_counting(paths: list[Path], root: Path, cache: ValidationCache):
+    """Validate, returning the results and how many files were checked against the schema."""
+    with patch.object(
+        validator, "validate_against_schema", wraps=validator.validate_against_schema
+    ) as checked:
+        results = validate_server_files(paths, root, cache=cache)
+    return results, checked.call_count
+
+
+class TestValidationCache:
+    """Tests for skipping server files that haven't changed."""
+
+    def test_unchanged_files_are_not_validated_again(self, temp_dir):
+        """
+        Given a valid and an invalid server file validated by a previous run
+        When the next run loads the saved cache
+        Then neither file is validated again, and the invalid one still reports its error
+        """
+        # Given
+        paths = [
+            write_server(temp_dir, "valid", version="1.0.0"),
+            write_server(temp_dir, "invalid"),
+        ]
+        cache_path = temp_dir / ".cache" / "validation.json"
+        cache = ValidationCache.load(cache_path)
+        first, first_checked = validate_counting(paths, temp_dir, cache)
+        cache.save()
+
+        # When
+        second, second_checked = validate_counting(
+            paths, temp_dir, ValidationCache.load(cache_path)
+        )
+
+        # Then
+        assert (first_checked, second_checked) == (2, 0)
+        assert [r.errors for r in second] == [r.errors for r in first]
+        assert [r.is_valid for r in second] == [True, False]
+
+    def test_changed_content_or_schema_is_validated_again(self, temp_dir):
+        """
+        Given two server files recorded in the cache
+        When one file's content changes, and then the schema changes
+        Then only the changed file is validated, and then both are
+        """
+        # Given
+        paths = [
+            write_server(temp_dir, "a", version="1.0.0"),
+            write_server(temp_dir, "b", version="1.0.0"),
+        ]
+        cache = ValidationCache(temp_dir / "validation.json")
+        validate_server_files(paths, temp_dir, cache=cache)
+
+        # When
+        write_server(temp_dir, "a", version=2)
+        _, content_checked = validate_counting(paths, temp_dir, cache)
+        validator._schema_cache[SCHEMA_URL] = {**SCHEMA, "required": ["name"]}
+        results, schema_checked = validate_counting(paths, temp_dir, cache)
+
+        # Then
+        assert (content_checked, schema_checked) == (1, 2)
+        assert all(r.is_valid for r in results)
+
+
+class TestChangedFiles:
+    """Tests for listing the files changed since a git ref."""
+
+    def git(self, root: Path, *args: str) -> None:
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+            cwd=root, check=True, capture_output=True,
+        )
+
+    def test_lists_modified_and_untracked_files(self, temp_dir):
+        """
+        Given a repository with two committed server files
+        When one is modified and a new one is added without committing
+        Then those two are listed as changed since HEAD
+        """
+        # Given
+        self.git(temp_dir, "init", "-q")
+        write_server(temp_dir, "a", version="1.0.0")
+        write_server(temp_dir, "b", version="1.0.0")
+        self.git(temp_dir, "add", ".")
+        self.git(temp_dir, "commit", "-q", "-m", "servers")
+
+        # When
+        write_server(temp_dir, "a", version="2.0.0")
+        write_server(temp_dir, "c", version="1.0.0")
+        changed = changed_files(temp_dir, "HEAD")
+
+        # Then
+        assert changed == {"mcps/a/server.json", "mcps/c/server.json"}
+
+    def test_unknown_ref_raises_value_error(self, temp_dir):
+        """
+        Given a repository
+        When changes are listed since a ref that doesn't exist
+        Then a ValueError explains the failure
+        """
+        # Given
+        self.git(temp_dir, "init", "-q")
+
+        # When/Then
+        with pytest.raises(ValueError):
+            changed_files(temp_dir, "no-such-ref")
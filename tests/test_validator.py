@@ -3,13 +3,21 @@
 import json
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
+import jsonschema
 import pytest
 
+from scripts import validator
+from scripts.transport import build_response
 from scripts.validator import (
     ValidationResult,
+    check_patterns,
+    schema_validator,
+    validate_against_schema,
     validate_config,
     validate_registry,
+    validate_server_files,
 )
 
 
@@ -204,6 +212,140 @@ class TestValidateRegistry:
         assert any("not found" in e.message.lower() for e in result.errors)
 
 
+class TestSchemaValidatorCache:
+    """Tests for compiling each schema's validator once."""
+
+    @pytest.fixture(autouse=True)
+    def empty_caches(self):
+        for cache in (validator._validator_cache, validator._validators_by_id,
+                      validator._schema_cache):
+            cache.clear()
+        yield
+        for cache in (validator._validator_cache, validator._validators_by_id,
+                      validator._schema_cache):
+            cache.clear()
+
+    def test_validator_is_built_once_per_schema_content(self):
+        """
+        Given one schema object and an equal copy of it
+        When several documents are validated against them
+        Then a single compiled validator serves all of them
+        """
+        # Given
+        schema = {"type": "object", "required": ["name"]}
+        copy = json.loads(json.dumps(schema))
+
+        # When
+        with patch.object(
+            jsonschema.validators, "validator_for", wraps=jsonschema.validators.validator_for
+        ) as validator_for:
+            results = [
+                validate_against_schema({"name": "a"}, schema, "a.json"),
+                validate_against_schema({}, schema, "b.json"),
+                validate_against_schema({}, copy, "c.json"),
+            ]
+
+        # Then
+        assert validator_for.call_count == 1
+        assert schema_validator(schema) is schema_validator(copy)
+        assert [r.is_valid for r in results] == [True, False, False]
+
+    def test_draft_follows_declared_schema(self):
+        """
+        Given a 2020-12 schema using prefixItems, and one declaring no draft
+        When validators are built for them
+        Then the 2020-12 rules apply to the first and Draft 7 to the second
+        """
+        # Given
+        schema = {
+            "$schema": "https://json-schema.org/draft/2020-12/schema",
+            "type": "array",
+            "prefixItems": [{"type": "string"}],
+        }
+
+        # When
+        result = validate_against_schema([1], schema, "list.json")
+
+        # Then
+        assert isinstance(schema_validator(schema), jsonschema.Draft202012Validator)
+        assert isinstance(schema_validator({"type": "object"}), jsonschema.Draft7Validator)
+        assert not result.is_valid
+
+    def test_remote_refs_are_fetched_once(self):
+        """
+        Given a schema referencing a remote definition
+        When two documents are validated against it
+        Then the remote schema is fetched only once
+        """
+        # Given
+        url = "https://example.com/defs.json"
+        remote = {"type": "string", "minLength": 2}
+        schema = {"type": "object", "properties": {"name": {"$ref": url}}}
+
+        def get(*args, **kwargs):
+            return build_response(url, 200, json.dumps(remote).encode())
+
+        # When
+        with patch("scripts.transport.get", side_effect=get) as mock_get:
+            first = validate_against_schema({"name": "ok"}, schema, "a.json")
+            second = validate_against_schema({"name": "x"}, schema, "b.json")
+
+        # Then
+        assert mock_get.call_count == 1
+        assert first.is_valid
+        assert not second.is_valid
+
+
+class TestValidateServerFiles:
+    """Tests for validating server.json files in parallel."""
+
+    SCHEMA_URL = "https://example.com/schemas/server.schema.json"
+
+    @pytest.fixture(autouse=True)
+    def known_schema(self):
+        validator._schema_cache[self.SCHEMA_URL] = {
+            "type": "object",
+            "required": ["name", "version"],
+            "properties": {"version": {"type": "string"}},
+        }
+        yield
+        validator._schema_cache.clear()
+
+    def test_parallel_results_match_serial_order(self, temp_dir):
+        """
+        Given valid, invalid, unreadable and missing server files
+        When they are validated with several jobs
+        Then the results equal a serial run, in the same path order
+        """
+        # Given
+        server_paths = []
+        for i in range(12):
+            path = temp_dir / "mcps" / f"server-{i}" / "server.json"
+            path.parent.mkdir(parents=True)
+            data = {"$schema": self.SCHEMA_URL, "name": f"acme/server-{i}"}
+            if i % 3 == 0:
+                data["version"] = "1.0.0"
+            elif i % 3 == 1:
+                data["version"] = 1
+            path.write_text(json.dumps(data))
+            server_paths.append(path)
+        server_paths[5].write_text("{not json")
+        server_paths.append(temp_dir / "mcps" / "missing" / "server.json")
+
+        # When
+        serial = validate_server_files(server_paths, temp_dir, jobs=1)
+        parallel = validate_server_files(server_paths, temp_dir, jobs=4)
+
+        # Then
+        assert [(r.errors, r.warnings) for r in parallel] == [
+            (r.errors, r.warnings) for r in serial
+        ]
+        assert [r.is_valid for r in parallel] == [
+            i % 3 == 0 for i in range(12)
+        ] + [False]
+        assert "Invalid JSON" in parallel[5].errors[0].message
+
+
 class TestValidationResult:
     """Tests for ValidationResult behavior."""
 
@@ -249,3 +391,42 @@ class TestValidationResult:
 
         # Then
         assert len(result1.errors) == 2
+
+    def test_warnings_do_not_invalidate_result(self):
+        """Given only warnings, the result is still valid."""
+        result = ValidationResult()
+        result.add_warning("registry.json", "registries.0.exclude", "unused")
+        assert result.is_valid
+
+
+class TestCheckPatterns:
+    """Tests for warnings about patterns that match no listed server."""
+
+    def test_warns_about_unmatched_patterns_and_excludes(self):
+        """
+        Given a registry with author patterns and excludes, and its listing
+        When check_patterns is called
+        Then patterns and excludes matching no server should be warned about
+        """
+        # Given
+        registry = {"registries": [
+            {
+                "name": "Upstream",
+                "url": "https://example.com",
+                "servers": {"acme/*": "latest", "ghost/*": "latest", "ai.exa/exa": "latest"},
+                "exclude": ["acme/*-preview", "acme/tool"],
+            },
+            {"name": "Unsynced", "url": "https://other.example.com", "servers": "*"},
+            {"name": "private", "type": "private", "servers_relative_path": ["a.json"]},
+        ]}
+        listings = {"https://example.com": ["acme/tool", "beta/x"]}
+
+        # When
+        result = check_patterns(registry, listings, "registry.json")
+
+        # Then
+        assert result.is_valid
+        assert [(w.path, w.message) for w in result.warnings] == [
+            ("registries.0.servers", "'ghost/*' matches no server in Upstream"),
+            ("registries.0.exclude", "'acme/*-preview' excludes no server in Upstream"),
+        ]